@@ -0,0 +1,36 @@
+-- Add the columns used by the token refresh scheduler and the webhook
+-- dispatcher/retry worker to existing databases.
+-- Safe to re-run.
+
+ALTER TABLE tiktok_shops
+ADD COLUMN IF NOT EXISTS access_token_expires_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS token_refresh_failures INTEGER DEFAULT 0,
+ADD COLUMN IF NOT EXISTS token_refresh_claimed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS ix_tiktok_shops_access_token_expires_at ON tiktok_shops(access_token_expires_at);
+
+-- TikTok Shop returns the access token expiry as a unix timestamp. Shops
+-- stored with a lifetime in seconds instead are left NULL and get refreshed
+-- once by the scheduler, which records their expiry.
+UPDATE tiktok_shops
+SET access_token_expires_at = to_timestamp(access_token_expire_in)
+WHERE access_token_expires_at IS NULL
+  AND access_token_expire_in > 1000000000;
+
+UPDATE tiktok_shops
+SET token_refresh_failures = 0
+WHERE token_refresh_failures IS NULL;
+
+ALTER TABLE webhook_events
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE;
+
+CREATE INDEX IF NOT EXISTS ix_webhook_events_retry_due ON webhook_events(status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS ix_webhook_events_claimed ON webhook_events(status, claimed_at);
+CREATE INDEX IF NOT EXISTS ix_webhook_events_shop_order ON webhook_events(shop_id, received_at);
+
+-- Events already waiting for a retry become due straight away
+UPDATE webhook_events
+SET next_attempt_at = now()
+WHERE status = 'retrying'
+  AND next_attempt_at IS NULL;
@@ -53,7 +53,9 @@ async def search_orders(
         )
         
         # Cache the result for 5 minutes
-        await cache_manager.set(cache_key, result.json(), expire=300)
+        await cache_manager.set(
+            cache_key, result.json(), expire=300, namespace=f"orders:search:{shop_id}"
+        )
         
         return result
         
@@ -69,7 +69,9 @@ async def search_products(
         
         # Cache the result for 10 minutes
         if use_cache and result.products:
-            await cache_manager.set(cache_key, result.json(), expire=600)
+            await cache_manager.set(
+                cache_key, result.json(), expire=600, namespace=f"products:search:{shop_id}"
+            )
         
         # Add search metadata
         result.search_params = search_request.dict(exclude_unset=True)
@@ -124,7 +126,9 @@ async def get_product_detail(
         
         # Cache product details (without inventory data)
         if not include_inventory:
-            await cache_manager.set(cache_key, product.json(), expire=1800)  # 30 minutes
+            await cache_manager.set(
+                cache_key, product.json(), expire=1800, namespace=f"product:detail:{shop_id}"
+            )  # 30 minutes
         
         return product
         
@@ -163,8 +167,8 @@ async def sync_products(
             sync_id = await product_service.start_changes_sync(shop_id, background_tasks)
         
         # Clear product cache for this shop
-        await cache_manager.delete_pattern(f"products:*:{shop_id}:*")
-        await cache_manager.delete_pattern(f"product:*:{shop_id}:*")
+        await cache_manager.delete_namespace(f"products:search:{shop_id}")
+        await cache_manager.delete_namespace(f"product:detail:{shop_id}")
         
         return {
             "message": f"Product {sync_mode} sync started",
@@ -3,28 +3,17 @@ from fastapi import APIRouter, Request, HTTPException, Header, BackgroundTasks,
 from app.services.webhook_service import WebhookService
 from app.models.schemas import WebhookEvent
 from app.utils.webhook_validator import validate_webhook_payload
+from app.core.webhook_dedup import webhook_dedup
+from app.services.webhook_dispatcher import webhook_dispatcher
 import logging
 import time
 import json
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# In-memory store for processed webhook IDs (use Redis in production)
-processed_webhooks = {}
-
-def cleanup_old_webhooks():
-    """Remove webhook IDs older than 24 hours"""
-    current_time = datetime.utcnow()
-    expired_keys = [
-        k for k, v in processed_webhooks.items() 
-        if current_time - v > timedelta(hours=24)
-    ]
-    for key in expired_keys:
-        del processed_webhooks[key]
-
 @router.post("/tiktok")
 async def handle_tiktok_webhook(
     request: Request,
@@ -72,16 +61,10 @@ async def handle_tiktok_webhook(
     
     # 3. Check for duplicate webhooks (deduplication)
     if x_webhook_id:
-        if x_webhook_id in processed_webhooks:
+        # Atomic check-and-mark shared by all workers (SET NX EX in Redis)
+        if not await webhook_dedup.mark_processed(x_webhook_id):
             logger.info(f"Duplicate webhook detected - ID: {x_webhook_id}")
             return {"status": "already_processed", "webhook_id": x_webhook_id}
-        
-        # Mark as processed
-        processed_webhooks[x_webhook_id] = datetime.utcnow()
-        
-        # Schedule cleanup
-        if len(processed_webhooks) > 10000:  # Prevent memory overflow
-            cleanup_old_webhooks()
     
     # 4. Parse and validate webhook data
     try:
@@ -98,8 +81,12 @@ async def handle_tiktok_webhook(
         if not event_type or not shop_id:
             raise HTTPException(status_code=400, detail="Missing required webhook fields")
         
-        # 5. Process webhook asynchronously (simplified for now)
-        await webhook_service.process_webhook(data)
+        # 5. Persist and acknowledge; consumers process it in per-shop order
+        event_id = await webhook_dispatcher.submit(
+            x_webhook_id,
+            data,
+            headers={"timestamp": x_tiktok_timestamp, "nonce": x_tiktok_nonce}
+        )
         
         # Log successful reception
         logger.info(f"Webhook accepted for processing - Type: {event_type}, Shop: {shop_id}")
@@ -107,6 +94,7 @@ async def handle_tiktok_webhook(
         return {
             "status": "accepted",
             "webhook_id": x_webhook_id,
+            "event_id": event_id,
             "event_type": event_type,
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -116,6 +104,9 @@ async def handle_tiktok_webhook(
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}")
+        # Let TikTok's redelivery be processed instead of treated as a duplicate
+        if x_webhook_id:
+            await webhook_dedup.forget(x_webhook_id)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/tiktok/status")
@@ -123,8 +114,7 @@ async def webhook_status():
     """Check webhook endpoint status"""
     return {
         "status": "operational",
-        "processed_count": len(processed_webhooks),
-        "oldest_webhook": min(processed_webhooks.values()).isoformat() if processed_webhooks else None,
+        "dedup_store": webhook_dedup.stats(),
         "signature_verification": "enabled",
         "replay_protection": "enabled",
         "deduplication": "enabled"
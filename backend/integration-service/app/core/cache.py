@@ -1,30 +1,213 @@
-# app/core/cache.py - Simplified version without Redis
+# app/core/cache.py
+from app.core.config import settings
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+import fnmatch
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# SET the value and add its key to the namespace index, keeping the index
+# alive at least as long as its longest-lived member
+_SET_WITH_NAMESPACE = """
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+redis.call('SADD', KEYS[2], KEYS[1])
+if redis.call('TTL', KEYS[2]) < tonumber(ARGV[2]) then
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+end
+"""
+
+class LRUCache:
+    """
+    In-process cache with a per-key TTL and at most `max_entries` keys.
+
+    Expired entries are dropped when read (O(1)); when full, the least
+    recently used entry is evicted. Keys set with a namespace are indexed
+    so the whole namespace can be dropped without scanning every key.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(max_entries, 1)
+        self._entries: "OrderedDict[str, Tuple[str, float, Optional[str]]]" = OrderedDict()
+        self._namespaces: Dict[str, Set[str]] = {}
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, expire: int, namespace: Optional[str] = None):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + expire, namespace)
+        if namespace is not None:
+            self._namespaces.setdefault(namespace, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def delete(self, key: str):
+        if key in self._entries:
+            self._remove(key)
+
+    def delete_namespace(self, namespace: str) -> int:
+        keys = self._namespaces.pop(namespace, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def keys(self):
+        return list(self._entries)
+
+    def _remove(self, key: str):
+        _, _, namespace = self._entries.pop(key)
+        if namespace is not None:
+            keys = self._namespaces.get(namespace)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._namespaces[namespace]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class CacheManager:
+    """
+    String cache for API responses.
+
+    Uses Redis when REDIS_URL is configured (falling back to the in-process
+    LRUCache while it is unreachable), otherwise the LRUCache alone. Keys
+    passed a `namespace` on set() are indexed under it, so
+    delete_namespace() invalidates e.g. one shop's product searches
+    without a key scan.
+    """
+
     def __init__(self):
-        self.memory_cache = {}
-        self.use_redis = False
-    
+        self.redis = None
+        self.namespace_prefix = "cache:ns:"
+        self.default_expire = settings.CACHE_DEFAULT_TTL_SECONDS
+        self.local = LRUCache(settings.CACHE_MAX_ENTRIES)
+        self._set_with_namespace = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def use_redis(self) -> bool:
+        return self.redis is not None
+
     async def connect(self):
         """Initialize cache connection"""
-        pass
-    
-    async def get(self, key: str):
+        if not settings.REDIS_URL:
+            logger.info("Cache using in-process LRU (REDIS_URL not set)")
+            return
+
+        try:
+            import redis.asyncio as redis
+            client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+            await client.ping()
+            self.redis = client
+            self._set_with_namespace = client.register_script(_SET_WITH_NAMESPACE)
+            logger.info("Cache using Redis")
+        except Exception as e:
+            logger.error(f"Cache could not connect to Redis, using in-process LRU: {e}")
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    async def get(self, key: str) -> Optional[str]:
         """Get value from cache"""
-        return self.memory_cache.get(key)
-    
-    async def set(self, key: str, value: str, expire: int = 3600):
-        """Set value in cache"""
-        self.memory_cache[key] = value
-    
+        value = None
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(key)
+            except Exception as e:
+                logger.error(f"Redis cache get failed, using in-process LRU: {e}")
+                value = self.local.get(key)
+        else:
+            value = self.local.get(key)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None, namespace: Optional[str] = None):
+        """Set value in cache for `expire` seconds, optionally indexed under a namespace"""
+        expire = expire or self.default_expire
+        if self.redis is not None:
+            try:
+                if namespace is None:
+                    await self.redis.set(key, value, ex=expire)
+                else:
+                    await self._set_with_namespace(
+                        keys=[key, f"{self.namespace_prefix}{namespace}"], args=[value, expire]
+                    )
+                return
+            except Exception as e:
+                logger.error(f"Redis cache set failed, using in-process LRU: {e}")
+        self.local.set(key, value, expire, namespace)
+
     async def delete(self, key: str):
         """Delete key from cache"""
-        self.memory_cache.pop(key, None)
-    
+        if self.redis is not None:
+            try:
+                await self.redis.delete(key)
+            except Exception as e:
+                logger.error(f"Redis cache delete failed: {e}")
+        self.local.delete(key)
+
+    async def delete_namespace(self, namespace: str) -> int:
+        """Delete every key set under a namespace; returns how many were indexed"""
+        deleted = self.local.delete_namespace(namespace)
+        if self.redis is not None:
+            index_key = f"{self.namespace_prefix}{namespace}"
+            try:
+                keys = await self.redis.smembers(index_key)
+                await self.redis.delete(index_key, *keys)
+                deleted += len(keys)
+            except Exception as e:
+                logger.error(f"Redis cache namespace delete failed: {e}")
+        return deleted
+
     async def delete_pattern(self, pattern: str):
-        """Delete keys matching pattern"""
-        keys_to_delete = [k for k in self.memory_cache.keys() if pattern.replace('*', '') in k]
-        for key in keys_to_delete:
-            del self.memory_cache[key]
+        """Delete keys matching a glob pattern (scans keys; prefer delete_namespace)"""
+        for key in self.local.keys():
+            if fnmatch.fnmatchcase(key, pattern):
+                self.local.delete(key)
 
-cache_manager = CacheManager()
+        if self.redis is not None:
+            try:
+                keys = [key async for key in self.redis.scan_iter(match=pattern, count=500)]
+                if keys:
+                    await self.redis.delete(*keys)
+            except Exception as e:
+                logger.error(f"Redis cache pattern delete failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+            "local_evictions": self.local.evictions,
+            "local_expirations": self.local.expirations
+        }
 
+cache_manager = CacheManager()
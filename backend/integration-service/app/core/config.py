@@ -20,6 +20,19 @@ class Settings(BaseSettings):
     TIKTOK_AUTH_URL: str = "https://auth.tiktok-shops.com/oauth/authorize"
     TIKTOK_TOKEN_URL: str = "https://auth.tiktok-shops.com/api/v2/token"
     
+    # TikTok Shop API client (pooling, throttling, retries)
+    TIKTOK_MAX_CONNECTIONS: int = 100
+    TIKTOK_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    TIKTOK_APP_QPS: float = 50.0  # partner API limit per app
+    TIKTOK_APP_BURST: int = 50
+    TIKTOK_SHOP_QPS: float = 10.0  # partner API limit per shop
+    TIKTOK_SHOP_BURST: int = 10
+    TIKTOK_MAX_RETRIES: int = 4
+    TIKTOK_RETRY_BACKOFF_SECONDS: float = 0.5  # doubles per attempt, with jitter
+    TIKTOK_RETRY_MAX_BACKOFF_SECONDS: float = 30.0
+    ORDER_DETAIL_BATCH_SIZE: int = 50  # max order_id_list length of /api/orders/detail/query
+    ORDER_DETAIL_BATCH_WAIT_MS: float = 10.0  # window for coalescing single-order lookups
+    
     # TikTok Account Integration settings
     TIKTOK_CLIENT_ID: str = os.getenv("TIKTOK_CLIENT_ID", "")
     TIKTOK_CLIENT_SECRET: str = os.getenv("TIKTOK_CLIENT_SECRET", "")
@@ -30,6 +43,8 @@ class Settings(BaseSettings):
     
     # Redis settings (for caching tokens)
     REDIS_URL: Optional[str] = os.getenv("REDIS_URL", None)
+    CACHE_DEFAULT_TTL_SECONDS: int = 3600
+    CACHE_MAX_ENTRIES: int = 10000  # in-process LRU bound
     
     # JWT settings for internal auth
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
@@ -41,10 +56,38 @@ class Settings(BaseSettings):
     
     # Webhook settings
     WEBHOOK_SECRET: Optional[str] = os.getenv("WEBHOOK_SECRET", None)
+    WEBHOOK_DEDUP_TTL_SECONDS: int = 86400
+    WEBHOOK_DEDUP_BUCKET_SECONDS: int = 3600  # expiry granularity of the in-process fallback
+    WEBHOOK_DEDUP_MAX_LOCAL_IDS: int = 100000
+    WEBHOOK_CONSUMERS: int = 8  # events are partitioned across consumers by shop_id
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_QUEUE_SIZE: int = 1000  # per consumer; overflow waits in the database for recovery
+    WEBHOOK_RECOVERY_INTERVAL_SECONDS: int = 60
+    WEBHOOK_RECOVERY_GRACE_SECONDS: int = 30
+    WEBHOOK_PROCESSING_TIMEOUT_SECONDS: int = 600
+    WEBHOOK_RETRY_CONCURRENCY: int = 10
+    WEBHOOK_RETRY_BATCH_SIZE: int = 100
+    WEBHOOK_RETRY_BACKOFF_SECONDS: float = 30  # doubled per attempt
+    WEBHOOK_RETRY_MAX_BACKOFF_SECONDS: float = 3600
+    WEBHOOK_RETRY_POLL_SECONDS: int = 300  # upper bound on sleep; new failures wake the worker early
+    WEBHOOK_RETRY_MAX_AGE_HOURS: int = 24
+    TOKEN_REFRESH_INTERVAL_SECONDS: int = 3600
+    TOKEN_REFRESH_THRESHOLD_SECONDS: int = 7200  # refresh tokens expiring within this window
+    TOKEN_REFRESH_CONCURRENCY: int = 5
+    TOKEN_REFRESH_MAX_FAILURES: int = 5  # consecutive failures before a shop needs re-authorization
+    TOKEN_REFRESH_LEASE_SECONDS: int = 300  # a crashed refresh is retried after this
     
     # Security
     ALLOWED_HOSTS: List[str] = ["*"]
     
+    # Order/product sync settings
+    SYNC_PAGE_SIZE: int = 100
+    SYNC_PREFETCH_PAGES: int = 3  # pages fetched ahead of the database writer
+    SYNC_WATERMARK_OVERLAP_SECONDS: int = 300  # re-read window behind the watermark for late updates
+    SYNC_FULL_RECONCILE_HOURS: int = 24  # incremental syncs escalate to full once this old
+    SYNC_ORDER_RECONCILE_DAYS: int = 90  # create_time window of a full order sync
+    SYNC_STALE_AFTER_MINUTES: int = 30  # in-progress syncs past their ETA by this long are resumable
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,137 @@
+# app/core/webhook_dedup.py
+from app.core.config import settings
+from collections import deque
+from typing import Deque, Dict, Any, Optional, Set, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class TimeBucketedIdSet:
+    """
+    In-process set of ids that expire after roughly `ttl_seconds`.
+
+    Ids go into the set for the current `bucket_seconds` slice; whole
+    slices are dropped once they fall out of the TTL, so expiry is
+    amortized O(1) per insert. A slice that fills its share of `max_ids`
+    is continued in a fresh set, and the oldest set is dropped early while
+    more than `max_ids` are held, keeping memory bounded during bursts.
+    """
+
+    def __init__(self, ttl_seconds: int, bucket_seconds: int, max_ids: int):
+        self.bucket_seconds = max(bucket_seconds, 1)
+        self.bucket_count = max(ttl_seconds // self.bucket_seconds, 1)
+        self.max_ids = max_ids
+        self.bucket_capacity = max(max_ids // self.bucket_count, 1)
+        self._buckets: Deque[Tuple[int, Set[str]]] = deque()
+        self._size = 0
+
+    def _rotate(self) -> Set[str]:
+        """Drop expired buckets and return the current one"""
+        current = int(time.time() // self.bucket_seconds)
+        while self._buckets and self._buckets[0][0] <= current - self.bucket_count:
+            self._size -= len(self._buckets.popleft()[1])
+        if (
+            not self._buckets
+            or self._buckets[-1][0] != current
+            or len(self._buckets[-1][1]) >= self.bucket_capacity
+        ):
+            self._buckets.append((current, set()))
+        return self._buckets[-1][1]
+
+    def add(self, item: str) -> bool:
+        """Add an id; False if it is already present"""
+        bucket = self._rotate()
+        if any(item in ids for _, ids in self._buckets):
+            return False
+
+        bucket.add(item)
+        self._size += 1
+        while self._size > self.max_ids and len(self._buckets) > 1:
+            self._size -= len(self._buckets.popleft()[1])
+        return True
+
+    def discard(self, item: str):
+        for _, ids in self._buckets:
+            if item in ids:
+                ids.remove(item)
+                self._size -= 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def oldest_bucket_start(self) -> Optional[float]:
+        return self._buckets[0][0] * self.bucket_seconds if self._buckets else None
+
+class WebhookDedupStore:
+    """
+    Records processed webhook ids for deduplication.
+
+    Uses Redis `SET NX EX` when REDIS_URL is configured, so every worker
+    shares one store; otherwise (or while Redis is unreachable) falls back
+    to an in-process TimeBucketedIdSet.
+    """
+
+    def __init__(self):
+        self.ttl_seconds = settings.WEBHOOK_DEDUP_TTL_SECONDS
+        self.key_prefix = "webhook:processed:"
+        self.redis = None
+        self.local = TimeBucketedIdSet(
+            ttl_seconds=self.ttl_seconds,
+            bucket_seconds=settings.WEBHOOK_DEDUP_BUCKET_SECONDS,
+            max_ids=settings.WEBHOOK_DEDUP_MAX_LOCAL_IDS
+        )
+
+    async def connect(self):
+        """Connect to Redis if configured"""
+        if not settings.REDIS_URL:
+            logger.info("Webhook dedup using in-process store (REDIS_URL not set)")
+            return
+
+        try:
+            import redis.asyncio as redis
+            client = redis.from_url(settings.REDIS_URL)
+            await client.ping()
+            self.redis = client
+            logger.info("Webhook dedup using Redis")
+        except Exception as e:
+            logger.error(f"Webhook dedup could not connect to Redis, using in-process store: {e}")
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    async def mark_processed(self, webhook_id: str) -> bool:
+        """Record a webhook id; False if it was already recorded within the TTL"""
+        if self.redis is not None:
+            try:
+                return bool(await self.redis.set(
+                    f"{self.key_prefix}{webhook_id}", 1, nx=True, ex=self.ttl_seconds
+                ))
+            except Exception as e:
+                logger.error(f"Redis webhook dedup failed, using in-process store: {e}")
+        return self.local.add(webhook_id)
+
+    async def forget(self, webhook_id: str):
+        """Drop a webhook id so a redelivery is processed again (e.g. after a failure)"""
+        if self.redis is not None:
+            try:
+                await self.redis.delete(f"{self.key_prefix}{webhook_id}")
+            except Exception as e:
+                logger.error(f"Redis webhook dedup delete failed: {e}")
+        self.local.discard(webhook_id)
+
+    def stats(self) -> Dict[str, Any]:
+        oldest = self.local.oldest_bucket_start
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "ttl_seconds": self.ttl_seconds,
+            "local_tracked_count": len(self.local),
+            "local_oldest_bucket": (
+                time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(oldest)) if oldest is not None else None
+            )
+        }
+
+webhook_dedup = WebhookDedupStore()
@@ -8,7 +8,10 @@ from app.api.v1.api import api_router
 from app.core.config import settings
 from app.middleware.error_handler import error_handler_middleware
 from app.core.cache import cache_manager
+from app.core.webhook_dedup import webhook_dedup
 from app.models.database import engine, Base
+from app.services.tiktok_client import TikTokShopClient
+from app.services.webhook_dispatcher import webhook_dispatcher
 import logging
 import asyncio
 
@@ -39,6 +42,8 @@ async def lifespan(app: FastAPI):
     await cache_manager.connect()
     logger.info("Cache service connected")
     
+    await webhook_dedup.connect()
+    
     # Start token refresh scheduler
     try:
         from app.utils.token_refresh_scheduler import TokenRefreshScheduler
@@ -49,11 +54,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to start token refresh scheduler: {e}")
     
+    # Start webhook consumers
+    await webhook_dispatcher.start()
+    
     # Start webhook retry worker
     try:
-        from app.services.webhook_retry_worker import WebhookRetryWorker
-        retry_worker = WebhookRetryWorker()
-        retry_task = asyncio.create_task(retry_worker.start())
+        from app.services.webhook_retry_worker import webhook_retry_worker
+        retry_task = asyncio.create_task(webhook_retry_worker.start())
         background_tasks.append(retry_task)
         logger.info("Webhook retry worker started")
     except Exception as e:
@@ -69,7 +76,12 @@ async def lifespan(app: FastAPI):
         task.cancel()
     
     await asyncio.gather(*background_tasks, return_exceptions=True)
+    await webhook_dispatcher.stop()
     logger.info("Background tasks stopped")
+    
+    await TikTokShopClient.close_pool()
+    await webhook_dedup.close()
+    await cache_manager.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -138,6 +150,7 @@ async def health_check():
     
     # Check cache
     health_status["services"]["cache"] = "healthy" if cache_manager else "unavailable"
+    health_status["cache"] = cache_manager.stats()
     
     return health_status
 
@@ -64,6 +64,7 @@ class ProductListResponse(BaseModel):
     has_more: bool
     search_params: Optional[Dict[str, Any]] = None
     cached: Optional[bool] = False
+    sync_counts: Optional[Dict[str, int]] = None  # inserted/updated/unchanged rows for this page
 
 # Order schemas
 class OrderLineItem(BaseModel):
@@ -102,6 +103,7 @@ class OrderListResponse(BaseModel):
     total: int
     orders: List[OrderBase]
     has_more: bool
+    sync_counts: Optional[Dict[str, int]] = None  # inserted/updated/unchanged rows for this page
 
 # Webhook schemas
 class WebhookEvent(BaseModel):
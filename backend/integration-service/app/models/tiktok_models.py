@@ -1,5 +1,5 @@
 # app/models/tiktok_models.py - Simplified version
-from sqlalchemy import Column, String, DateTime, JSON, Boolean, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, JSON, Boolean, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.database import Base
@@ -16,6 +16,9 @@ class TikTokShop(Base):
     refresh_token = Column(String)
     access_token_expire_in = Column(Integer)
     refresh_token_expire_in = Column(Integer)
+    access_token_expires_at = Column(DateTime(timezone=True), index=True)
+    token_refresh_failures = Column(Integer, default=0)  # consecutive failed scheduled refreshes
+    token_refresh_claimed_at = Column(DateTime(timezone=True))  # lease held by the refreshing scheduler
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -97,7 +100,7 @@ class SyncOperation(Base):
     id = Column(String, primary_key=True)
     shop_id = Column(String, ForeignKey("tiktok_shops.shop_id"))
     entity_type = Column(String)  # 'product', 'order'
-    sync_mode = Column(String)  # 'full', 'incremental', 'changes_only'
+    sync_mode = Column(String)  # 'full', 'recent', 'incremental', 'changes_only'
     status = Column(String)  # 'in_progress', 'completed', 'failed'
     
     started_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -114,6 +117,17 @@ class SyncOperation(Base):
     # Relationships
     shop = relationship("TikTokShop")
 
+class SyncWatermark(Base):
+    __tablename__ = "sync_watermarks"
+    
+    shop_id = Column(String, ForeignKey("tiktok_shops.shop_id"), primary_key=True)
+    entity_type = Column(String, primary_key=True)  # 'product', 'order'
+    
+    # Highest update_time fully synced; incremental syncs resume from here
+    high_water_update_time = Column(Integer)
+    last_full_sync_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 # Add the missing WebhookEvent class
 class WebhookEvent(Base):
     __tablename__ = "webhook_events"
@@ -130,10 +144,18 @@ class WebhookEvent(Base):
     processed_at = Column(DateTime(timezone=True))
     status = Column(String, default="pending")  # 'pending', 'processed', 'failed', 'retrying'
     retry_count = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime(timezone=True))  # when a 'retrying' event is due again
+    claimed_at = Column(DateTime(timezone=True))  # when the current 'processing' claim was taken
     error_message = Column(String)
     
     # Relationships
     shop = relationship("TikTokShop")
+    
+    __table_args__ = (
+        Index("ix_webhook_events_retry_due", "status", "next_attempt_at"),
+        Index("ix_webhook_events_claimed", "status", "claimed_at"),
+        Index("ix_webhook_events_shop_order", "shop_id", "received_at"),  # earlier open events per shop
+    )
 
 # Add AuthCodeUsage class if it's missing
 class AuthCodeUsage(Base):
@@ -5,7 +5,14 @@ from app.models.tiktok_models import TikTokShop
 from app.models.schemas import TokenResponse, ShopInfo
 from typing import List, Optional
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
+def token_expires_at(expire_in: int) -> datetime:
+    """Absolute expiry for a token's *_expire_in value"""
+    # TikTok Shop returns a unix timestamp; small values are a lifetime in seconds
+    if expire_in > 10**9:
+        return datetime.fromtimestamp(expire_in, timezone.utc)
+    return datetime.now(timezone.utc) + timedelta(seconds=expire_in)
 
 class AuthService:
     def __init__(self, db: Session):
@@ -47,7 +54,9 @@ class AuthService:
             shop.refresh_token = data["refresh_token"]
             shop.access_token_expire_in = data["access_token_expire_in"]
             shop.refresh_token_expire_in = data["refresh_token_expire_in"]
+            shop.access_token_expires_at = token_expires_at(shop.access_token_expire_in)
             shop.is_active = True
+            shop.token_refresh_failures = 0
             
             self.db.commit()
             
@@ -79,6 +88,7 @@ class AuthService:
             shop.refresh_token = data["refresh_token"]
             shop.access_token_expire_in = data["access_token_expire_in"]
             shop.refresh_token_expire_in = data["refresh_token_expire_in"]
+            shop.access_token_expires_at = token_expires_at(shop.access_token_expire_in)
             
             self.db.commit()
             
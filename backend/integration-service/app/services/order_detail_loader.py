@@ -0,0 +1,99 @@
+# app/services/order_detail_loader.py
+from app.core.config import settings
+from app.services.tiktok_client import TikTokShopClient
+from typing import Dict, Any, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _PendingBatch:
+    def __init__(self):
+        self.waiters: Dict[str, List[asyncio.Future]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class OrderDetailLoader:
+    """
+    Coalesces concurrent single-order detail lookups.
+
+    Requests for the same shop arriving within ORDER_DETAIL_BATCH_WAIT_MS are
+    sent as one /api/orders/detail/query call with up to
+    ORDER_DETAIL_BATCH_SIZE ids (immediately once the batch is full), and
+    the results are fanned back out to each caller. Duplicate ids in a
+    window share one slot.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None, wait_ms: Optional[float] = None):
+        self.batch_size = batch_size or settings.ORDER_DETAIL_BATCH_SIZE
+        self.wait_ms = settings.ORDER_DETAIL_BATCH_WAIT_MS if wait_ms is None else wait_ms
+        self._pending: Dict[Tuple[str, str], _PendingBatch] = {}
+        # Strong references to in-flight batch tasks so they are not garbage collected
+        self._inflight: Set[asyncio.Task] = set()
+
+    async def load(self, shop_id: str, access_token: str, order_id: str) -> Optional[Dict[str, Any]]:
+        """Get one order's details; None if TikTok does not return it"""
+        key = (shop_id, access_token)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _PendingBatch()
+            batch.timer = asyncio.get_running_loop().call_later(
+                self.wait_ms / 1000, self._dispatch, key
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        batch.waiters.setdefault(order_id, []).append(future)
+
+        if len(batch.waiters) >= self.batch_size:
+            self._dispatch(key)
+
+        return await future
+
+    def _dispatch(self, key: Tuple[str, str]):
+        """Detach the pending batch for key and send it"""
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer:
+            batch.timer.cancel()
+        task = asyncio.create_task(self._fetch(key, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _fetch(self, key: Tuple[str, str], batch: _PendingBatch):
+        shop_id, access_token = key
+        order_ids = list(batch.waiters)
+
+        # Every waiter must be resolved whatever happens here, or its caller
+        # hangs: a malformed response fails the whole batch like a failed call,
+        # and ids missing from a good response resolve to None
+        try:
+            async with TikTokShopClient() as client:
+                response = await client.get_order_detail(
+                    access_token=access_token,
+                    shop_id=shop_id,
+                    order_ids=order_ids
+                )
+
+            orders = {
+                order_data["order_id"]: order_data
+                for order_data in (response.get("data") or {}).get("order_list") or []
+            }
+        except BaseException as e:
+            logger.error(
+                f"Order detail batch of {len(order_ids)} for shop {shop_id} failed: {str(e)}",
+                exc_info=not isinstance(e, asyncio.CancelledError)
+            )
+            for futures in batch.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for order_id, futures in batch.waiters.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(orders.get(order_id))
+
+order_detail_loader = OrderDetailLoader()
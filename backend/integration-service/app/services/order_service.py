@@ -1,10 +1,19 @@
-# app/services/order_service.py - Simplified version without SyncOperation
+# app/services/order_service.py
 from sqlalchemy.orm import Session
 from app.services.tiktok_client import TikTokShopClient
-from app.models.tiktok_models import TikTokShop, TikTokOrder
-from app.models.schemas import OrderListResponse, OrderBase
-from typing import Dict, Any, List
-import uuid
+from app.services.sync_writer import BulkSyncWriter
+from app.services.order_detail_loader import order_detail_loader
+from app.services.sync_pipeline import SyncPipeline, SyncProgress
+from app.services import sync_state
+from app.core.config import settings
+from app.models.database import SessionLocal
+from app.models.tiktok_models import TikTokShop, TikTokOrder, SyncOperation
+from app.models.schemas import OrderListResponse, OrderBase, SyncStatus
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 class OrderService:
     def __init__(self, db: Session):
@@ -33,105 +42,138 @@ class OrderService:
             )
             
             data = response.get("data", {})
-            orders = []
+            order_list = data.get("order_list", [])
             
-            for order_data in data.get("order_list", []):
-                # Save or update order in database
-                order = self.db.query(TikTokOrder).filter(
-                    TikTokOrder.order_id == order_data["order_id"]
-                ).first()
-                
-                if not order:
-                    order = TikTokOrder(
-                        id=str(uuid.uuid4()),
-                        shop_id=shop_id,
-                        order_id=order_data["order_id"]
-                    )
-                    self.db.add(order)
-                
-                # Update order data
-                order.order_status = order_data["order_status"]
-                order.payment_status = order_data.get("payment_status")
-                order.fulfillment_type = order_data.get("fulfillment_type")
-                order.buyer_info = order_data.get("buyer_info", {})
-                order.recipient_address = order_data.get("recipient_address", {})
-                order.line_items = order_data.get("line_items", [])
-                order.payment_info = order_data.get("payment_info", {})
-                order.shipping_info = order_data.get("shipping_info", {})
-                order.create_time = order_data.get("create_time")
-                order.update_time = order_data.get("update_time")
-                
-                orders.append(OrderBase(**order_data))
+            orders = [OrderBase(**order_data) for order_data in order_list]
             
+            # Save or update the whole page in one upsert
+            counts = BulkSyncWriter(self.db).upsert_orders(shop_id, order_list)
             self.db.commit()
             
             return OrderListResponse(
                 total=data.get("total_count", 0),
                 orders=orders,
-                has_more=data.get("has_more", False)
+                has_more=data.get("has_more", False),
+                sync_counts=counts.to_dict()
             )
     
     async def get_order_detail(self, shop_id: str, order_id: str) -> OrderBase:
-        """Get order details from TikTok Shop"""
+        """Get order details from TikTok Shop (batched with concurrent lookups)"""
         access_token = self._get_shop_token(shop_id)
         
-        async with TikTokShopClient() as client:
-            response = await client.get_order_detail(
-                access_token=access_token,
-                shop_id=shop_id,
-                order_ids=[order_id]
-            )
-            
-            data = response.get("data", {})
-            order_list = data.get("order_list", [])
-            
-            if not order_list:
-                return None
-            
-            order_data = order_list[0]
-            
-            # Update order in database
-            order = self.db.query(TikTokOrder).filter(
-                TikTokOrder.order_id == order_id
-            ).first()
-            
-            if order:
-                order.order_status = order_data["order_status"]
-                order.payment_status = order_data.get("payment_status")
-                order.fulfillment_type = order_data.get("fulfillment_type")
-                order.buyer_info = order_data.get("buyer_info", {})
-                order.recipient_address = order_data.get("recipient_address", {})
-                order.line_items = order_data.get("line_items", [])
-                order.payment_info = order_data.get("payment_info", {})
-                order.shipping_info = order_data.get("shipping_info", {})
-                order.update_time = order_data.get("update_time")
-                self.db.commit()
-            
-            return OrderBase(**order_data)
-    
-    async def sync_recent_orders(self, shop_id: str, days: int = 7) -> int:
-        """Sync recent orders from TikTok Shop"""
-        from datetime import datetime, timedelta
+        order_data = await order_detail_loader.load(shop_id, access_token, order_id)
+        
+        if not order_data:
+            return None
         
-        # Calculate time range
-        end_time = int(datetime.now().timestamp())
-        start_time = int((datetime.now() - timedelta(days=days)).timestamp())
+        # Update order in database
+        order = self.db.query(TikTokOrder).filter(
+            TikTokOrder.order_id == order_id
+        ).first()
+        
+        if order:
+            order.order_status = order_data["order_status"]
+            order.payment_status = order_data.get("payment_status")
+            order.fulfillment_type = order_data.get("fulfillment_type")
+            order.buyer_info = order_data.get("buyer_info", {})
+            order.recipient_address = order_data.get("recipient_address", {})
+            order.line_items = order_data.get("line_items", [])
+            order.payment_info = order_data.get("payment_info", {})
+            order.shipping_info = order_data.get("shipping_info", {})
+            order.update_time = order_data.get("update_time")
+            self.db.commit()
         
-        total_synced = 0
-        page_number = 1
-        has_more = True
+        return OrderBase(**order_data)
+    
+    async def sync_recent_orders(self, shop_id: str, days: int = 7, resume: bool = True) -> int:
+        """Sync orders created in the last few days from TikTok Shop"""
+        self._get_shop_token(shop_id)
+        operation = sync_state.start_operation(
+            self.db, shop_id, "order", "recent", self._recent_filters(days), resume=resume
+        )
+        progress = await self._run_sync(shop_id, operation)
+        return progress.counts.total
+    
+    async def sync_orders(self, shop_id: str, sync_mode: str = "incremental", resume: bool = True) -> SyncProgress:
+        """
+        Sync orders updated since the shop's watermark, falling back to a
+        full reconciliation when no watermark exists or the last one is stale
+        """
+        self._get_shop_token(shop_id)
+        sync_mode = sync_state.resolve_sync_mode(self.db, shop_id, "order", sync_mode)
+        operation = sync_state.start_operation(
+            self.db, shop_id, "order", sync_mode, self._sync_filters(shop_id, sync_mode), resume=resume
+        )
+        return await self._run_sync(shop_id, operation)
+    
+    async def start_sync_with_progress(self, shop_id: str, days: int = 7) -> str:
+        """Start a recent-orders sync in the background; returns the sync operation ID"""
+        self._get_shop_token(shop_id)
+        operation = sync_state.start_operation(self.db, shop_id, "order", "recent", self._recent_filters(days))
+        sync_state.run_in_background(self._sync_in_new_session(shop_id, operation.id))
+        return operation.id
+    
+    async def is_sync_in_progress(self, shop_id: str) -> bool:
+        """Check whether an order sync is running for the shop"""
+        return sync_state.is_sync_in_progress(self.db, shop_id, "order")
+    
+    async def get_sync_status(self, shop_id: str, sync_id: str) -> Optional[SyncStatus]:
+        """Get progress of an order sync"""
+        return sync_state.get_sync_status(self.db, shop_id, sync_id)
+    
+    def _recent_filters(self, days: int) -> Dict[str, Any]:
+        now = datetime.now()
+        return {
+            "create_time_from": int((now - timedelta(days=days)).timestamp()),
+            "create_time_to": int(now.timestamp())
+        }
+    
+    def _sync_filters(self, shop_id: str, sync_mode: str) -> Dict[str, Any]:
+        if sync_mode == "full":
+            return self._recent_filters(settings.SYNC_ORDER_RECONCILE_DAYS)
+        return sync_state.incremental_filters(self.db, shop_id, "order")
+    
+    @staticmethod
+    async def _sync_in_new_session(shop_id: str, sync_id: str):
+        """Run a started sync outside the request that created it"""
+        db = SessionLocal()
+        try:
+            operation = db.get(SyncOperation, sync_id)
+            await OrderService(db)._run_sync(shop_id, operation)
+        except Exception as e:
+            logger.error(f"Background order sync {sync_id} for shop {shop_id} failed: {str(e)}")
+        finally:
+            db.close()
+    
+    async def _run_sync(self, shop_id: str, operation: SyncOperation) -> SyncProgress:
+        """Run an order sync operation, prefetching pages while earlier ones are written"""
+        access_token = self._get_shop_token(shop_id)
+        writer = BulkSyncWriter(self.db)
         
-        while has_more:
-            result = await self.search_orders(
+        async with TikTokShopClient() as client:
+            async def fetch_page(filters: Dict[str, Any], page_number: int, cursor: Optional[str]):
+                if cursor:
+                    filters = {**filters, "page_token": cursor}
+                return await client.get_order_list(
+                    access_token=access_token,
+                    shop_id=shop_id,
+                    page_size=settings.SYNC_PAGE_SIZE,
+                    page_number=page_number,
+                    **filters
+                )
+            
+            pipeline = SyncPipeline(
+                self.db,
                 shop_id=shop_id,
-                page_size=100,
-                page_number=page_number,
-                create_time_from=start_time,
-                create_time_to=end_time
+                items_key="order_list",
+                fetch_page=fetch_page,
+                write_page=lambda order_list: writer.upsert_orders(shop_id, order_list)
             )
-            
-            total_synced += len(result.orders)
-            has_more = result.has_more
-            page_number += 1
+            progress = await pipeline.run(operation)
         
-        return total_synced
\ No newline at end of file
+        counts = progress.counts
+        logger.info(
+            f"Order {operation.sync_mode} sync for shop {shop_id}: {counts.inserted} inserted, "
+            f"{counts.updated} updated, {counts.unchanged} unchanged over {progress.pages} pages"
+        )
+        return progress
@@ -1,12 +1,20 @@
 
 # app/services/product_service.py
+from fastapi import BackgroundTasks
 from sqlalchemy.orm import Session
 from app.services.tiktok_client import TikTokShopClient
-from app.models.tiktok_models import TikTokShop, TikTokProduct
-from app.models.schemas import ProductListResponse, ProductBase
-from typing import Dict, Any, List
-import uuid
+from app.services.sync_writer import BulkSyncWriter
+from app.services.sync_pipeline import SyncPipeline, SyncProgress
+from app.services import sync_state
+from app.core.config import settings
+from app.models.database import SessionLocal
+from app.models.tiktok_models import TikTokShop, TikTokProduct, SyncOperation
+from app.models.schemas import ProductListResponse, ProductBase, SyncStatus
+from typing import Dict, Any, List, Optional
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ProductService:
     def __init__(self, db: Session):
@@ -35,40 +43,19 @@ class ProductService:
             )
             
             data = response.get("data", {})
-            products = []
+            product_list = data.get("products", [])
             
-            for product_data in data.get("products", []):
-                # Save or update product in database
-                product = self.db.query(TikTokProduct).filter(
-                    TikTokProduct.product_id == product_data["product_id"]
-                ).first()
-                
-                if not product:
-                    product = TikTokProduct(
-                        id=str(uuid.uuid4()),
-                        shop_id=shop_id,
-                        product_id=product_data["product_id"]
-                    )
-                    self.db.add(product)
-                
-                # Update product data
-                product.product_name = product_data["product_name"]
-                product.product_status = product_data["product_status"]
-                product.category_id = product_data.get("category_id")
-                product.brand_id = product_data.get("brand_id")
-                product.skus = product_data.get("skus", [])
-                product.images = product_data.get("images", [])
-                product.create_time = product_data.get("create_time")
-                product.update_time = product_data.get("update_time")
-                
-                products.append(ProductBase(**product_data))
+            products = [ProductBase(**product_data) for product_data in product_list]
             
+            # Save or update the whole page in one upsert
+            counts = BulkSyncWriter(self.db).upsert_products(shop_id, product_list)
             self.db.commit()
             
             return ProductListResponse(
                 total=data.get("total_count", 0),
                 products=products,
-                has_more=data.get("has_more", False)
+                has_more=data.get("has_more", False),
+                sync_counts=counts.to_dict()
             )
     
     async def get_product_detail(self, shop_id: str, product_id: str) -> ProductBase:
@@ -104,21 +91,91 @@ class ProductService:
             
             return ProductBase(**data)
     
-    async def sync_all_products(self, shop_id: str) -> int:
+    async def sync_all_products(self, shop_id: str, resume: bool = True) -> int:
         """Sync all products from TikTok Shop"""
-        total_synced = 0
-        page_number = 1
-        has_more = True
+        progress = await self.sync_products(shop_id, "full", resume=resume)
+        return progress.counts.total
+    
+    async def sync_products(self, shop_id: str, sync_mode: str = "incremental", resume: bool = True) -> SyncProgress:
+        """
+        Sync products updated since the shop's watermark, falling back to a
+        full reconciliation when no watermark exists or the last one is stale
+        """
+        operation = self._start_operation(shop_id, sync_mode, resume)
+        return await self._run_sync(shop_id, operation)
+    
+    async def start_full_sync(self, shop_id: str, background_tasks: BackgroundTasks) -> str:
+        """Start a full product sync in the background; returns the sync operation ID"""
+        return self._start_background_sync(shop_id, "full", background_tasks)
+    
+    async def start_incremental_sync(self, shop_id: str, background_tasks: BackgroundTasks) -> str:
+        """Start an incremental product sync (full when reconciliation is due) in the background"""
+        return self._start_background_sync(shop_id, "incremental", background_tasks)
+    
+    async def start_changes_sync(self, shop_id: str, background_tasks: BackgroundTasks) -> str:
+        """Start a changes-only product sync in the background"""
+        return self._start_background_sync(shop_id, "changes_only", background_tasks)
+    
+    async def is_sync_in_progress(self, shop_id: str) -> bool:
+        """Check whether a product sync is running for the shop"""
+        return sync_state.is_sync_in_progress(self.db, shop_id, "product")
+    
+    async def get_sync_status(self, shop_id: str, sync_id: str) -> Optional[SyncStatus]:
+        """Get progress of a product sync"""
+        return sync_state.get_sync_status(self.db, shop_id, sync_id)
+    
+    def _start_operation(self, shop_id: str, sync_mode: str, resume: bool = True) -> SyncOperation:
+        self._get_shop_token(shop_id)
+        sync_mode = sync_state.resolve_sync_mode(self.db, shop_id, "product", sync_mode)
+        filters = {} if sync_mode == "full" else sync_state.incremental_filters(self.db, shop_id, "product")
+        return sync_state.start_operation(self.db, shop_id, "product", sync_mode, filters, resume=resume)
+    
+    def _start_background_sync(self, shop_id: str, sync_mode: str, background_tasks: BackgroundTasks) -> str:
+        operation = self._start_operation(shop_id, sync_mode)
+        background_tasks.add_task(ProductService._sync_in_new_session, shop_id, operation.id)
+        return operation.id
+    
+    @staticmethod
+    async def _sync_in_new_session(shop_id: str, sync_id: str):
+        """Run a started sync outside the request that created it"""
+        db = SessionLocal()
+        try:
+            operation = db.get(SyncOperation, sync_id)
+            await ProductService(db)._run_sync(shop_id, operation)
+        except Exception as e:
+            logger.error(f"Background product sync {sync_id} for shop {shop_id} failed: {str(e)}")
+        finally:
+            db.close()
+    
+    async def _run_sync(self, shop_id: str, operation: SyncOperation) -> SyncProgress:
+        """Run a product sync operation, prefetching pages while earlier ones are written"""
+        access_token = self._get_shop_token(shop_id)
+        writer = BulkSyncWriter(self.db)
         
-        while has_more:
-            result = await self.search_products(
+        async with TikTokShopClient() as client:
+            async def fetch_page(filters: Dict[str, Any], page_number: int, cursor: Optional[str]):
+                if cursor:
+                    filters = {**filters, "page_token": cursor}
+                return await client.search_products(
+                    access_token=access_token,
+                    shop_id=shop_id,
+                    page_size=settings.SYNC_PAGE_SIZE,
+                    page_number=page_number,
+                    **filters
+                )
+            
+            pipeline = SyncPipeline(
+                self.db,
                 shop_id=shop_id,
-                page_size=100,
-                page_number=page_number
+                items_key="products",
+                fetch_page=fetch_page,
+                write_page=lambda product_list: writer.upsert_products(shop_id, product_list)
             )
-            
-            total_synced += len(result.products)
-            has_more = result.has_more
-            page_number += 1
+            progress = await pipeline.run(operation)
         
-        return total_synced
+        counts = progress.counts
+        logger.info(
+            f"Product {operation.sync_mode} sync for shop {shop_id}: {counts.inserted} inserted, "
+            f"{counts.updated} updated, {counts.unchanged} unchanged over {progress.pages} pages"
+        )
+        return progress
@@ -0,0 +1,182 @@
+# app/services/sync_pipeline.py
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.tiktok_models import SyncOperation
+from app.services import sync_state
+from app.services.sync_writer import SyncCounts
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# fetch_page(filters, page_number, cursor) -> raw TikTok API response
+FetchPage = Callable[[Dict[str, Any], int, Optional[str]], Awaitable[Dict[str, Any]]]
+# write_page(items) -> counts; must not commit
+WritePage = Callable[[List[Dict[str, Any]]], SyncCounts]
+
+_DONE = object()
+
+@dataclass
+class SyncPage:
+    page_number: int
+    items: List[Dict[str, Any]]
+    has_more: bool
+    next_cursor: Optional[str] = None
+    total_count: Optional[int] = None
+
+@dataclass
+class SyncProgress:
+    counts: SyncCounts = field(default_factory=SyncCounts)
+    pages: int = 0
+    resumed_from_page: Optional[int] = None
+
+class SyncPipeline:
+    """
+    Producer/consumer sync of one paginated TikTok listing.
+
+    A fetcher task prefetches pages (following next_page_token when the API
+    returns one, page numbers otherwise) into a bounded queue, so it blocks
+    once it is SYNC_PREFETCH_PAGES ahead of the writer. The writer drains the
+    queue, bulk-upserts each page in a worker thread and commits it together
+    with a checkpoint, progress and ETA on the SyncOperation row. An
+    operation with a checkpoint continues from the page after it.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        shop_id: str,
+        items_key: str,
+        fetch_page: FetchPage,
+        write_page: WritePage,
+        prefetch_pages: Optional[int] = None
+    ):
+        self.db = db
+        self.shop_id = shop_id
+        self.items_key = items_key
+        self.fetch_page = fetch_page
+        self.write_page = write_page
+        self.prefetch_pages = prefetch_pages or settings.SYNC_PREFETCH_PAGES
+
+    async def run(self, operation: SyncOperation) -> SyncProgress:
+        """Sync every page of an operation created by sync_state.start_operation"""
+        progress = SyncProgress()
+        metadata = operation.sync_metadata or {}
+        filters = metadata.get("filters", {})
+        checkpoint = metadata.get("checkpoint")
+
+        if checkpoint:
+            page_number = checkpoint["page_number"] + 1
+            cursor = checkpoint.get("next_cursor")
+            progress.resumed_from_page = page_number
+            logger.info(
+                f"Resuming {operation.entity_type} sync {operation.id} for shop {self.shop_id} at page {page_number}"
+            )
+        else:
+            page_number, cursor = 1, None
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch_pages)
+        fetcher = asyncio.create_task(self._fetch(queue, filters, page_number, cursor))
+        started = time.monotonic()
+
+        try:
+            while True:
+                page = await queue.get()
+                if page is _DONE:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+
+                counts = await asyncio.to_thread(self._write_page, operation, page, progress, started)
+                progress.counts.add(counts)
+                progress.pages += 1
+
+            operation.status = "completed"
+            operation.completed_at = datetime.now(timezone.utc)
+            operation.estimated_completion = None
+            sync_state.advance_watermark(self.db, operation)
+            self.db.commit()
+        except Exception as e:
+            fetcher.cancel()
+            self._fail_operation(operation, e)
+            raise
+
+        return progress
+
+    async def _fetch(
+        self, queue: asyncio.Queue, filters: Dict[str, Any], page_number: int, cursor: Optional[str]
+    ):
+        """Producer: fetch pages until has_more is false; errors are handed to the writer"""
+        try:
+            while True:
+                # TikTokShopClient throttles per shop and per app
+                response = await self.fetch_page(filters, page_number, cursor)
+
+                data = response.get("data", {})
+                next_cursor = data.get("next_page_token") or None
+                page = SyncPage(
+                    page_number=page_number,
+                    items=data.get(self.items_key, []),
+                    has_more=data.get("has_more", bool(next_cursor)),
+                    next_cursor=next_cursor,
+                    total_count=data.get("total_count")
+                )
+                # Blocks while the queue is full (backpressure from the writer)
+                await queue.put(page)
+
+                if not page.has_more or not page.items:
+                    break
+                page_number += 1
+                cursor = next_cursor
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_DONE)
+
+    def _write_page(
+        self, operation: SyncOperation, page: SyncPage, progress: SyncProgress, started: float
+    ) -> SyncCounts:
+        """Upsert one page and commit it with its checkpoint (runs in a worker thread)"""
+        try:
+            counts = self.write_page(page.items)
+
+            operation.processed_items = (operation.processed_items or 0) + len(page.items)
+            if page.total_count is not None:
+                operation.total_items = page.total_count
+
+            # Extrapolate the remaining items at this run's throughput
+            written = progress.counts.total + counts.total
+            remaining = max((operation.total_items or 0) - operation.processed_items, 0)
+            elapsed = time.monotonic() - started
+            if written and remaining:
+                operation.estimated_completion = datetime.now(timezone.utc) + timedelta(seconds=remaining * elapsed / written)
+            else:
+                operation.estimated_completion = datetime.now(timezone.utc)
+
+            metadata = dict(operation.sync_metadata or {})
+            update_times = [item["update_time"] for item in page.items if item.get("update_time") is not None]
+            if update_times:
+                metadata["max_update_time"] = max(update_times + [metadata.get("max_update_time") or 0])
+            metadata["checkpoint"] = {"page_number": page.page_number, "next_cursor": page.next_cursor}
+            # Reassign so the JSON column is flagged as modified
+            operation.sync_metadata = metadata
+
+            self.db.commit()
+            return counts
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _fail_operation(self, operation: SyncOperation, error: Exception):
+        logger.error(f"{operation.entity_type.capitalize()} sync {operation.id} for shop {self.shop_id} failed: {str(error)}")
+        self.db.rollback()
+        operation.status = "failed"
+        operation.estimated_completion = None
+        operation.errors = (operation.errors or []) + [
+            {"error": str(error), "at": datetime.now(timezone.utc).isoformat()}
+        ]
+        self.db.commit()
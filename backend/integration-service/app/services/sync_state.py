@@ -0,0 +1,172 @@
+# app/services/sync_state.py
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.tiktok_models import SyncOperation, SyncWatermark
+from app.models.schemas import SyncStatus
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Set, Coroutine
+import asyncio
+import uuid
+
+# Modes whose completion proves every update up to the watermark was seen
+WATERMARK_MODES = ("full", "incremental", "changes_only")
+
+# Strong references to detached sync tasks so they are not garbage collected
+_background_syncs: Set[asyncio.Task] = set()
+
+def run_in_background(coro: Coroutine):
+    """Run a sync coroutine detached from the request that started it"""
+    task = asyncio.create_task(coro)
+    _background_syncs.add(task)
+    task.add_done_callback(_background_syncs.discard)
+
+def get_watermark(db: Session, shop_id: str, entity_type: str) -> Optional[SyncWatermark]:
+    """Get the sync high-water mark for a shop and entity type"""
+    return db.get(SyncWatermark, (shop_id, entity_type))
+
+def resolve_sync_mode(db: Session, shop_id: str, entity_type: str, requested_mode: str) -> str:
+    """
+    Effective mode for a sync request.
+
+    incremental and changes_only need a watermark and fall back to full
+    without one; incremental also escalates to full once the last full
+    reconciliation is older than SYNC_FULL_RECONCILE_HOURS.
+    """
+    if requested_mode not in ("incremental", "changes_only"):
+        return requested_mode
+
+    watermark = get_watermark(db, shop_id, entity_type)
+    if not watermark or watermark.high_water_update_time is None:
+        return "full"
+
+    if requested_mode == "incremental":
+        reconcile_after = timedelta(hours=settings.SYNC_FULL_RECONCILE_HOURS)
+        last_full = watermark.last_full_sync_at
+        if last_full and last_full.tzinfo is None:
+            # Databases without timezone support hand back the stored UTC time naive
+            last_full = last_full.replace(tzinfo=timezone.utc)
+        if not last_full or last_full < datetime.now(timezone.utc) - reconcile_after:
+            return "full"
+
+    return requested_mode
+
+def incremental_filters(db: Session, shop_id: str, entity_type: str) -> Dict[str, Any]:
+    """API filters selecting records updated since the watermark (minus a safety overlap)"""
+    watermark = get_watermark(db, shop_id, entity_type)
+    update_time_from = watermark.high_water_update_time - settings.SYNC_WATERMARK_OVERLAP_SECONDS
+    return {"update_time_from": max(update_time_from, 0)}
+
+def advance_watermark(db: Session, operation: SyncOperation):
+    """Move the watermark to the newest update_time written by a completed operation; does not commit"""
+    if operation.sync_mode not in WATERMARK_MODES:
+        return
+
+    watermark = get_watermark(db, operation.shop_id, operation.entity_type)
+    if not watermark:
+        watermark = SyncWatermark(shop_id=operation.shop_id, entity_type=operation.entity_type)
+        db.add(watermark)
+
+    metadata = operation.sync_metadata or {}
+    if metadata.get("max_update_time") is not None:
+        watermark.high_water_update_time = max(watermark.high_water_update_time or 0, metadata["max_update_time"])
+    elif watermark.high_water_update_time is None:
+        # Nothing to sync yet; start incremental syncs from when this one began
+        watermark.high_water_update_time = metadata.get("started_at")
+
+    if operation.sync_mode == "full":
+        watermark.last_full_sync_at = datetime.now(timezone.utc)
+
+def _stale_before() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(minutes=settings.SYNC_STALE_AFTER_MINUTES)
+
+def _is_live():
+    """In progress with a recent ETA (or start, before the first page was written)"""
+    return and_(
+        SyncOperation.status == "in_progress",
+        func.coalesce(SyncOperation.estimated_completion, SyncOperation.started_at) >= _stale_before()
+    )
+
+def is_sync_in_progress(db: Session, shop_id: str, entity_type: str) -> bool:
+    """Whether a live sync of this entity type is running for the shop"""
+    return db.query(SyncOperation.id).filter(
+        SyncOperation.shop_id == shop_id,
+        SyncOperation.entity_type == entity_type,
+        _is_live()
+    ).first() is not None
+
+def start_operation(
+    db: Session,
+    shop_id: str,
+    entity_type: str,
+    sync_mode: str,
+    filters: Dict[str, Any],
+    resume: bool = True
+) -> SyncOperation:
+    """
+    Resume the latest operation of this mode if it failed or stalled after
+    a checkpoint, otherwise create a new one with the given filters.
+    """
+    if resume:
+        operation = db.query(SyncOperation).filter(
+            SyncOperation.shop_id == shop_id,
+            SyncOperation.entity_type == entity_type,
+            SyncOperation.sync_mode == sync_mode
+        ).order_by(SyncOperation.started_at.desc()).first()
+
+        resumable = (
+            operation
+            and operation.status in ("in_progress", "failed")
+            and (operation.sync_metadata or {}).get("checkpoint")
+            and not db.query(SyncOperation.id).filter(
+                SyncOperation.id == operation.id, _is_live()
+            ).first()
+        )
+        if resumable:
+            operation.status = "in_progress"
+            # Counts as live again until the first page sets a real ETA
+            operation.estimated_completion = datetime.now(timezone.utc)
+            db.commit()
+            return operation
+
+    operation = SyncOperation(
+        id=str(uuid.uuid4()),
+        shop_id=shop_id,
+        entity_type=entity_type,
+        sync_mode=sync_mode,
+        status="in_progress",
+        errors=[],
+        sync_metadata={"filters": filters, "started_at": int(datetime.now().timestamp())}
+    )
+    db.add(operation)
+    db.commit()
+    return operation
+
+def get_sync_status(db: Session, shop_id: str, sync_id: str) -> Optional[SyncStatus]:
+    """Progress of a sync operation owned by the shop"""
+    operation = db.query(SyncOperation).filter(
+        SyncOperation.id == sync_id,
+        SyncOperation.shop_id == shop_id
+    ).first()
+
+    if not operation:
+        return None
+
+    total = operation.total_items or 0
+    processed = operation.processed_items or 0
+    if operation.status == "completed":
+        progress = 100
+    else:
+        progress = min(int(processed * 100 / total), 99) if total else 0
+
+    return SyncStatus(
+        sync_id=operation.id,
+        status=operation.status,
+        progress=progress,
+        total_items=total,
+        processed_items=processed,
+        failed_items=operation.failed_items or 0,
+        started_at=operation.started_at,
+        estimated_completion=operation.estimated_completion,
+        errors=operation.errors or []
+    )
@@ -0,0 +1,116 @@
+# app/services/sync_writer.py
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func, literal_column
+from app.models.tiktok_models import TikTokOrder, TikTokProduct
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List
+import uuid
+
+# Columns never overwritten when a synced row already exists
+IMMUTABLE_COLUMNS = ("id", "shop_id")
+
+@dataclass
+class SyncCounts:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    def add(self, other: "SyncCounts") -> "SyncCounts":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        return self
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+def order_row(shop_id: str, order_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a TikTok order payload to tiktok_orders columns"""
+    return {
+        "id": str(uuid.uuid4()),
+        "shop_id": shop_id,
+        "order_id": order_data["order_id"],
+        "order_status": order_data["order_status"],
+        "payment_status": order_data.get("payment_status"),
+        "fulfillment_type": order_data.get("fulfillment_type"),
+        "buyer_info": order_data.get("buyer_info", {}),
+        "recipient_address": order_data.get("recipient_address", {}),
+        "line_items": order_data.get("line_items", []),
+        "payment_info": order_data.get("payment_info", {}),
+        "shipping_info": order_data.get("shipping_info", {}),
+        "create_time": order_data.get("create_time"),
+        "update_time": order_data.get("update_time")
+    }
+
+def product_row(shop_id: str, product_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a TikTok product payload to tiktok_products columns"""
+    return {
+        "id": str(uuid.uuid4()),
+        "shop_id": shop_id,
+        "product_id": product_data["product_id"],
+        "product_name": product_data["product_name"],
+        "product_status": product_data["product_status"],
+        "category_id": product_data.get("category_id"),
+        "brand_id": product_data.get("brand_id"),
+        "skus": product_data.get("skus", []),
+        "images": product_data.get("images", []),
+        "create_time": product_data.get("create_time"),
+        "update_time": product_data.get("update_time")
+    }
+
+class BulkSyncWriter:
+    """Writes a page of synced TikTok records with a single upsert statement"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def upsert_orders(self, shop_id: str, order_list: List[Dict[str, Any]]) -> SyncCounts:
+        """Upsert a page of orders; does not commit"""
+        rows = [order_row(shop_id, order_data) for order_data in order_list]
+        return self._upsert(TikTokOrder, "order_id", rows)
+
+    def upsert_products(self, shop_id: str, product_list: List[Dict[str, Any]]) -> SyncCounts:
+        """Upsert a page of products; does not commit"""
+        rows = [product_row(shop_id, product_data) for product_data in product_list]
+        return self._upsert(TikTokProduct, "product_id", rows)
+
+    def _upsert(self, model, key: str, rows: List[Dict[str, Any]]) -> SyncCounts:
+        """
+        INSERT ... ON CONFLICT (key) DO UPDATE for the whole page.
+
+        Existing rows are only rewritten when update_time differs, and
+        RETURNING (xmax = 0) tells freshly inserted rows from updated ones;
+        rows filtered out by the WHERE clause are not returned, so they are
+        counted as unchanged.
+        """
+        # Postgres rejects a statement that touches the same row twice; keep the latest copy
+        rows = list({row[key]: row for row in rows}.values())
+        if not rows:
+            return SyncCounts()
+
+        stmt = pg_insert(model).values(rows)
+        update_columns = {
+            column: stmt.excluded[column]
+            for column in rows[0]
+            if column != key and column not in IMMUTABLE_COLUMNS
+        }
+        update_columns["synced_at"] = func.now()
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_=update_columns,
+            where=model.update_time.is_distinct_from(stmt.excluded.update_time)
+        ).returning(literal_column("(xmax = 0)").label("inserted"))
+
+        written = self.db.execute(stmt).scalars().all()
+        inserted = sum(1 for was_inserted in written if was_inserted)
+        return SyncCounts(
+            inserted=inserted,
+            updated=len(written) - inserted,
+            unchanged=len(rows) - len(written)
+        )
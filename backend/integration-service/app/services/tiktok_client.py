@@ -3,25 +3,113 @@ import httpx
 from typing import Dict, Any, Optional, List
 from app.core.config import settings
 from app.utils.signature import TikTokSignature
+from app.utils.token_bucket import TokenBucket
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import hmac
 import json
 import logging
+import random
 
 logger = logging.getLogger(__name__)
 
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+RETRYABLE_STATUS_CODES = (500, 502, 503, 504)
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
 class TikTokShopClient:
-    """Client for interacting with TikTok Shop Partner API"""
+    """
+    Client for interacting with TikTok Shop Partner API.
+
+    All instances share one pooled httpx.AsyncClient and the same per-app
+    and per-shop token buckets, so `async with TikTokShopClient()` is cheap
+    and concurrent callers are throttled together. The pool is closed with
+    TikTokShopClient.close_pool() on shutdown.
+    """
+
+    _pool: Optional[httpx.AsyncClient] = None
+    _pool_loop: Optional[asyncio.AbstractEventLoop] = None
+    _app_buckets: Dict[str, TokenBucket] = {}
+    _shop_buckets: Dict[str, TokenBucket] = {}
     
     def __init__(self):
         self.app_key = settings.TIKTOK_APP_KEY
         self.app_secret = settings.TIKTOK_APP_SECRET
         self.base_url = settings.TIKTOK_API_BASE_URL
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = self._get_pool()
     
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        # The connection pool outlives individual callers
+        pass
+    
+    @classmethod
+    def _get_pool(cls) -> httpx.AsyncClient:
+        """Shared AsyncClient, recreated if closed or created under another event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if cls._pool is None or cls._pool.is_closed or (loop and cls._pool_loop is not loop):
+            cls._pool = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=settings.TIKTOK_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TIKTOK_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
+            cls._pool_loop = loop
+            # Buckets hold asyncio locks bound to the loop as well
+            cls._app_buckets.clear()
+            cls._shop_buckets.clear()
+        return cls._pool
+    
+    @classmethod
+    async def close_pool(cls):
+        """Close the shared connection pool"""
+        if cls._pool is not None and not cls._pool.is_closed:
+            await cls._pool.aclose()
+        cls._pool = None
+        cls._pool_loop = None
+    
+    def _buckets(self, shop_id: Optional[str]) -> List[TokenBucket]:
+        """Token buckets a request must pass: the app's, then the shop's"""
+        if self.app_key not in self._app_buckets:
+            self._app_buckets[self.app_key] = TokenBucket(settings.TIKTOK_APP_QPS, settings.TIKTOK_APP_BURST)
+        buckets = [self._app_buckets[self.app_key]]
+        
+        if shop_id:
+            if shop_id not in self._shop_buckets:
+                self._shop_buckets[shop_id] = TokenBucket(settings.TIKTOK_SHOP_QPS, settings.TIKTOK_SHOP_BURST)
+            buckets.append(self._shop_buckets[shop_id])
+        return buckets
+    
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        ceiling = min(
+            settings.TIKTOK_RETRY_BACKOFF_SECONDS * (2 ** attempt),
+            settings.TIKTOK_RETRY_MAX_BACKOFF_SECONDS
+        )
+        return random.uniform(0, ceiling)
     
     async def _make_request(
         self,
@@ -30,52 +118,83 @@ class TikTokShopClient:
         params: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         access_token: Optional[str] = None,
-        shop_id: Optional[str] = None
+        shop_id: Optional[str] = None,
+        idempotent: Optional[bool] = None
     ) -> Dict[str, Any]:
-        """Make authenticated request to TikTok Shop API"""
-        
-        # Prepare parameters with signature
-        request_params = TikTokSignature.prepare_request_params(
-            app_key=self.app_key,
-            app_secret=self.app_secret,
-            path=path,
-            params=params,
-            access_token=access_token,
-            shop_id=shop_id
-        )
+        """
+        Make authenticated request to TikTok Shop API.
+
+        Requests wait for the app and shop token buckets. 429 responses are
+        retried after Retry-After (or backoff), pausing the whole shop (or
+        app) bucket meanwhile; 5xx responses and transport errors are
+        retried with backoff only for idempotent calls (GET/PUT/DELETE
+        unless overridden, e.g. for read-only POST searches).
+        """
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
         
         url = f"{self.base_url}{path}"
+        buckets = self._buckets(shop_id)
+        attempt = 0
         
-        try:
-            if method == "GET":
-                response = await self.client.get(url, params=request_params)
-            elif method == "POST":
-                # For POST requests, params go in URL, data in body
-                response = await self.client.post(
+        while True:
+            for bucket in buckets:
+                await bucket.acquire()
+            
+            # Signed per attempt since the signature covers the timestamp
+            request_params = TikTokSignature.prepare_request_params(
+                app_key=self.app_key,
+                app_secret=self.app_secret,
+                path=path,
+                params=params,
+                access_token=access_token,
+                shop_id=shop_id
+            )
+            
+            try:
+                # For POST/PUT requests, params go in URL, data in body
+                response = await self.client.request(
+                    method,
                     url,
                     params=request_params,
-                    json=data
+                    json=data if method in ("POST", "PUT") else None
                 )
-            elif method == "PUT":
-                response = await self.client.put(
-                    url,
-                    params=request_params,
-                    json=data
+            except httpx.TransportError as e:
+                if idempotent and attempt < settings.TIKTOK_MAX_RETRIES:
+                    delay = self._backoff(attempt)
+                    logger.warning(f"TikTok API {method} {path} failed ({str(e)}), retrying in {delay:.2f}s")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                logger.error(f"Error making request to TikTok API: {str(e)}")
+                raise
+            
+            retryable = response.status_code == 429 or (
+                idempotent and response.status_code in RETRYABLE_STATUS_CODES
+            )
+            if retryable and attempt < settings.TIKTOK_MAX_RETRIES:
+                delay = _retry_after_seconds(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                logger.warning(
+                    f"TikTok API {method} {path} returned {response.status_code}, retrying in {delay:.2f}s"
                 )
-            elif method == "DELETE":
-                response = await self.client.delete(url, params=request_params)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+                attempt += 1
+                if response.status_code == 429:
+                    # Throttle everyone sharing the limit, not just this call
+                    buckets[-1].block_for(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
             
-            response.raise_for_status()
+            try:
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                logger.error(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
+                raise
             return response.json()
-            
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error occurred: {e.response.status_code} - {e.response.text}")
-            raise
-        except Exception as e:
-            logger.error(f"Error making request to TikTok API: {str(e)}")
-            raise
     
     # Authentication methods
     async def get_auth_url(self, state: str, redirect_uri: str) -> str:
@@ -94,7 +213,8 @@ class TikTokShopClient:
             "auth_code": auth_code,
             "grant_type": "authorized_code"
         }
-        return await self._make_request("GET", path, params=params)
+        # Auth codes are single-use, so a lost response must not be replayed
+        return await self._make_request("GET", path, params=params, idempotent=False)
     
     async def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
         """Refresh access token"""
@@ -103,7 +223,8 @@ class TikTokShopClient:
             "refresh_token": refresh_token,
             "grant_type": "refresh_token"
         }
-        return await self._make_request("GET", path, params=params)
+        # Refresh tokens rotate on use, so a lost response must not be replayed
+        return await self._make_request("GET", path, params=params, idempotent=False)
     
     # Shop methods
     async def get_authorized_shops(self, access_token: str) -> Dict[str, Any]:
@@ -132,7 +253,8 @@ class TikTokShopClient:
             path, 
             params=params,
             access_token=access_token,
-            shop_id=shop_id
+            shop_id=shop_id,
+            idempotent=True
         )
     
     async def get_product_detail(
@@ -173,7 +295,8 @@ class TikTokShopClient:
             path,
             params=params,
             access_token=access_token,
-            shop_id=shop_id
+            shop_id=shop_id,
+            idempotent=True
         )
     
     async def get_order_detail(
@@ -190,7 +313,8 @@ class TikTokShopClient:
             path,
             data=data,
             access_token=access_token,
-            shop_id=shop_id
+            shop_id=shop_id,
+            idempotent=True
         )
     
     # Webhook methods
@@ -0,0 +1,252 @@
+# app/services/webhook_dispatcher.py
+from sqlalchemy import and_, or_, select, update
+from app.core.config import settings
+from app.models.database import SessionLocal
+from app.models.tiktok_models import WebhookEvent
+from app.services.webhook_service import WebhookService
+from app.services.webhook_retry_worker import OPEN_STATUSES, earlier_shop_event, webhook_retry_worker
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Set, Tuple
+import asyncio
+import logging
+import uuid
+import zlib
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class QueuedWebhook:
+    id: str
+    shop_id: str
+    payload: Dict[str, Any]
+    retry_count: int = 0
+
+class WebhookDispatcher:
+    """
+    Persist-then-acknowledge webhook processing.
+
+    submit() stores the webhook as a pending WebhookEvent and returns
+    immediately. Events are partitioned by shop_id onto WEBHOOK_CONSUMERS
+    queues, so different shops are processed concurrently. Each consumer
+    drains up to WEBHOOK_BATCH_SIZE queued events at a time, claims them
+    with one UPDATE (stamping claimed_at) and records all outcomes with one
+    bulk UPDATE; failures are scheduled for the WebhookRetryWorker. Pending
+    events that never reached a queue (full queue, restart, another
+    worker's crash) and claims older than WEBHOOK_PROCESSING_TIMEOUT_SECONDS
+    are picked up by a periodic recovery sweep.
+
+    A shop's events are processed one at a time in arrival order. An event
+    is only claimed when no earlier event from its shop is still pending,
+    processing or retrying, and a consumer stops working through a shop's
+    events in a batch at the first one it could not claim or that failed;
+    the rest go back to pending. Held events are queued again by the
+    recovery sweep once the earlier event has been processed or given up.
+    """
+
+    def __init__(self):
+        self.consumer_count = max(settings.WEBHOOK_CONSUMERS, 1)
+        self.batch_size = settings.WEBHOOK_BATCH_SIZE
+        self.webhook_service = WebhookService()
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start consumers and the recovery sweep"""
+        self._queues = [
+            asyncio.Queue(maxsize=settings.WEBHOOK_QUEUE_SIZE) for _ in range(self.consumer_count)
+        ]
+        self._tasks = [asyncio.create_task(self._consume(queue)) for queue in self._queues]
+        self._tasks.append(asyncio.create_task(self._recover_periodically()))
+        logger.info(f"Webhook dispatcher started with {self.consumer_count} consumers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    async def submit(
+        self,
+        webhook_id: Optional[str],
+        data: Dict[str, Any],
+        headers: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Persist a webhook and queue it for processing; returns the event ID"""
+        event_id = str(uuid.uuid4())
+        await asyncio.to_thread(self._persist, event_id, webhook_id, data, headers or {})
+        self._enqueue(QueuedWebhook(id=event_id, shop_id=data["shop_id"], payload=data))
+        return event_id
+
+    def _enqueue(self, webhook: QueuedWebhook) -> bool:
+        if not self._queues:
+            return False
+        queue = self._queues[zlib.crc32(webhook.shop_id.encode()) % len(self._queues)]
+        try:
+            queue.put_nowait(webhook)
+            return True
+        except asyncio.QueueFull:
+            # Stays pending in the database; the recovery sweep will queue it
+            logger.warning(f"Webhook queue full, deferring event {webhook.id} to recovery")
+            return False
+
+    def _persist(self, event_id: str, webhook_id: Optional[str], data: Dict[str, Any], headers: Dict[str, Any]):
+        db = SessionLocal()
+        try:
+            db.add(WebhookEvent(
+                id=event_id,
+                webhook_id=webhook_id,
+                shop_id=data["shop_id"],
+                event_type=data["type"],
+                payload=data,
+                headers=headers,
+                status="pending"
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    async def _consume(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                await self._process_batch(batch)
+            except Exception as e:
+                # Claimed events stay 'processing' and are recovered after the timeout
+                logger.error(f"Webhook batch of {len(batch)} failed: {e}")
+
+    async def _process_batch(self, batch: List[QueuedWebhook]):
+        by_id = {webhook.id: webhook for webhook in batch}
+        claimed, still_open = await asyncio.to_thread(self._claim, list(by_id))
+
+        # A batch event that is held or owned elsewhere holds back its shop's
+        # other events in the batch; so does one that fails
+        held_shops = {by_id[event_id].shop_id for event_id in still_open}
+        outcomes = []
+        for event_id in claimed:
+            webhook = by_id[event_id]
+            if webhook.shop_id in held_shops:
+                outcomes.append({"id": webhook.id, "status": "pending", "claimed_at": None})
+                continue
+            try:
+                await self.webhook_service.process_webhook(webhook.payload)
+                outcomes.append({
+                    "id": webhook.id,
+                    "status": "processed",
+                    "processed_at": datetime.now(timezone.utc),
+                    "error_message": None
+                })
+            except Exception as e:
+                logger.error(f"Webhook event {webhook.id} for shop {webhook.shop_id} failed: {e}")
+                outcomes.append(webhook_retry_worker.failure_outcome(webhook.id, webhook.retry_count + 1, str(e)))
+                held_shops.add(webhook.shop_id)
+
+        if outcomes:
+            await asyncio.to_thread(self._record, outcomes)
+            if any(outcome["status"] == "retrying" for outcome in outcomes):
+                webhook_retry_worker.wake()
+
+    def _claim(self, event_ids: List[str]) -> Tuple[List[str], Set[str]]:
+        """
+        Move pending events to processing, except those behind an earlier open
+        event from their shop. Returns the IDs this consumer now owns, in
+        arrival order, and the IDs it could not claim that are still open.
+        """
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(WebhookEvent)
+                .where(
+                    WebhookEvent.id.in_(event_ids),
+                    WebhookEvent.status == "pending",
+                    ~earlier_shop_event(OPEN_STATUSES, claiming_ids=event_ids)
+                )
+                .values(status="processing", claimed_at=datetime.now(timezone.utc))
+                .returning(WebhookEvent.id, WebhookEvent.received_at)
+            )
+            claimed = [event_id for event_id, _ in sorted(result.all(), key=lambda row: (row[1], row[0]))]
+
+            # Already finished events (e.g. queued twice) hold nothing back
+            unclaimed = set(event_ids) - set(claimed)
+            still_open = set(db.scalars(
+                select(WebhookEvent.id).where(
+                    WebhookEvent.id.in_(unclaimed), WebhookEvent.status.in_(OPEN_STATUSES)
+                )
+            )) if unclaimed else set()
+            db.commit()
+            return claimed, still_open
+        finally:
+            db.close()
+
+    def _record(self, outcomes: List[Dict[str, Any]]):
+        """Write the outcomes of a batch with one bulk UPDATE by primary key per row shape"""
+        db = SessionLocal()
+        try:
+            # executemany needs the same keys in every row
+            by_keys = defaultdict(list)
+            for outcome in outcomes:
+                by_keys[tuple(sorted(outcome))].append(outcome)
+            for rows in by_keys.values():
+                db.execute(update(WebhookEvent), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _recover_periodically(self):
+        while True:
+            try:
+                recovered = await asyncio.to_thread(self._load_stranded)
+                for webhook in recovered:
+                    if not self._enqueue(webhook):
+                        break
+                if recovered:
+                    logger.info(f"Recovered {len(recovered)} pending webhook events")
+            except Exception as e:
+                logger.error(f"Webhook recovery sweep failed: {e}")
+            await asyncio.sleep(settings.WEBHOOK_RECOVERY_INTERVAL_SECONDS)
+
+    def _load_stranded(self) -> List[QueuedWebhook]:
+        """
+        Pending events older than the grace period, oldest first, after
+        resetting timed-out claims. Events behind an earlier event that is
+        processing or retrying would only be held again, so they are skipped.
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            # A claim times out by its own age, not the event's, so a retried
+            # or long-queued event is not reset while it is still running.
+            # Rows claimed before claimed_at existed fall back to received_at.
+            timeout = now - timedelta(seconds=settings.WEBHOOK_PROCESSING_TIMEOUT_SECONDS)
+            db.execute(
+                update(WebhookEvent)
+                .where(
+                    WebhookEvent.status == "processing",
+                    or_(
+                        WebhookEvent.claimed_at < timeout,
+                        and_(WebhookEvent.claimed_at.is_(None), WebhookEvent.received_at < timeout)
+                    )
+                )
+                .values(status="pending", claimed_at=None)
+            )
+            db.commit()
+
+            events = db.query(WebhookEvent).filter(
+                WebhookEvent.status == "pending",
+                WebhookEvent.received_at < now - timedelta(seconds=settings.WEBHOOK_RECOVERY_GRACE_SECONDS),
+                ~earlier_shop_event(("processing", "retrying"))
+            ).order_by(WebhookEvent.received_at, WebhookEvent.id).limit(settings.WEBHOOK_QUEUE_SIZE).all()
+
+            return [
+                QueuedWebhook(id=e.id, shop_id=e.shop_id, payload=e.payload, retry_count=e.retry_count or 0)
+                for e in events
+            ]
+        finally:
+            db.close()
+
+webhook_dispatcher = WebhookDispatcher()
@@ -1,67 +1,218 @@
-
 # app/services/webhook_retry_worker.py
 import asyncio
-from datetime import datetime, timedelta
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, exists, func, or_, update
+from sqlalchemy.orm import aliased
+from app.core.config import settings
 from app.models.database import SessionLocal
 from app.models.tiktok_models import WebhookEvent
 from app.services.webhook_service import WebhookService
+from typing import Collection, Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Events that are not finished yet; a shop's later events wait behind them
+OPEN_STATUSES = ("pending", "processing", "retrying")
+
+def earlier_shop_event(statuses: Collection[str], claiming_ids: Collection[str] = ()):
+    """
+    Condition for use in queries on WebhookEvent: an event from the same
+    shop that arrived earlier is in one of `statuses`. Pending events in
+    `claiming_ids` are being claimed along with the row and do not count.
+    """
+    earlier = aliased(WebhookEvent)
+    condition = and_(
+        earlier.shop_id == WebhookEvent.shop_id,
+        earlier.status.in_(statuses),
+        or_(
+            earlier.received_at < WebhookEvent.received_at,
+            and_(earlier.received_at == WebhookEvent.received_at, earlier.id < WebhookEvent.id)
+        )
+    )
+    if claiming_ids:
+        condition = and_(condition, ~and_(earlier.id.in_(claiming_ids), earlier.status == "pending"))
+    return exists().where(condition)
+
 class WebhookRetryWorker:
-    """Background worker to retry failed webhooks"""
-    
+    """
+    Background worker to retry failed webhooks.
+
+    Events in 'retrying' carry a next_attempt_at set with exponential
+    backoff. The worker claims due events with FOR UPDATE SKIP LOCKED (so
+    several workers never take the same event), retries up to
+    WEBHOOK_RETRY_CONCURRENCY of them at once, then sleeps until the next
+    event is due. Only an event with no earlier open event from its shop is
+    claimed, so each shop has at most one retry in flight and retries keep
+    the shop's arrival order. Later events from the shop stay pending until
+    it succeeds or is given up. wake() cuts the sleep short when a new failure is
+    scheduled; WEBHOOK_RETRY_POLL_SECONDS bounds it for failures recorded by
+    other processes.
+    """
+
     def __init__(self):
-        self.check_interval = 300  # Check every 5 minutes
-        self.max_age_hours = 24  # Don't retry webhooks older than 24 hours
-    
+        self.poll_interval = settings.WEBHOOK_RETRY_POLL_SECONDS
+        self.max_age_hours = settings.WEBHOOK_RETRY_MAX_AGE_HOURS  # Don't retry webhooks older than this
+        self.batch_size = settings.WEBHOOK_RETRY_BATCH_SIZE
+        self.webhook_service = WebhookService()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def next_attempt_at(self, retry_count: int) -> datetime:
+        """When to retry an event that has failed `retry_count` times"""
+        delay = min(
+            settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2 ** max(retry_count - 1, 0),
+            settings.WEBHOOK_RETRY_MAX_BACKOFF_SECONDS
+        )
+        # Jitter spreads out retries of events that failed together
+        return datetime.now(timezone.utc) + timedelta(seconds=random.uniform(delay / 2, delay))
+
+    def wake(self):
+        """Re-check the schedule now (e.g. after a failure was recorded)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
     async def start(self):
         """Start the webhook retry worker"""
+        self._semaphore = asyncio.Semaphore(max(settings.WEBHOOK_RETRY_CONCURRENCY, 1))
+        self._wakeup = asyncio.Event()
         logger.info("Webhook retry worker started")
-        
+
         while True:
             try:
-                await self.process_failed_webhooks()
-                await asyncio.sleep(self.check_interval)
+                if await self.process_failed_webhooks():
+                    continue  # keep draining while events are due
+
+                delay = await asyncio.to_thread(self._seconds_until_next_due)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
             except asyncio.CancelledError:
                 logger.info("Webhook retry worker stopped")
                 break
             except Exception as e:
                 logger.error(f"Error in webhook retry worker: {e}")
                 await asyncio.sleep(60)
-    
-    async def process_failed_webhooks(self):
-        """Process failed webhooks that need retry"""
+
+    async def process_failed_webhooks(self) -> int:
+        """Retry the webhooks that are due; returns how many were claimed"""
+        events = await asyncio.to_thread(self._claim_due)
+        if not events:
+            return 0
+
+        outcomes = await asyncio.gather(*(self._retry(event) for event in events))
+        await asyncio.to_thread(self._record, outcomes)
+
+        succeeded = sum(1 for outcome in outcomes if outcome["status"] == "processed")
+        logger.info(f"Retried {len(events)} failed webhooks, {succeeded} succeeded")
+        return len(events)
+
+    async def _retry(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._semaphore:
+            try:
+                logger.info(f"Retrying webhook {event['webhook_id']}")
+                await self.webhook_service.process_webhook(event["payload"])
+                return {
+                    "id": event["id"],
+                    "status": "processed",
+                    "processed_at": datetime.now(timezone.utc),
+                    "next_attempt_at": None,
+                    "error_message": None
+                }
+            except Exception as e:
+                logger.error(f"Failed to retry webhook {event['id']}: {e}")
+                return self.failure_outcome(event["id"], event["retry_count"] + 1, str(e))
+
+    def failure_outcome(self, event_id: str, retry_count: int, error_message: str) -> Dict[str, Any]:
+        """Row for a failed attempt: schedule another retry or give up"""
+        if retry_count < self.webhook_service.max_retry_attempts:
+            status, next_attempt_at = "retrying", self.next_attempt_at(retry_count)
+        else:
+            status, next_attempt_at = "failed", None
+        return {
+            "id": event_id,
+            "status": status,
+            "processed_at": None,
+            "retry_count": retry_count,
+            "next_attempt_at": next_attempt_at,
+            "error_message": error_message
+        }
+
+    def _claim_due(self) -> List[Dict[str, Any]]:
+        """
+        Lock due events, skipping rows other workers hold, and mark them
+        processing. Events behind an earlier open event from their shop are
+        left for later.
+        """
         db = SessionLocal()
-        webhook_service = WebhookService()
-        
         try:
-            # Get failed webhooks
-            cutoff_time = datetime.utcnow() - timedelta(hours=self.max_age_hours)
-            
-            failed_events = db.query(WebhookEvent).filter(
+            now = datetime.now(timezone.utc)
+
+            # Give up on events that have been failing for too long
+            db.execute(
+                update(WebhookEvent)
+                .where(
+                    WebhookEvent.status == "retrying",
+                    WebhookEvent.received_at <= now - timedelta(hours=self.max_age_hours)
+                )
+                .values(status="failed", next_attempt_at=None)
+            )
+
+            events = db.query(WebhookEvent).filter(
                 WebhookEvent.status == "retrying",
-                WebhookEvent.received_at > cutoff_time,
-                WebhookEvent.retry_count < webhook_service.max_retry_attempts
-            ).limit(10).all()
-            
-            retry_count = 0
-            
-            for event in failed_events:
-                try:
-                    logger.info(f"Retrying webhook {event.webhook_id}")
-                    await webhook_service.retry_failed_event(event.id)
-                    retry_count += 1
-                    
-                    # Small delay between retries
-                    await asyncio.sleep(1)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to retry webhook {event.id}: {e}")
-            
-            if retry_count > 0:
-                logger.info(f"Retried {retry_count} failed webhooks")
-                
+                or_(WebhookEvent.next_attempt_at.is_(None), WebhookEvent.next_attempt_at <= now),
+                ~earlier_shop_event(OPEN_STATUSES)
+            ).order_by(WebhookEvent.next_attempt_at).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            claimed = [
+                {
+                    "id": event.id,
+                    "webhook_id": event.webhook_id,
+                    "payload": event.payload,
+                    "retry_count": event.retry_count or 0
+                }
+                for event in events
+            ]
+            for event in events:
+                event.status = "processing"
+                event.claimed_at = now
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _record(self, outcomes: List[Dict[str, Any]]):
+        """Write all outcomes with one bulk UPDATE by primary key"""
+        db = SessionLocal()
+        try:
+            # executemany needs the same keys in every row
+            processed = [o for o in outcomes if o["status"] == "processed"]
+            failed = [o for o in outcomes if o["status"] != "processed"]
+            for rows in (processed, failed):
+                if rows:
+                    db.execute(update(WebhookEvent), rows)
+            db.commit()
+        finally:
+            db.close()
+
+    def _seconds_until_next_due(self) -> float:
+        db = SessionLocal()
+        try:
+            next_due = db.query(func.min(WebhookEvent.next_attempt_at)).filter(
+                WebhookEvent.status == "retrying"
+            ).scalar()
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+        if next_due is None:
+            return self.poll_interval
+        if next_due.tzinfo is None:
+            # Databases without timezone support hand back the stored UTC time naive
+            next_due = next_due.replace(tzinfo=timezone.utc)
+        seconds = (next_due - datetime.now(timezone.utc)).total_seconds()
+        return min(max(seconds, 0), self.poll_interval)
+
+webhook_retry_worker = WebhookRetryWorker()
@@ -0,0 +1,41 @@
+# app/utils/token_bucket.py
+import asyncio
+import time
+
+class TokenBucket:
+    """Async token bucket: `rate` requests/second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent; waiters are served in order"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block_for(self, seconds: float):
+        """Hold every caller back for `seconds` (e.g. after a 429 with Retry-After)"""
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        # Restart from an empty bucket so callers do not burst as soon as the block lifts
+        self.tokens = 0.0
+        self.updated = self.blocked_until
@@ -1,25 +1,44 @@
-
 # app/utils/token_refresh_scheduler.py
 import asyncio
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, or_, update
+from app.core.config import settings
 from app.models.database import SessionLocal
 from app.models.tiktok_models import TikTokShop
 from app.services.auth_service import AuthService
+from typing import List
 import logging
 
 logger = logging.getLogger(__name__)
 
 class TokenRefreshScheduler:
-    """Background task to refresh expiring tokens"""
-    
+    """
+    Background task to refresh expiring tokens.
+
+    Each pass selects only the shops whose indexed access_token_expires_at
+    falls within TOKEN_REFRESH_THRESHOLD_SECONDS (or is unknown) and
+    refreshes up to TOKEN_REFRESH_CONCURRENCY of them at once. A shop is
+    claimed by stamping token_refresh_claimed_at in a short transaction, so
+    replicas running the same scheduler never refresh a token twice and no
+    row lock is held across the call to TikTok. A claim left by a crashed
+    refresh lapses after TOKEN_REFRESH_LEASE_SECONDS.
+
+    Failures are counted per shop in token_refresh_failures. After
+    TOKEN_REFRESH_MAX_FAILURES in a row (typically a revoked refresh token)
+    the shop is skipped until it is re-authorized, which resets the count.
+    """
+
     def __init__(self):
-        self.check_interval = 3600  # Check every hour
-        self.refresh_threshold = 7200  # Refresh if expires in 2 hours
-    
+        self.check_interval = settings.TOKEN_REFRESH_INTERVAL_SECONDS
+        self.refresh_threshold = settings.TOKEN_REFRESH_THRESHOLD_SECONDS
+        self.max_failures = settings.TOKEN_REFRESH_MAX_FAILURES
+        self.lease_seconds = settings.TOKEN_REFRESH_LEASE_SECONDS
+        self._semaphore = asyncio.Semaphore(max(settings.TOKEN_REFRESH_CONCURRENCY, 1))
+
     async def start(self):
         """Start the token refresh scheduler"""
         logger.info("Token refresh scheduler started")
-        
+
         while True:
             try:
                 await self.refresh_expiring_tokens()
@@ -28,42 +47,115 @@ class TokenRefreshScheduler:
                 logger.info("Token refresh scheduler stopped")
                 break
             except Exception as e:
-                logger.error(f"Error in token refresh scheduler: {e}")
+                logger.error(f"Error in token refresh scheduler: {e}", exc_info=True)
                 await asyncio.sleep(60)  # Wait before retry
-    
-    async def refresh_expiring_tokens(self):
-        """Check and refresh tokens that are about to expire"""
+
+    def _expiring_filter(self):
+        # Shops without a stored expiry are refreshed once to record it
+        return and_(
+            or_(
+                TikTokShop.access_token_expires_at.is_(None),
+                TikTokShop.access_token_expires_at < datetime.now(timezone.utc) + timedelta(seconds=self.refresh_threshold)
+            ),
+            or_(
+                TikTokShop.token_refresh_failures.is_(None),
+                TikTokShop.token_refresh_failures < self.max_failures
+            )
+        )
+
+    async def refresh_expiring_tokens(self) -> int:
+        """Refresh tokens that are about to expire; returns how many were refreshed"""
+        db = SessionLocal()
+        try:
+            shop_ids: List[str] = [
+                shop_id for (shop_id,) in db.query(TikTokShop.shop_id).filter(
+                    TikTokShop.is_active == True,
+                    TikTokShop.refresh_token != None,
+                    self._expiring_filter()
+                ).order_by(TikTokShop.access_token_expires_at).all()
+            ]
+        finally:
+            db.close()
+
+        if not shop_ids:
+            return 0
+
+        results = await asyncio.gather(*(self._refresh_shop(shop_id) for shop_id in shop_ids))
+
+        refreshed_count = sum(results)
+        if refreshed_count > 0:
+            logger.info(f"Refreshed {refreshed_count} tokens")
+        return refreshed_count
+
+    async def _refresh_shop(self, shop_id: str) -> bool:
+        async with self._semaphore:
+            if not self._claim(shop_id):
+                return False  # another replica has it, or has refreshed it already
+
+            db = SessionLocal()
+            try:
+                logger.info(f"Refreshing token for shop {shop_id}")
+                await AuthService(db).refresh_shop_token(shop_id)
+                error = None
+            except Exception as e:
+                db.rollback()
+                error = e
+            finally:
+                db.close()
+
+            failures = self._release(shop_id, succeeded=error is None)
+            if error is None:
+                return True
+
+            logger.error(
+                f"Failed to refresh token for shop {shop_id} "
+                f"({failures}/{self.max_failures} consecutive failures): {error}",
+                exc_info=error
+            )
+            if failures >= self.max_failures:
+                logger.error(
+                    f"Giving up on token refresh for shop {shop_id} after {failures} consecutive "
+                    f"failures; it will be skipped until the shop is re-authorized"
+                )
+            return False
+
+    def _claim(self, shop_id: str) -> bool:
+        """Take the refresh lease on a shop that still needs refreshing"""
+        db = SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            result = db.execute(
+                update(TikTokShop)
+                .where(
+                    TikTokShop.shop_id == shop_id,
+                    self._expiring_filter(),
+                    or_(
+                        TikTokShop.token_refresh_claimed_at.is_(None),
+                        TikTokShop.token_refresh_claimed_at < now - timedelta(seconds=self.lease_seconds)
+                    )
+                )
+                .values(token_refresh_claimed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def _release(self, shop_id: str, succeeded: bool) -> int:
+        """Drop the lease and record the outcome; returns the consecutive failure count"""
         db = SessionLocal()
-        
         try:
-            # Get shops with active tokens
-            shops = db.query(TikTokShop).filter(
-                TikTokShop.is_active == True,
-                TikTokShop.access_token != None
-            ).all()
-            
-            auth_service = AuthService(db)
-            refreshed_count = 0
-            
-            for shop in shops:
-                try:
-                    # Calculate token expiry
-                    if shop.token_updated_at and shop.access_token_expire_in:
-                        expiry_time = shop.token_updated_at + timedelta(
-                            seconds=shop.access_token_expire_in
-                        )
-                        
-                        # Check if token expires soon
-                        if expiry_time - datetime.utcnow() < timedelta(seconds=self.refresh_threshold):
-                            logger.info(f"Refreshing token for shop {shop.shop_id}")
-                            await auth_service.refresh_shop_token(shop.shop_id)
-                            refreshed_count += 1
-                            
-                except Exception as e:
-                    logger.error(f"Failed to refresh token for shop {shop.shop_id}: {e}")
-            
-            if refreshed_count > 0:
-                logger.info(f"Refreshed {refreshed_count} tokens")
-                
+            failures = 0 if succeeded else func.coalesce(TikTokShop.token_refresh_failures, 0) + 1
+            result = db.execute(
+                update(TikTokShop)
+                .where(TikTokShop.shop_id == shop_id)
+                .values(token_refresh_claimed_at=None, token_refresh_failures=failures)
+                .returning(TikTokShop.token_refresh_failures)
+                .execution_options(synchronize_session=False)
+            )
+            count = result.scalar_one()
+            db.commit()
+            return count
         finally:
             db.close()
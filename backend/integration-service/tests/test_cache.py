@@ -0,0 +1,87 @@
+import time
+
+from app.core.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(monkeypatch, max_entries=3):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return LRUCache(max_entries), clock
+
+
+def test_evicts_least_recently_used(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.set("a", "1", 60)
+    cache.set("b", "2", 60)
+    cache.set("c", "3", 60)
+
+    assert cache.get("a") == "1"  # "b" is now the oldest
+    cache.set("d", "4", 60)
+
+    assert cache.get("b") is None
+    assert cache.keys() == ["c", "a", "d"]
+    assert cache.evictions == 1
+
+
+def test_overwrite_does_not_evict(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    for key in ("a", "b", "c"):
+        cache.set(key, key, 60)
+    cache.set("a", "new", 60)
+
+    assert len(cache) == 3
+    assert cache.get("a") == "new"
+    assert cache.evictions == 0
+
+
+def test_expired_entries_are_dropped_on_read(monkeypatch):
+    cache, clock = make_cache(monkeypatch)
+    cache.set("short", "1", 10)
+    cache.set("long", "2", 100)
+
+    clock.now += 10
+    assert cache.get("short") is None
+    assert cache.get("long") == "2"
+    assert cache.expirations == 1
+    assert len(cache) == 1
+
+
+def test_delete_namespace_drops_only_its_keys(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=10)
+    cache.set("shop1:a", "1", 60, namespace="shop1")
+    cache.set("shop1:b", "2", 60, namespace="shop1")
+    cache.set("shop2:a", "3", 60, namespace="shop2")
+    cache.set("plain", "4", 60)
+
+    assert cache.delete_namespace("shop1") == 2
+    assert cache.keys() == ["shop2:a", "plain"]
+    assert cache.delete_namespace("shop1") == 0
+
+
+def test_evicted_and_deleted_keys_leave_the_namespace_index(monkeypatch):
+    cache, _ = make_cache(monkeypatch, max_entries=2)
+    cache.set("a", "1", 60, namespace="ns")
+    cache.set("b", "2", 60, namespace="ns")
+    cache.set("c", "3", 60)  # evicts "a"
+    cache.delete("b")
+
+    assert cache.delete_namespace("ns") == 0
+    assert cache.keys() == ["c"]
+
+
+def test_overwrite_moves_key_between_namespaces(monkeypatch):
+    cache, _ = make_cache(monkeypatch)
+    cache.set("k", "1", 60, namespace="old")
+    cache.set("k", "2", 60, namespace="new")
+
+    assert cache.delete_namespace("old") == 0
+    assert cache.delete_namespace("new") == 1
+    assert len(cache) == 0
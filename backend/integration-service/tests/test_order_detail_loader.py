@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.services import order_detail_loader
+from app.services.order_detail_loader import OrderDetailLoader
+
+
+class FakeClient:
+    """Stands in for TikTokShopClient; answers with `response` (or raises `error`)"""
+
+    calls = []
+    response = None
+    error = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get_order_detail(self, access_token, shop_id, order_ids):
+        FakeClient.calls.append((shop_id, list(order_ids)))
+        await asyncio.sleep(0)
+        if FakeClient.error:
+            raise FakeClient.error
+        if FakeClient.response is not None:
+            return FakeClient.response
+        return {"data": {"order_list": [{"order_id": order_id} for order_id in order_ids if order_id != "missing"]}}
+
+
+@pytest.fixture(autouse=True)
+def client(monkeypatch):
+    monkeypatch.setattr(order_detail_loader, "TikTokShopClient", FakeClient)
+    monkeypatch.setattr(FakeClient, "calls", [])
+    monkeypatch.setattr(FakeClient, "response", None)
+    monkeypatch.setattr(FakeClient, "error", None)
+    return FakeClient
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_call_per_shop(client):
+    loader = OrderDetailLoader(batch_size=50, wait_ms=5)
+
+    results = await asyncio.gather(
+        loader.load("shop-a", "token", "1"),
+        loader.load("shop-a", "token", "2"),
+        loader.load("shop-a", "token", "1"),
+        loader.load("shop-b", "token", "3"),
+        loader.load("shop-a", "token", "missing"),
+    )
+
+    assert results == [{"order_id": "1"}, {"order_id": "2"}, {"order_id": "1"}, {"order_id": "3"}, None]
+    assert sorted(client.calls) == [("shop-a", ["1", "2", "missing"]), ("shop-b", ["3"])]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting(client):
+    # A window far longer than the test waits
+    loader = OrderDetailLoader(batch_size=3, wait_ms=60_000)
+
+    lookups = [asyncio.create_task(loader.load("shop-a", "token", str(i))) for i in range(4)]
+    _, pending = await asyncio.wait(lookups, timeout=1)
+
+    assert [task.result() for task in lookups[:3]] == [{"order_id": "0"}, {"order_id": "1"}, {"order_id": "2"}]
+    assert pending == {lookups[3]}
+    assert client.calls == [("shop-a", ["0", "1", "2"])]
+    loader._dispatch(("shop-a", "token"))
+    assert await lookups[3] == {"order_id": "3"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("response, error", [
+    (None, RuntimeError("TikTok API error")),
+    ({"data": {"order_list": [{"id": "1"}]}}, None),  # no order_id
+    ({"data": "unexpected"}, None),
+])
+async def test_failed_or_malformed_batch_fails_every_waiter(client, response, error):
+    client.response, client.error = response, error
+    loader = OrderDetailLoader(batch_size=50, wait_ms=1)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(loader.load("shop-a", "token", order_id) for order_id in ("1", "2", "1")), return_exceptions=True),
+        timeout=1
+    )
+
+    assert len(results) == 3
+    assert all(isinstance(result, Exception) for result in results)
+    assert not loader._pending and not loader._inflight
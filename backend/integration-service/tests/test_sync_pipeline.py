@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.tiktok_models import SyncWatermark, TikTokShop
+from app.services import sync_state
+from app.services.sync_pipeline import SyncPipeline
+from app.services.sync_writer import SyncCounts
+
+
+@pytest.fixture
+def db(tmp_path):
+    # Pages are written from a worker thread
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(TikTokShop(id="1", shop_id="shop-a"))
+    session.commit()
+    yield session
+    session.close()
+
+
+class Listing:
+    """Cursor-paginated listing of `pages`; fetching page `fail_at` raises once"""
+
+    def __init__(self, pages, fail_at=None):
+        self.pages = pages
+        self.fail_at = fail_at
+        self.fetched = []
+        self.written = []
+
+    async def fetch_page(self, filters, page_number, cursor):
+        self.fetched.append((page_number, cursor))
+        if page_number == self.fail_at:
+            self.fail_at = None
+            raise RuntimeError("TikTok API error")
+        items = self.pages[page_number - 1]
+        more = page_number < len(self.pages)
+        return {"data": {
+            "orders": items,
+            "next_page_token": f"cursor-{page_number + 1}" if more else "",
+            "total_count": sum(len(page) for page in self.pages),
+        }}
+
+    def write_page(self, items):
+        self.written.append([item["order_id"] for item in items])
+        return SyncCounts(inserted=len(items))
+
+
+def pages(*sizes):
+    update_time = 0
+    result = []
+    for size in sizes:
+        page = []
+        for _ in range(size):
+            update_time += 1
+            page.append({"order_id": str(update_time), "update_time": 1000 + update_time})
+        result.append(page)
+    return result
+
+
+def pipeline(db, listing, prefetch_pages=2):
+    return SyncPipeline(db, "shop-a", "orders", listing.fetch_page, listing.write_page, prefetch_pages=prefetch_pages)
+
+
+@pytest.mark.asyncio
+async def test_every_page_is_written_and_the_watermark_advances(db):
+    listing = Listing(pages(2, 2, 1))
+    operation = sync_state.start_operation(db, "shop-a", "order", "full", filters={})
+
+    progress = await pipeline(db, listing).run(operation)
+
+    assert listing.written == [["1", "2"], ["3", "4"], ["5"]]
+    assert [cursor for _, cursor in listing.fetched] == [None, "cursor-2", "cursor-3"]
+    assert (progress.pages, progress.counts.inserted) == (3, 5)
+    assert (operation.status, operation.processed_items, operation.total_items) == ("completed", 5, 5)
+    watermark = db.get(SyncWatermark, ("shop-a", "order"))
+    assert watermark.high_water_update_time == 1005
+    assert watermark.last_full_sync_at is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_sync_resumes_after_its_last_checkpoint(db):
+    listing = Listing(pages(2, 2, 2), fail_at=3)
+    operation = sync_state.start_operation(db, "shop-a", "order", "full", filters={})
+
+    with pytest.raises(RuntimeError):
+        await pipeline(db, listing).run(operation)
+
+    assert operation.status == "failed"
+    assert operation.sync_metadata["checkpoint"] == {"page_number": 2, "next_cursor": "cursor-3"}
+
+    resumed = sync_state.start_operation(db, "shop-a", "order", "full", filters={})
+    progress = await pipeline(db, listing).run(resumed)
+
+    assert resumed.id == operation.id
+    assert progress.resumed_from_page == 3
+    assert listing.fetched[-1] == (3, "cursor-3")
+    assert listing.written == [["1", "2"], ["3", "4"], ["5", "6"]]
+    assert resumed.status == "completed"
+
+
+@pytest.mark.asyncio
+async def test_fetcher_stays_at_most_prefetch_pages_ahead(db):
+    listing = Listing(pages(*[1] * 10))
+    write_page = listing.write_page
+    ahead = []
+
+    def slow_write(items):
+        ahead.append(len(listing.fetched) - len(listing.written))
+        return write_page(items)
+
+    sync = SyncPipeline(db, "shop-a", "orders", listing.fetch_page, slow_write, prefetch_pages=2)
+    await sync.run(sync_state.start_operation(db, "shop-a", "order", "full", filters={}))
+
+    assert len(listing.written) == 10
+    # The page being written, two queued pages and one waiting to be queued
+    assert max(ahead) <= 4
@@ -0,0 +1,81 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.tiktok_models import SyncOperation, SyncWatermark, TikTokShop
+from app.services import sync_state
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(TikTokShop(id="1", shop_id="shop-a"))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def local_time_ahead_of_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def add_operation(db, operation_id, minutes_ago, **columns):
+    db.add(SyncOperation(
+        id=operation_id,
+        shop_id="shop-a",
+        entity_type="order",
+        sync_mode="full",
+        status="in_progress",
+        started_at=datetime.now(timezone.utc) - timedelta(minutes=minutes_ago),
+        **columns
+    ))
+    db.commit()
+
+
+def test_recent_sync_is_in_progress(db, local_time_ahead_of_utc):
+    add_operation(db, "op", minutes_ago=5)
+
+    assert sync_state.is_sync_in_progress(db, "shop-a", "order")
+
+
+def test_stalled_sync_is_not_in_progress(db, local_time_ahead_of_utc):
+    stale = sync_state.settings.SYNC_STALE_AFTER_MINUTES + 5
+    add_operation(db, "op", minutes_ago=stale + 60,
+                  estimated_completion=datetime.now(timezone.utc) - timedelta(minutes=stale))
+
+    assert not sync_state.is_sync_in_progress(db, "shop-a", "order")
+
+
+def test_stalled_sync_with_checkpoint_is_resumed(db):
+    stale = sync_state.settings.SYNC_STALE_AFTER_MINUTES + 5
+    add_operation(db, "op", minutes_ago=stale, sync_metadata={"checkpoint": {"page_token": "p2"}})
+
+    operation = sync_state.start_operation(db, "shop-a", "order", "full", filters={})
+
+    assert operation.id == "op"
+    assert sync_state.is_sync_in_progress(db, "shop-a", "order")
+
+
+def test_incremental_falls_back_to_full_without_recent_reconcile(db):
+    watermark = SyncWatermark(shop_id="shop-a", entity_type="order", high_water_update_time=1700000000)
+    db.add(watermark)
+    db.commit()
+    assert sync_state.resolve_sync_mode(db, "shop-a", "order", "incremental") == "full"
+
+    watermark.last_full_sync_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.commit()
+    assert sync_state.resolve_sync_mode(db, "shop-a", "order", "incremental") == "incremental"
+    assert sync_state.incremental_filters(db, "shop-a", "order") == {
+        "update_time_from": 1700000000 - sync_state.settings.SYNC_WATERMARK_OVERLAP_SECONDS
+    }
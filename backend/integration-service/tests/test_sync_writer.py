@@ -0,0 +1,68 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.sync_writer import BulkSyncWriter, SyncCounts, order_row
+
+
+class RecordingSession:
+    """Captures the upsert and answers RETURNING with `inserted` flags"""
+
+    def __init__(self, inserted):
+        self.inserted = inserted
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        session = self
+
+        class Result:
+            def scalars(self):
+                return self
+
+            def all(self):
+                return session.inserted
+
+        return Result()
+
+
+def order(order_id, update_time):
+    return {"order_id": order_id, "order_status": "AWAITING_SHIPMENT", "update_time": update_time}
+
+
+def test_page_is_written_with_one_upsert():
+    db = RecordingSession(inserted=[True, False])
+
+    counts = BulkSyncWriter(db).upsert_orders("shop-a", [order("1", 100), order("2", 100), order("3", 100)])
+
+    # One new row, one changed row; the third was skipped by the update_time check
+    assert counts == SyncCounts(inserted=1, updated=1, unchanged=1)
+    (stmt,) = db.statements
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (order_id) DO UPDATE" in sql
+    assert "IS DISTINCT FROM excluded.update_time" in sql
+    assert "RETURNING (xmax = 0)" in sql
+    assert "shop_id = excluded.shop_id" not in sql and " id = excluded.id" not in sql
+
+
+def test_duplicate_ids_in_a_page_keep_the_latest_copy():
+    db = RecordingSession(inserted=[True])
+
+    counts = BulkSyncWriter(db).upsert_orders("shop-a", [order("1", 100), order("1", 200)])
+
+    assert counts == SyncCounts(inserted=1)
+    params = db.statements[0].compile(dialect=postgresql.dialect()).params
+    assert [value for name, value in params.items() if name.startswith("update_time")] == [200]
+
+
+def test_empty_page_is_not_written():
+    db = RecordingSession(inserted=[])
+
+    assert BulkSyncWriter(db).upsert_products("shop-a", []) == SyncCounts()
+    assert db.statements == []
+
+
+def test_order_row_defaults():
+    row = order_row("shop-a", order("1", 100))
+
+    assert row["shop_id"] == "shop-a"
+    assert (row["line_items"], row["buyer_info"], row["payment_status"]) == ([], {}, None)
+    assert SyncCounts(1, 2, 3).add(SyncCounts(1, 1, 1)).to_dict() == {"inserted": 2, "updated": 3, "unchanged": 4}
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.services import tiktok_client
+from app.services.tiktok_client import TikTokShopClient
+from app.utils.token_bucket import TokenBucket
+
+
+class Responses(list):
+    """Queued responses, plus the methods of the requests sent so far"""
+
+    sent = None
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Status codes (or exceptions) the TikTok API answers with, in turn"""
+    responses = Responses()
+    sent = responses.sent = []
+
+    def handle(request):
+        sent.append(request.method)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        status, headers = response if isinstance(response, tuple) else (response, {})
+        return httpx.Response(status, headers=headers, json={"code": 0, "data": {}})
+
+    monkeypatch.setattr(tiktok_client.settings, "TIKTOK_RETRY_BACKOFF_SECONDS", 0.001)
+    monkeypatch.setattr(TikTokShopClient, "_pool", httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+    monkeypatch.setattr(TikTokShopClient, "_pool_loop", None)
+    monkeypatch.setattr(TikTokShopClient, "_app_buckets", {})
+    monkeypatch.setattr(TikTokShopClient, "_shop_buckets", {})
+    return responses
+
+
+@pytest_asyncio.fixture
+async def api(responses):
+    # Adopt the mock pool for this test's event loop
+    TikTokShopClient._pool_loop = asyncio.get_running_loop()
+    return TikTokShopClient()
+
+
+@pytest.mark.asyncio
+async def test_clients_share_one_pool_and_buckets(api):
+    other = TikTokShopClient()
+
+    assert other.client is api.client
+    assert other._buckets("shop-a")[1] is api._buckets("shop-a")[1]
+    assert api._buckets("shop-a")[0] is api._buckets("shop-b")[0]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_request_waits_and_pauses_the_shop(api, responses):
+    responses.extend([(429, {"Retry-After": "0.2"}), 200])
+
+    started = time.monotonic()
+    await api._make_request("POST", "/orders/search", shop_id="shop-a")
+
+    assert time.monotonic() - started >= 0.2
+    assert responses.sent == ["POST", "POST"]
+    assert TikTokShopClient._shop_buckets["shop-a"].blocked_until > 0
+
+
+@pytest.mark.asyncio
+async def test_only_idempotent_requests_retry_server_errors(api, responses):
+    responses.extend([503, httpx.ConnectError("reset"), 200])
+    assert await api._make_request("GET", "/products/1", shop_id="shop-a") == {"code": 0, "data": {}}
+    assert len(responses.sent) == 3
+
+    responses.extend([503])
+    with pytest.raises(httpx.HTTPStatusError):
+        await api._make_request("POST", "/products", shop_id="shop-a")
+
+    responses.extend([503, 200])
+    await api._make_request("POST", "/orders/search", shop_id="shop-a", idempotent=True)
+    assert len(responses.sent) == 6
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests_after_the_burst():
+    bucket = TokenBucket(rate=20, burst=2)
+
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+
+    # Two from the burst, then one every 50ms
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_blocked_bucket_holds_callers_back():
+    bucket = TokenBucket(rate=1000, burst=10)
+    bucket.block_for(0.1)
+
+    started = time.monotonic()
+    await bucket.acquire()
+
+    assert time.monotonic() - started >= 0.1
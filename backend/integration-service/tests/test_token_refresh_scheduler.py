@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.tiktok_models import TikTokShop
+from app.utils import token_refresh_scheduler
+from app.utils.token_refresh_scheduler import TokenRefreshScheduler
+
+
+class FakeAuthService:
+    """Stands in for AuthService; fails the shops listed in `failing`"""
+
+    refreshed = []
+    failing = set()
+
+    def __init__(self, db):
+        self.db = db
+
+    async def refresh_shop_token(self, shop_id):
+        FakeAuthService.refreshed.append(shop_id)
+        if shop_id in FakeAuthService.failing:
+            raise RuntimeError("refresh token revoked")
+        shop = self.db.query(TikTokShop).filter(TikTokShop.shop_id == shop_id).one()
+        shop.access_token_expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+        self.db.commit()
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'shops.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(token_refresh_scheduler, "SessionLocal", factory)
+    monkeypatch.setattr(token_refresh_scheduler, "AuthService", FakeAuthService)
+    monkeypatch.setattr(FakeAuthService, "refreshed", [])
+    monkeypatch.setattr(FakeAuthService, "failing", set())
+    return factory
+
+
+def add_shop(factory, shop_id, expires_in, **columns):
+    db = factory()
+    db.add(TikTokShop(
+        id=shop_id,
+        shop_id=shop_id,
+        refresh_token="refresh",
+        is_active=True,
+        access_token_expires_at=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+        **columns
+    ))
+    db.commit()
+    db.close()
+
+
+def shop(factory, shop_id):
+    db = factory()
+    try:
+        return db.query(TikTokShop).filter(TikTokShop.shop_id == shop_id).one()
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_only_expiring_shops_are_refreshed(session_factory):
+    scheduler = TokenRefreshScheduler()
+    add_shop(session_factory, "expiring", scheduler.refresh_threshold - 60)
+    add_shop(session_factory, "fresh", scheduler.refresh_threshold + 600)
+
+    assert await scheduler.refresh_expiring_tokens() == 1
+    assert FakeAuthService.refreshed == ["expiring"]
+    assert shop(session_factory, "expiring").token_refresh_claimed_at is None
+
+
+@pytest.mark.asyncio
+async def test_leased_shops_are_skipped_until_the_lease_lapses(session_factory):
+    scheduler = TokenRefreshScheduler()
+    now = datetime.now(timezone.utc)
+    add_shop(session_factory, "leased", 60, token_refresh_claimed_at=now)
+    add_shop(session_factory, "lapsed", 60, token_refresh_claimed_at=now - timedelta(seconds=scheduler.lease_seconds + 1))
+
+    assert await scheduler.refresh_expiring_tokens() == 1
+    assert FakeAuthService.refreshed == ["lapsed"]
+
+
+@pytest.mark.asyncio
+async def test_failing_shops_are_given_up_after_max_failures(session_factory):
+    scheduler = TokenRefreshScheduler()
+    add_shop(session_factory, "revoked", 60)
+    FakeAuthService.failing.add("revoked")
+
+    for _ in range(scheduler.max_failures + 2):
+        assert await scheduler.refresh_expiring_tokens() == 0
+
+    assert len(FakeAuthService.refreshed) == scheduler.max_failures
+    assert shop(session_factory, "revoked").token_refresh_failures == scheduler.max_failures
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from app.core.webhook_dedup import TimeBucketedIdSet, WebhookDedupStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 1_000_000.0
+
+    monkeypatch.setattr(time, "time", lambda: Clock.now)
+    return Clock
+
+
+class FakeRedis:
+    def __init__(self, error=None):
+        self.keys = {}
+        self.error = error
+
+    async def set(self, key, value, nx=False, ex=None):
+        if self.error:
+            raise self.error
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = ex
+        return True
+
+    async def delete(self, key):
+        self.keys.pop(key, None)
+
+
+def test_ids_are_rejected_until_their_bucket_expires(clock):
+    ids = TimeBucketedIdSet(ttl_seconds=60, bucket_seconds=10, max_ids=100)
+
+    assert ids.add("a")
+    clock.now += 30
+    assert not ids.add("a")
+    assert ids.add("b")
+
+    clock.now += 31  # "a"'s bucket is now older than the TTL
+    assert ids.add("a")
+    assert not ids.add("b")
+    assert len(ids) == 2
+
+
+def test_bursts_are_bounded_by_max_ids(clock):
+    ids = TimeBucketedIdSet(ttl_seconds=60, bucket_seconds=10, max_ids=60)
+
+    for i in range(500):
+        assert ids.add(str(i))
+
+    assert len(ids) <= 60
+    assert not ids.add("499")
+
+
+def test_discard_allows_an_id_again(clock):
+    ids = TimeBucketedIdSet(ttl_seconds=60, bucket_seconds=10, max_ids=100)
+    ids.add("a")
+
+    ids.discard("a")
+
+    assert len(ids) == 0
+    assert ids.add("a")
+
+
+@pytest.mark.asyncio
+async def test_store_uses_redis_set_nx_with_ttl():
+    store = WebhookDedupStore()
+    store.redis = FakeRedis()
+
+    assert await store.mark_processed("wh-1")
+    assert not await store.mark_processed("wh-1")
+    assert store.redis.keys == {"webhook:processed:wh-1": store.ttl_seconds}
+
+    await store.forget("wh-1")
+    assert await store.mark_processed("wh-1")
+    assert len(store.local) == 0
+
+
+@pytest.mark.asyncio
+async def test_store_falls_back_to_memory_when_redis_fails():
+    store = WebhookDedupStore()
+    store.redis = FakeRedis(error=ConnectionError("down"))
+
+    assert await store.mark_processed("wh-1")
+    assert not await store.mark_processed("wh-1")
+    assert store.stats()["local_tracked_count"] == 1
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.tiktok_models import TikTokShop, WebhookEvent
+from app.services import webhook_dispatcher, webhook_retry_worker
+from app.services.webhook_dispatcher import QueuedWebhook, WebhookDispatcher
+from app.services.webhook_retry_worker import WebhookRetryWorker
+
+
+class RecordingService:
+    """Stands in for WebhookService; fails the events listed in `failing`"""
+
+    max_retry_attempts = 3
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.processed = []
+
+    async def process_webhook(self, data):
+        self.processed.append(data["event"])
+        if data["event"] in self.failing:
+            raise RuntimeError("handler failed")
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'webhooks.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(webhook_dispatcher, "SessionLocal", factory)
+    monkeypatch.setattr(webhook_retry_worker, "SessionLocal", factory)
+    db = factory()
+    db.add_all([TikTokShop(id="1", shop_id="shop-a"), TikTokShop(id="2", shop_id="shop-b")])
+    db.commit()
+    db.close()
+    return factory
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = RecordingService()
+    monkeypatch.setattr(webhook_retry_worker.webhook_retry_worker, "webhook_service", service)
+    return service
+
+
+def dispatcher_for(service):
+    dispatcher = WebhookDispatcher()
+    dispatcher.webhook_service = service
+    return dispatcher
+
+
+def add_event(factory, event_id, shop_id, seconds_ago, status="pending", **columns):
+    db = factory()
+    db.add(WebhookEvent(
+        id=event_id,
+        shop_id=shop_id,
+        event_type="ORDER_STATUS_CHANGE",
+        payload={"event": event_id, "shop_id": shop_id},
+        status=status,
+        received_at=datetime.now(timezone.utc) - timedelta(seconds=seconds_ago),
+        retry_count=columns.pop("retry_count", 0),
+        **columns
+    ))
+    db.commit()
+    db.close()
+    return QueuedWebhook(id=event_id, shop_id=shop_id, payload={"event": event_id, "shop_id": shop_id})
+
+
+def statuses(factory):
+    db = factory()
+    try:
+        return {event.id: event.status for event in db.query(WebhookEvent)}
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_is_claimed_processed_and_recorded_in_arrival_order(session_factory, service):
+    a1 = add_event(session_factory, "a1", "shop-a", 30)
+    b1 = add_event(session_factory, "b1", "shop-b", 20)
+    a2 = add_event(session_factory, "a2", "shop-a", 10)
+
+    # The recovery sweep can queue an older event behind a newer one
+    await dispatcher_for(service)._process_batch([a2, b1, a1])
+
+    assert service.processed == ["a1", "b1", "a2"]
+    assert statuses(session_factory) == {"a1": "processed", "b1": "processed", "a2": "processed"}
+
+
+@pytest.mark.asyncio
+async def test_failure_holds_the_shops_later_events(session_factory, service):
+    service.failing = {"a1"}
+    batch = [
+        add_event(session_factory, "a1", "shop-a", 30),
+        add_event(session_factory, "a2", "shop-a", 20),
+        add_event(session_factory, "b1", "shop-b", 10),
+    ]
+
+    await dispatcher_for(service)._process_batch(batch)
+
+    assert service.processed == ["a1", "b1"]
+    assert statuses(session_factory) == {"a1": "retrying", "a2": "pending", "b1": "processed"}
+
+    # Still held while a1 waits for its retry
+    await dispatcher_for(service)._process_batch([batch[1]])
+    assert service.processed == ["a1", "b1"]
+    assert statuses(session_factory)["a2"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_events_queued_twice_are_processed_once(session_factory, service):
+    a1 = add_event(session_factory, "a1", "shop-a", 20)
+    a2 = add_event(session_factory, "a2", "shop-a", 10)
+    dispatcher = dispatcher_for(service)
+
+    await dispatcher._process_batch([a1])
+    await dispatcher._process_batch([a1, a2])
+
+    assert service.processed == ["a1", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_retries_are_serialized_per_shop(session_factory, service):
+    due = datetime.now(timezone.utc) - timedelta(seconds=1)
+    add_event(session_factory, "a1", "shop-a", 30, status="retrying", retry_count=1, next_attempt_at=due)
+    add_event(session_factory, "a2", "shop-a", 20, status="retrying", retry_count=1, next_attempt_at=due)
+    add_event(session_factory, "b1", "shop-b", 10, status="retrying", retry_count=1, next_attempt_at=due)
+    worker = WebhookRetryWorker()
+    worker.webhook_service = service
+    worker._semaphore = asyncio.Semaphore(10)
+
+    assert await worker.process_failed_webhooks() == 2
+    assert sorted(service.processed) == ["a1", "b1"]
+
+    assert await worker.process_failed_webhooks() == 1
+    assert service.processed[-1] == "a2"
+    assert set(statuses(session_factory).values()) == {"processed"}
+
+
+@pytest.mark.asyncio
+async def test_recovery_resets_timed_out_claims_and_skips_held_events(session_factory, service, monkeypatch):
+    monkeypatch.setattr(webhook_dispatcher.settings, "WEBHOOK_PROCESSING_TIMEOUT_SECONDS", 600)
+    monkeypatch.setattr(webhook_dispatcher.settings, "WEBHOOK_RECOVERY_GRACE_SECONDS", 30)
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    add_event(session_factory, "stale", "shop-a", 3600, status="processing", claimed_at=hour_ago)
+    add_event(session_factory, "fresh", "shop-b", 3600, status="processing", claimed_at=datetime.now(timezone.utc))
+    add_event(session_factory, "stranded", "shop-a", 1800)
+    add_event(session_factory, "held", "shop-b", 1200)
+    add_event(session_factory, "recent", "shop-a", 5)
+
+    recovered = WebhookDispatcher()._load_stranded()
+
+    # "held" waits behind "fresh", which is still being processed
+    assert [webhook.id for webhook in recovered] == ["stale", "stranded"]
+    assert statuses(session_factory)["stale"] == "pending"
+    assert statuses(session_factory)["fresh"] == "processing"
+
+
+@pytest.fixture
+def local_time_ahead_of_utc(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_retry_is_scheduled_in_utc(local_time_ahead_of_utc):
+    before = datetime.now(timezone.utc)
+    at = WebhookRetryWorker().next_attempt_at(retry_count=2)
+
+    # Second failure: between half and all of twice the base backoff
+    delay = webhook_retry_worker.settings.WEBHOOK_RETRY_BACKOFF_SECONDS * 2
+    assert at.tzinfo is not None
+    assert before + timedelta(seconds=delay / 2) <= at <= datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+
+def test_sleep_until_next_due_retry(session_factory, local_time_ahead_of_utc):
+    due = datetime.now(timezone.utc) + timedelta(seconds=60)
+    add_event(session_factory, "a1", "shop-a", 10, status="retrying", retry_count=1, next_attempt_at=due)
+
+    # The stored time comes back naive from SQLite and is read as UTC
+    assert 55 <= WebhookRetryWorker()._seconds_until_next_due() <= 60
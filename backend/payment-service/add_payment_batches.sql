@@ -0,0 +1,8 @@
+-- Link payments to the bulk batch that created them
+-- Defined in the Payment model; create_all does not add it to an existing table.
+-- (create_all creates the new payment_batches table itself.)
+
+ALTER TABLE payments
+ADD COLUMN IF NOT EXISTS batch_id UUID;
+
+CREATE INDEX IF NOT EXISTS ix_payments_batch_id ON payments(batch_id);
@@ -0,0 +1,6 @@
+-- Add the referred user's already-credited earnings to referrals
+-- Defined in the Referral model; create_all does not add it to an existing table.
+-- Run scripts/backfill_referral_bonus_basis.py afterwards.
+
+ALTER TABLE referrals
+ADD COLUMN IF NOT EXISTS bonus_earnings_basis DECIMAL(12, 2) NOT NULL DEFAULT 0.00;
@@ -1,10 +1,11 @@
 # app/api/endpoints/earnings.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.security import get_current_user, require_role
 from app.schemas.creator_earnings import (
     CreatorEarningsResponse, 
@@ -12,8 +13,9 @@ from app.schemas.creator_earnings import (
     CreatorEarningsUpdate,
     CreatorEarningsSummary
 )
-from app.services.earnings_service import EarningsCalculationService
-from app.crud import creator_earnings as crud_earnings
+from app.services.earnings_service import EarningsCalculationService, campaign_totals
+from app.crud.aio import creator_earnings as async_crud_earnings
+from app.crud.aio import balance as async_crud_balance
 
 router = APIRouter()
 
@@ -24,7 +26,7 @@ async def get_earnings(
     campaign_id: Optional[UUID] = None,
     creator_id: Optional[UUID] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get earnings records with filtering"""
     
@@ -32,7 +34,7 @@ async def get_earnings(
     if current_user["role"] == "creator":
         creator_id = UUID(current_user["sub"])
     
-    earnings = crud_earnings.get_multi_filtered(
+    earnings = await async_crud_earnings.get_multi_filtered(
         db, skip=skip, limit=limit, 
         campaign_id=campaign_id, creator_id=creator_id
     )
@@ -44,7 +46,7 @@ async def get_creator_earnings(
     creator_id: UUID,
     campaign_id: Optional[UUID] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get earnings for a specific creator"""
     
@@ -56,17 +58,17 @@ async def get_creator_earnings(
         )
     
     if campaign_id:
-        earning = crud_earnings.get_by_creator_and_campaign(db, creator_id, campaign_id)
+        earning = await async_crud_earnings.get_by_creator_and_campaign(db, creator_id, campaign_id)
         return [CreatorEarningsResponse.model_validate(earning)] if earning else []
     else:
-        earnings = crud_earnings.get_by_creator_id(db, creator_id)
+        earnings = await async_crud_earnings.get_by_creator_id(db, creator_id)
         return [CreatorEarningsResponse.model_validate(earning) for earning in earnings]
 
 @router.get("/creator/{creator_id}/summary", response_model=CreatorEarningsSummary)
 async def get_creator_earnings_summary(
     creator_id: UUID,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get earnings summary for a creator"""
     
@@ -77,9 +79,10 @@ async def get_creator_earnings_summary(
             detail="Cannot view other creators' earnings"
         )
     
-    earnings = crud_earnings.get_by_creator_id(db, creator_id)
+    # Single-row read from the running balance instead of summing every earnings row
+    balance = await async_crud_balance.get_creator_balance(db, creator_id)
     
-    if not earnings:
+    if not balance or not balance.earnings_count:
         return CreatorEarningsSummary(
             creator_id=creator_id,
             total_campaigns=0,
@@ -89,32 +92,25 @@ async def get_creator_earnings_summary(
             last_updated=None
         )
     
-    total_earnings = sum(e.calculated_total_earnings for e in earnings)
-    total_paid = sum(float(e.total_paid) for e in earnings)
-    pending_payment = sum(e.calculated_pending_payment for e in earnings)
-    last_updated = max(e.last_updated for e in earnings)
-    
     return CreatorEarningsSummary(
         creator_id=creator_id,
-        total_campaigns=len(earnings),
-        total_earnings=total_earnings,
-        total_paid=total_paid,
-        pending_payment=pending_payment,
-        last_updated=last_updated
+        total_campaigns=balance.earnings_count,
+        total_earnings=balance.total_earnings,
+        total_paid=float(balance.total_paid),
+        pending_payment=balance.pending_payment,
+        last_updated=balance.last_updated
     )
 
 @router.get("/campaign/{campaign_id}/totals")
 async def get_campaign_earnings_totals(
     campaign_id: UUID,
     current_user: dict = Depends(require_role(["agency", "brand", "admin"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get total earnings for a campaign"""
     
-    earnings_service = EarningsCalculationService(db)
-    totals = await earnings_service.calculate_campaign_total_payouts(campaign_id)
-    
-    return totals
+    balance = await async_crud_balance.get_campaign_balance(db, campaign_id)
+    return campaign_totals(balance)
 
 @router.post("/calculate", response_model=CreatorEarningsResponse)
 async def calculate_earnings(
@@ -1,21 +1,26 @@
 
 # app/api/endpoints/payments.py
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.security import get_current_user, require_role
 from app.schemas.payment import (
     PaymentCreate, 
     PaymentUpdate, 
     PaymentResponse, 
     PaymentListResponse,
-    BulkPaymentCreate
+    BulkPaymentCreate,
+    BulkPaymentBatchResponse
 )
-from app.services.payment_service import PaymentProcessingService
+from app.services.payment_service import PaymentProcessingService, build_batch_status
 from app.crud import payment as crud_payment
+from app.crud.aio import payment as async_crud_payment
+from app.crud.aio import payment_batch as async_crud_batch
 
 router = APIRouter()
 
@@ -27,7 +32,7 @@ async def get_payments(
     campaign_id: Optional[UUID] = None,
     status: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get payments with filtering"""
     
@@ -35,7 +40,7 @@ async def get_payments(
     if current_user["role"] == "creator":
         creator_id = UUID(current_user["sub"])  # Use "sub" instead of "id"
     
-    payments, total = crud_payment.get_multi_filtered(
+    payments, total = await async_crud_payment.get_multi_filtered(
         db, skip=skip, limit=limit,
         creator_id=creator_id, campaign_id=campaign_id, status=status
     )
@@ -48,7 +53,7 @@ async def get_payments(
     )
 
 @router.get("/overview")
-async def get_payment_overview(
+def get_payment_overview(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -71,7 +76,7 @@ async def get_payment_history(
     campaign_id: Optional[UUID] = None,
     status: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get payment history with filtering"""
     
@@ -79,7 +84,7 @@ async def get_payment_history(
     if current_user["role"] == "creator":
         creator_id = UUID(current_user["sub"])  # Use "sub" instead of "id"
     
-    payments = crud_payment.get_multi_filtered(
+    payments, _ = await async_crud_payment.get_multi_filtered(
         db, skip=skip, limit=limit,
         creator_id=creator_id, campaign_id=campaign_id, status=status
     )
@@ -92,7 +97,7 @@ async def get_creator_payment_history(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get payment history for a creator"""
     
@@ -104,18 +109,18 @@ async def get_creator_payment_history(
             detail="Cannot view other creators' payment history"
         )
     
-    payments = crud_payment.get_by_creator_id(db, creator_id, skip=skip, limit=limit)
+    payments = await async_crud_payment.get_by_creator_id(db, creator_id, skip=skip, limit=limit)
     return [PaymentResponse.model_validate(payment) for payment in payments]
 
 @router.get("/{payment_id}", response_model=PaymentResponse)
 async def get_payment(
     payment_id: UUID,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get payment details"""
     
-    payment = crud_payment.get(db, payment_id)
+    payment = await async_crud_payment.get(db, payment_id)
     if not payment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -159,27 +164,30 @@ async def create_payment(
             detail=f"Error creating payment: {str(e)}"
         )
 
-@router.post("/bulk", response_model=List[PaymentResponse])
+@router.post(
+    "/bulk",
+    response_model=BulkPaymentBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 async def create_bulk_payments(
     bulk_payment: BulkPaymentCreate,
     background_tasks: BackgroundTasks,
     current_user: dict = Depends(require_role(["agency", "admin"])),
     db: Session = Depends(get_db)
 ):
-    """Create multiple payments at once"""
+    """Create multiple payments at once; poll /batches/{batch_id} for progress"""
     
     payment_service = PaymentProcessingService(db)
     
     try:
-        payments = await payment_service.create_bulk_payments(bulk_payment)
+        batch, payment_ids = await payment_service.create_bulk_payments(
+            bulk_payment, created_by=current_user.get("sub")
+        )
         
-        # Process payments in background
-        for payment in payments:
-            background_tasks.add_task(
-                payment_service.process_payment_async, payment.id
-            )
+        # Submit to providers in background, grouped per provider
+        background_tasks.add_task(payment_service.submit_payment_batch, payment_ids)
         
-        return [PaymentResponse.model_validate(payment) for payment in payments]
+        return await asyncio.to_thread(payment_service.get_batch_status, batch.id)
         
     except Exception as e:
         raise HTTPException(
@@ -187,27 +195,45 @@ async def create_bulk_payments(
             detail=f"Error creating bulk payments: {str(e)}"
         )
 
+@router.get("/batches/{batch_id}", response_model=BulkPaymentBatchResponse)
+async def get_bulk_payment_batch(
+    batch_id: UUID,
+    current_user: dict = Depends(require_role(["agency", "admin"])),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get per-item status of a bulk payment batch"""
+    
+    batch = await async_crud_batch.get(db, batch_id)
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Payment batch not found"
+        )
+    
+    payments = await async_crud_payment.get_by_batch_id(db, batch_id)
+    return build_batch_status(batch, payments)
+
 @router.patch("/{payment_id}", response_model=PaymentResponse)
 async def update_payment(
     payment_id: UUID,
     payment_update: PaymentUpdate,
     current_user: dict = Depends(require_role(["agency", "admin"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update payment details"""
     
-    payment = crud_payment.get(db, payment_id)
+    payment = await async_crud_payment.get(db, payment_id)
     if not payment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Payment not found"
         )
     
-    updated_payment = crud_payment.update(db, payment_id, payment_update)
+    updated_payment = await async_crud_payment.update(db, payment_id, payment_update)
     return PaymentResponse.model_validate(updated_payment)
 
 @router.post("/{payment_id}/retry")
-async def retry_payment(
+def retry_payment(
     payment_id: UUID,
     background_tasks: BackgroundTasks,
     current_user: dict = Depends(require_role(["agency", "admin"])),
@@ -1,11 +1,12 @@
 
 # app/api/endpoints/referrals.py
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
 from app.core.security import get_current_user, require_role
 from app.schemas.referral import (
     ReferralCreate, 
@@ -13,8 +14,8 @@ from app.schemas.referral import (
     ReferralResponse,
     ReferralStats
 )
-from app.services.referral_service import ReferralService
-from app.crud import referral as crud_referral
+from app.services.referral_service import ReferralService, build_referral_stats
+from app.crud.aio import referral as async_crud_referral
 
 router = APIRouter()
 
@@ -25,7 +26,7 @@ async def get_referrals(
     referrer_id: Optional[UUID] = None,
     campaign_id: Optional[UUID] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get referrals with filtering"""
     
@@ -33,7 +34,7 @@ async def get_referrals(
     if current_user["role"] == "creator":
         referrer_id = UUID(current_user["id"])
     
-    referrals = crud_referral.get_multi_filtered(
+    referrals = await async_crud_referral.get_multi_filtered(
         db, skip=skip, limit=limit,
         referrer_id=referrer_id, campaign_id=campaign_id
     )
@@ -68,7 +69,7 @@ async def create_referral(
 async def get_creator_referral_stats(
     creator_id: UUID,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get referral statistics for a creator"""
     
@@ -80,8 +81,9 @@ async def get_creator_referral_stats(
             detail="Cannot view other creators' referral stats"
         )
     
-    referral_service = ReferralService(db)
-    stats = await referral_service.get_referral_stats(creator_id)
+    stats = build_referral_stats(
+        creator_id, await async_crud_referral.get_stats(db, creator_id)
+    )
     
     return stats
 
@@ -3,11 +3,12 @@
 from fastapi import APIRouter, Request, HTTPException, status, Header, Depends
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
 import json
 import logging
 
 from app.core.database import get_db
-from app.services.webhook_service import WebhookProcessingService
+from app.crud import webhook_event as crud_webhook_event
 from app.external.stripe_client import StripeClient
 from app.external.fanbasis_client import FanbasisClient
 
@@ -48,15 +49,25 @@ async def stripe_webhook(
                 detail="Invalid webhook payload"
             )
         
-        # Process webhook
-        webhook_service = WebhookProcessingService(db)
-        result = await webhook_service.process_stripe_webhook(event)
+        # Persist for asynchronous processing; duplicates (provider retries) are dropped
+        event_object = event.get("data", {}).get("object", {}) or {}
+        accepted = await asyncio.to_thread(
+            crud_webhook_event.ingest,
+            db,
+            provider="stripe",
+            provider_event_id=event["id"],
+            event_type=event.get("type"),
+            payload=json.loads(json.dumps(event, default=str)),
+            ordering_key=event_object.get("id")
+        )
         
-        logger.info(f"Processed Stripe webhook: {event['type']}")
-        return {"status": "success", "processed": result.success}
+        logger.info(f"Received Stripe webhook {event['id']}: {event.get('type')} (duplicate={not accepted})")
+        return {"status": "accepted", "duplicate": not accepted}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing Stripe webhook: {str(e)}")
+        logger.error(f"Error receiving Stripe webhook: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Webhook processing failed: {str(e)}"
@@ -98,15 +109,30 @@ async def fanbasis_webhook(
                 detail="Invalid JSON payload"
             )
         
-        # Process webhook
-        webhook_service = WebhookProcessingService(db)
-        result = await webhook_service.process_fanbasis_webhook(webhook_data)
+        # Persist for asynchronous processing; duplicates (provider retries) are dropped
+        transaction_id = webhook_data.get("transaction_id")
+        provider_event_id = (
+            webhook_data.get("event_id")
+            or webhook_data.get("id")
+            or f"{transaction_id}:{webhook_data.get('status')}"
+        )
+        accepted = await asyncio.to_thread(
+            crud_webhook_event.ingest,
+            db,
+            provider="fanbasis",
+            provider_event_id=str(provider_event_id),
+            event_type=webhook_data.get("type") or webhook_data.get("status"),
+            payload=webhook_data,
+            ordering_key=transaction_id
+        )
         
-        logger.info(f"Processed Fanbasis webhook: {webhook_data.get('type', 'unknown')}")
-        return {"status": "success", "processed": result.success}
+        logger.info(f"Received Fanbasis webhook {provider_event_id} (duplicate={not accepted})")
+        return {"status": "accepted", "duplicate": not accepted}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing Fanbasis webhook: {str(e)}")
+        logger.error(f"Error receiving Fanbasis webhook: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Webhook processing failed: {str(e)}"
@@ -1,4 +1,8 @@
+from typing import AsyncGenerator
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -6,6 +10,34 @@ from app.core.config import settings
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _async_database_url():
+    """ASYNC_DATABASE_URL if set, otherwise DATABASE_URL with an asyncio driver"""
+    url = make_url(getattr(settings, "ASYNC_DATABASE_URL", None) or settings.DATABASE_URL)
+    if url.drivername in ("postgresql", "postgresql+psycopg2"):
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.drivername == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url
+
+def _create_async_engine():
+    url = _async_database_url()
+    if url.get_backend_name() != "postgresql":
+        return create_async_engine(url)
+    return create_async_engine(
+        url,
+        pool_size=getattr(settings, "ASYNC_DB_POOL_SIZE", 10),
+        max_overflow=getattr(settings, "ASYNC_DB_MAX_OVERFLOW", 20),
+        pool_pre_ping=True
+    )
+
+# Non-blocking engine for request handlers; workers and scripts keep using SessionLocal.
+# Handlers and services that still write through SessionLocal run those calls
+# with asyncio.to_thread (or are plain def handlers) so they never block the event loop.
+async_engine = _create_async_engine()
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -14,3 +46,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
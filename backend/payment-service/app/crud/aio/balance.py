@@ -0,0 +1,14 @@
+# app/crud/aio/balance.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from app.models.standalone_models import CreatorBalance, CampaignBalance
+
+async def get_creator_balance(db: AsyncSession, creator_id: UUID) -> Optional[CreatorBalance]:
+    """Get the running balance for a creator"""
+    return await db.get(CreatorBalance, str(creator_id))
+
+async def get_campaign_balance(db: AsyncSession, campaign_id: UUID) -> Optional[CampaignBalance]:
+    """Get the running balance for a campaign"""
+    return await db.get(CampaignBalance, str(campaign_id))
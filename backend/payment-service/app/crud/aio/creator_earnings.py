@@ -0,0 +1,62 @@
+# app/crud/aio/creator_earnings.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from uuid import UUID
+
+from app.models.standalone_models import CreatorEarnings
+
+async def get(db: AsyncSession, earning_id: UUID) -> Optional[CreatorEarnings]:
+    """Get earnings by ID"""
+    return await db.get(CreatorEarnings, earning_id)
+
+async def get_by_application_id(db: AsyncSession, application_id: UUID) -> Optional[CreatorEarnings]:
+    """Get earnings by application ID"""
+    return await db.scalar(
+        select(CreatorEarnings).where(
+            CreatorEarnings.application_id == str(application_id)
+        ).limit(1)
+    )
+
+async def get_by_creator_id(db: AsyncSession, creator_id: UUID) -> List[CreatorEarnings]:
+    """Get all earnings for a creator"""
+    result = await db.scalars(
+        select(CreatorEarnings).where(CreatorEarnings.creator_id == str(creator_id))
+    )
+    return list(result)
+
+async def get_by_campaign_id(db: AsyncSession, campaign_id: UUID) -> List[CreatorEarnings]:
+    """Get all earnings for a campaign"""
+    result = await db.scalars(
+        select(CreatorEarnings).where(CreatorEarnings.campaign_id == str(campaign_id))
+    )
+    return list(result)
+
+async def get_by_creator_and_campaign(
+    db: AsyncSession, creator_id: UUID, campaign_id: UUID
+) -> Optional[CreatorEarnings]:
+    """Get earnings for a specific creator in a specific campaign"""
+    return await db.scalar(
+        select(CreatorEarnings).where(
+            CreatorEarnings.creator_id == str(creator_id),
+            CreatorEarnings.campaign_id == str(campaign_id)
+        ).limit(1)
+    )
+
+async def get_multi_filtered(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    creator_id: Optional[UUID] = None,
+    campaign_id: Optional[UUID] = None
+) -> List[CreatorEarnings]:
+    """Get earnings with filtering"""
+    query = select(CreatorEarnings)
+    
+    if creator_id:
+        query = query.where(CreatorEarnings.creator_id == str(creator_id))
+    if campaign_id:
+        query = query.where(CreatorEarnings.campaign_id == str(campaign_id))
+    
+    result = await db.scalars(query.offset(skip).limit(limit))
+    return list(result)
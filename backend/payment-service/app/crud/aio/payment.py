@@ -0,0 +1,86 @@
+# app/crud/aio/payment.py
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from app.models.standalone_models import Payment
+from app.schemas.payment import PaymentUpdate
+
+async def get(db: AsyncSession, payment_id: UUID) -> Optional[Payment]:
+    """Get payment by ID"""
+    return await db.get(Payment, payment_id)
+
+async def get_by_creator_id(
+    db: AsyncSession, creator_id: UUID, skip: int = 0, limit: int = 100
+) -> List[Payment]:
+    """Get all payments for a creator"""
+    result = await db.scalars(
+        select(Payment).where(
+            Payment.creator_id == str(creator_id)
+        ).offset(skip).limit(limit)
+    )
+    return list(result)
+
+async def get_by_campaign_id(db: AsyncSession, campaign_id: UUID) -> List[Payment]:
+    """Get all payments for a campaign"""
+    result = await db.scalars(
+        select(Payment).where(Payment.campaign_id == str(campaign_id))
+    )
+    return list(result)
+
+async def get_multi_filtered(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    creator_id: Optional[UUID] = None,
+    campaign_id: Optional[UUID] = None,
+    status: Optional[str] = None
+) -> Tuple[List[Payment], int]:
+    """Get payments with filtering and total count"""
+    query = select(Payment)
+    
+    if creator_id:
+        query = query.where(Payment.creator_id == str(creator_id))
+    if campaign_id:
+        query = query.where(Payment.campaign_id == str(campaign_id))
+    if status:
+        query = query.where(Payment.status == status)
+    
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    payments = await db.scalars(query.offset(skip).limit(limit))
+    
+    return list(payments), total
+
+async def get_many(db: AsyncSession, payment_ids: List[UUID]) -> List[Payment]:
+    """Get several payments in one query"""
+    if not payment_ids:
+        return []
+    result = await db.scalars(select(Payment).where(Payment.id.in_(payment_ids)))
+    return list(result)
+
+async def get_by_batch_id(db: AsyncSession, batch_id: UUID) -> List[Payment]:
+    """Get all payments created by a bulk request"""
+    result = await db.scalars(
+        select(Payment).where(
+            Payment.batch_id == batch_id
+        ).order_by(Payment.initiated_at)
+    )
+    return list(result)
+
+async def update(
+    db: AsyncSession, payment_id: UUID, payment_update: PaymentUpdate
+) -> Optional[Payment]:
+    """Update payment"""
+    db_payment = await get(db, payment_id)
+    if not db_payment:
+        return None
+    
+    update_data = payment_update.model_dump(exclude_unset=True)
+    for key, value in update_data.items():
+        setattr(db_payment, key, value)
+    
+    db.add(db_payment)
+    await db.commit()
+    await db.refresh(db_payment)
+    return db_payment
@@ -0,0 +1,10 @@
+# app/crud/aio/payment_batch.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from app.models.standalone_models import PaymentBatch
+
+async def get(db: AsyncSession, batch_id: UUID) -> Optional[PaymentBatch]:
+    """Get payment batch by ID"""
+    return await db.get(PaymentBatch, batch_id)
@@ -0,0 +1,55 @@
+# app/crud/aio/referral.py
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.models.standalone_models import Referral
+
+async def get(db: AsyncSession, referral_id: UUID) -> Optional[Referral]:
+    """Get referral by ID"""
+    return await db.get(Referral, referral_id)
+
+async def get_by_referrer_id(db: AsyncSession, referrer_id: UUID) -> List[Referral]:
+    """Get all referrals by a specific referrer"""
+    result = await db.scalars(
+        select(Referral).where(Referral.referrer_id == str(referrer_id))
+    )
+    return list(result)
+
+async def get_multi_filtered(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    referrer_id: Optional[UUID] = None,
+    campaign_id: Optional[UUID] = None
+) -> List[Referral]:
+    """Get referrals with filtering"""
+    query = select(Referral)
+    
+    if referrer_id:
+        query = query.where(Referral.referrer_id == str(referrer_id))
+    if campaign_id:
+        query = query.where(Referral.campaign_id == str(campaign_id))
+    
+    result = await db.scalars(query.offset(skip).limit(limit))
+    return list(result)
+
+async def get_stats(db: AsyncSession, referrer_id: UUID) -> Dict[str, float]:
+    """Referral counts and bonus totals for a referrer, aggregated in one query"""
+    result = await db.execute(
+        select(
+            func.count(Referral.id),
+            func.count(Referral.first_campaign_joined_at),
+            func.coalesce(func.sum(Referral.bonus_earned), 0),
+            func.coalesce(func.sum(Referral.bonus_paid), 0)
+        ).where(Referral.referrer_id == str(referrer_id))
+    )
+
+    total_referrals, successful_referrals, bonus_earned, bonus_paid = result.one()
+    return {
+        "total_referrals": total_referrals,
+        "successful_referrals": successful_referrals,
+        "total_bonus_earned": float(bonus_earned),
+        "total_bonus_paid": float(bonus_paid)
+    }
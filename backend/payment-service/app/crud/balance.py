@@ -0,0 +1,129 @@
+# app/crud/balance.py
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from uuid import UUID
+from decimal import Decimal
+from datetime import datetime
+
+from app.models.standalone_models import CreatorBalance, CampaignBalance, CreatorEarnings
+
+# Amount columns shared by creator_earnings and the balance tables
+BALANCE_FIELDS = ("base_earnings", "gmv_commission", "bonus_earnings", "referral_earnings", "total_paid")
+
+def snapshot(earning: Optional[CreatorEarnings]) -> Dict[str, Decimal]:
+    """Amounts of an earnings row, used to compute deltas around an update"""
+    return {
+        field: Decimal(str(getattr(earning, field) or 0)) if earning else Decimal("0")
+        for field in BALANCE_FIELDS
+    }
+
+def diff(before: Dict[str, Decimal], after: Dict[str, Decimal]) -> Dict[str, Decimal]:
+    return {field: after[field] - before[field] for field in BALANCE_FIELDS}
+
+def _apply(db: Session, model, key_column: str, key: str, delta: Dict[str, Decimal], count_delta: int):
+    values = {key_column: key, "earnings_count": count_delta, "last_updated": datetime.now()}
+    values.update({field: delta.get(field, Decimal("0")) for field in BALANCE_FIELDS})
+
+    stmt = pg_insert(model).values(**values)
+    table = model.__table__
+    # Increment in the database so concurrent writers never lose an update
+    updates = {field: table.c[field] + stmt.excluded[field] for field in BALANCE_FIELDS}
+    updates["earnings_count"] = table.c.earnings_count + stmt.excluded.earnings_count
+    updates["last_updated"] = stmt.excluded.last_updated
+    db.execute(stmt.on_conflict_do_update(index_elements=[key_column], set_=updates))
+
+def apply_delta(
+    db: Session,
+    creator_id: str,
+    campaign_id: str,
+    delta: Dict[str, Decimal],
+    count_delta: int = 0
+):
+    """Apply an earnings/payment delta to both ledgers (in the caller's transaction)"""
+    if count_delta == 0 and not any(delta.values()):
+        return
+    _apply(db, CreatorBalance, "creator_id", str(creator_id), delta, count_delta)
+    _apply(db, CampaignBalance, "campaign_id", str(campaign_id), delta, count_delta)
+
+def get_creator_balance(db: Session, creator_id: UUID) -> Optional[CreatorBalance]:
+    """Get the running balance for a creator"""
+    return db.query(CreatorBalance).filter(CreatorBalance.creator_id == str(creator_id)).first()
+
+def get_campaign_balance(db: Session, campaign_id: UUID) -> Optional[CampaignBalance]:
+    """Get the running balance for a campaign"""
+    return db.query(CampaignBalance).filter(CampaignBalance.campaign_id == str(campaign_id)).first()
+
+def _expected_totals(db: Session, group_column) -> Dict[str, Dict[str, Decimal]]:
+    rows = db.query(
+        group_column,
+        *[func.coalesce(func.sum(getattr(CreatorEarnings, field)), 0) for field in BALANCE_FIELDS],
+        func.count(CreatorEarnings.id)
+    ).group_by(group_column).all()
+    expected = {}
+    for row in rows:
+        totals = {field: Decimal(str(value)) for field, value in zip(BALANCE_FIELDS, row[1:-1])}
+        totals["earnings_count"] = row[-1]
+        expected[row[0]] = totals
+    return expected
+
+def _ensure_rows(db: Session, model, key_column: str, group_column):
+    """Insert zero balances for keys that have earnings but no balance row yet"""
+    existing = db.query(getattr(model, key_column))
+    missing = db.query(group_column).distinct().filter(group_column.notin_(existing)).all()
+    if missing:
+        zero = {field: Decimal("0") for field in BALANCE_FIELDS}
+        db.execute(
+            pg_insert(model).values([
+                {key_column: key, **zero, "earnings_count": 0, "last_updated": datetime.now()}
+                for (key,) in missing
+            ]).on_conflict_do_nothing(index_elements=[key_column])
+        )
+
+def _reconcile_table(db: Session, model, key_column: str, group_column, fix: bool) -> List[Dict]:
+    if fix:
+        _ensure_rows(db, model, key_column, group_column)
+        # Lock the balances before aggregating: a concurrent apply_delta has either
+        # committed (and is counted below) or waits for us and applies on top
+        balances = {getattr(b, key_column): b for b in db.query(model).with_for_update().all()}
+    else:
+        balances = {getattr(b, key_column): b for b in db.query(model).all()}
+    expected = _expected_totals(db, group_column)
+    mismatches = []
+
+    for key, balance in balances.items():
+        want = expected.get(key) or {**{f: Decimal("0") for f in BALANCE_FIELDS}, "earnings_count": 0}
+        have = {**snapshot(balance), "earnings_count": balance.earnings_count}
+        if have == want:
+            continue
+
+        mismatches.append({key_column: key, "expected": want, "actual": have})
+        if fix:
+            for field, value in want.items():
+                setattr(balance, field, value)
+
+    if not fix:
+        # Without a balance row at all, the ledger is missing these keys entirely
+        zero = {**{f: Decimal("0") for f in BALANCE_FIELDS}, "earnings_count": 0}
+        mismatches.extend(
+            {key_column: key, "expected": want, "actual": zero}
+            for key, want in expected.items() if key not in balances
+        )
+
+    return mismatches
+
+def reconcile(db: Session, fix: bool = True) -> Dict[str, List[Dict]]:
+    """
+    Verify both ledgers against the creator_earnings detail rows.
+    With fix=True, drifted balances are overwritten with the recomputed totals
+    (and missing ones created) while the balance rows are locked; this is also
+    the backfill for data that predates the ledgers.
+    """
+    result = {
+        "creators": _reconcile_table(db, CreatorBalance, "creator_id", CreatorEarnings.creator_id, fix),
+        "campaigns": _reconcile_table(db, CampaignBalance, "campaign_id", CreatorEarnings.campaign_id, fix),
+    }
+    if fix:
+        db.commit()
+    return result
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from typing import List, Optional, Tuple
 from uuid import UUID
 
+from app.crud import balance as crud_balance
 from app.models.standalone_models import CreatorEarnings
 from app.schemas.creator_earnings import CreatorEarningsCreate, CreatorEarningsUpdate
 
@@ -66,6 +67,11 @@ def create(db: Session, earnings: CreatorEarningsCreate) -> CreatorEarnings:
     
     db_earnings = CreatorEarnings(**earnings_dict)
     db.add(db_earnings)
+    db.flush()
+    crud_balance.apply_delta(
+        db, db_earnings.creator_id, db_earnings.campaign_id,
+        crud_balance.snapshot(db_earnings), count_delta=1
+    )
     db.commit()
     db.refresh(db_earnings)
     return db_earnings
@@ -78,11 +84,16 @@ def update(
     if not db_earnings:
         return None
     
+    before = crud_balance.snapshot(db_earnings)
     update_data = earnings_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_earnings, key, value)
     
     db.add(db_earnings)
+    crud_balance.apply_delta(
+        db, db_earnings.creator_id, db_earnings.campaign_id,
+        crud_balance.diff(before, crud_balance.snapshot(db_earnings))
+    )
     db.commit()
     db.refresh(db_earnings)
     return db_earnings
@@ -93,6 +104,10 @@ def remove(db: Session, earning_id: UUID) -> bool:
     if not db_earnings:
         return False
     
+    removed = {field: -amount for field, amount in crud_balance.snapshot(db_earnings).items()}
+    crud_balance.apply_delta(
+        db, db_earnings.creator_id, db_earnings.campaign_id, removed, count_delta=-1
+    )
     db.delete(db_earnings)
     db.commit()
     return True
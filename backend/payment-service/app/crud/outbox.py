@@ -0,0 +1,102 @@
+# app/crud/outbox.py
+from sqlalchemy import func, or_, update as sa_update
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+from uuid import UUID
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.standalone_models import OutboxEvent
+
+# Event types
+CAMPAIGN_SPENT_INCREASED = "campaign.spent_amount_increased"
+
+# Delivery retries: exponential backoff from BACKOFF_SECONDS, capped, then dead-lettered
+MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 10)
+BACKOFF_SECONDS = getattr(settings, "OUTBOX_BACKOFF_SECONDS", 30)
+MAX_BACKOFF_SECONDS = getattr(settings, "OUTBOX_MAX_BACKOFF_SECONDS", 3600)
+CLAIM_LEASE_SECONDS = getattr(settings, "OUTBOX_CLAIM_LEASE_SECONDS", 300)
+
+def add(db: Session, event_type: str, aggregate_id: str, payload: Dict[str, Any]) -> OutboxEvent:
+    """Stage an outbox event in the caller's transaction (does not commit)"""
+    event = OutboxEvent(
+        event_type=event_type,
+        aggregate_id=str(aggregate_id),
+        payload=payload
+    )
+    db.add(event)
+    return event
+
+def claim_pending(db: Session, limit: int = 100, max_attempts: int = MAX_ATTEMPTS) -> List[OutboxEvent]:
+    """
+    Lock a batch of due, undelivered events, oldest first, and lease them.
+
+    SKIP LOCKED lets several relay workers claim disjoint batches. Claimed
+    events get next_attempt_at pushed out by the lease, so the caller can
+    commit (releasing the row locks) before delivering; if it dies midway,
+    the events become due again once the lease runs out.
+    """
+    now = datetime.now()
+    events = db.query(OutboxEvent).filter(
+        OutboxEvent.processed_at.is_(None),
+        OutboxEvent.attempts < max_attempts,
+        or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= now)
+    ).order_by(OutboxEvent.created_at).limit(limit).with_for_update(skip_locked=True).all()
+
+    lease_until = now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+    for event in events:
+        event.next_attempt_at = lease_until
+    return events
+
+def mark_processed(db: Session, event_ids: List[UUID]):
+    """Mark events as delivered (does not commit)"""
+    if event_ids:
+        db.execute(
+            sa_update(OutboxEvent)
+            .where(OutboxEvent.id.in_(event_ids))
+            .values(processed_at=datetime.now())
+        )
+
+def mark_failed(
+    db: Session, event_ids: List[UUID], error: str, max_attempts: int = MAX_ATTEMPTS
+) -> List[UUID]:
+    """
+    Record a failed delivery attempt and schedule the next one with exponential
+    backoff (does not commit). Returns the IDs of events that have now used up
+    max_attempts and will not be retried.
+    """
+    if not event_ids:
+        return []
+    delay = func.least(BACKOFF_SECONDS * func.power(2, OutboxEvent.attempts), MAX_BACKOFF_SECONDS)
+    rows = db.execute(
+        sa_update(OutboxEvent)
+        .where(OutboxEvent.id.in_(event_ids))
+        .values(
+            attempts=OutboxEvent.attempts + 1,
+            last_error=error,
+            next_attempt_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay)
+        )
+        .returning(OutboxEvent.id, OutboxEvent.attempts)
+    ).all()
+    return [event_id for event_id, attempts in rows if attempts >= max_attempts]
+
+def get_dead_lettered(db: Session, limit: int = 100, max_attempts: int = MAX_ATTEMPTS) -> List[OutboxEvent]:
+    """Undelivered events that exhausted their attempts, newest first"""
+    return db.query(OutboxEvent).filter(
+        OutboxEvent.processed_at.is_(None),
+        OutboxEvent.attempts >= max_attempts
+    ).order_by(OutboxEvent.created_at.desc()).limit(limit).all()
+
+def count_dead_lettered(db: Session, max_attempts: int = MAX_ATTEMPTS) -> int:
+    """Number of undelivered events that will not be retried"""
+    return db.query(OutboxEvent).filter(
+        OutboxEvent.processed_at.is_(None),
+        OutboxEvent.attempts >= max_attempts
+    ).count()
+
+def count_pending(db: Session) -> int:
+    """Number of events still waiting for delivery (excluding dead-lettered ones)"""
+    return db.query(OutboxEvent).filter(
+        OutboxEvent.processed_at.is_(None),
+        OutboxEvent.attempts < MAX_ATTEMPTS
+    ).count()
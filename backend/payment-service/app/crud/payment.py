@@ -113,13 +113,19 @@
 
 # Update app/crud/payment.py to work with string IDs
 # app/crud/payment.py
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from typing import List, Optional, Tuple
 from uuid import UUID
 
-from app.models.standalone_models import Payment
+from app.models.standalone_models import Payment, CreatorEarnings
 from app.models.payment_enums import PaymentStatus
 from app.schemas.payment import PaymentCreate, PaymentUpdate
+from app.crud import outbox as crud_outbox
+from app.crud import balance as crud_balance
 
 def get(db: Session, payment_id: UUID) -> Optional[Payment]:
     """Get payment by ID"""
@@ -190,6 +196,42 @@ def create(db: Session, payment: PaymentCreate) -> Payment:
     db.refresh(db_payment)
     return db_payment
 
+def create_bulk(
+    db: Session, payments: List[PaymentCreate], batch_id: Optional[UUID] = None
+) -> List[UUID]:
+    """Create many payments with a single multi-row INSERT, returning their IDs in input order"""
+    if not payments:
+        return []
+
+    rows = []
+    for payment in payments:
+        payment_dict = payment.model_dump()
+        payment_dict['creator_id'] = str(payment_dict['creator_id'])
+        if payment_dict.get('campaign_id'):
+            payment_dict['campaign_id'] = str(payment_dict['campaign_id'])
+        # IDs are assigned up front so the result order never depends on RETURNING order
+        payment_dict['id'] = uuid.uuid4()
+        payment_dict['status'] = PaymentStatus.pending
+        payment_dict['batch_id'] = batch_id
+        rows.append(payment_dict)
+
+    result = db.execute(insert(Payment).values(rows).returning(Payment.id))
+    inserted = {row[0] for row in result}
+    db.commit()
+    return [row['id'] for row in rows if row['id'] in inserted]
+
+def get_many(db: Session, payment_ids: List[UUID]) -> List[Payment]:
+    """Get several payments in one query"""
+    if not payment_ids:
+        return []
+    return db.query(Payment).filter(Payment.id.in_(payment_ids)).all()
+
+def get_by_batch_id(db: Session, batch_id: UUID) -> List[Payment]:
+    """Get all payments created by a bulk request"""
+    return db.query(Payment).filter(
+        Payment.batch_id == batch_id
+    ).order_by(Payment.initiated_at).all()
+
 def update(
     db: Session, payment_id: UUID, payment_update: PaymentUpdate
 ) -> Optional[Payment]:
@@ -206,3 +248,43 @@ def update(
     db.commit()
     db.refresh(db_payment)
     return db_payment
+
+def mark_completed(db: Session, payment: Payment) -> bool:
+    """
+    Complete a payment and record its side effects in one transaction:
+    the status change, the linked earnings' total_paid and balances, and an
+    outbox event for the campaign spent amount. Returns False if it was already completed.
+    """
+    # Re-read the status under a row lock so concurrent completions (e.g. a
+    # webhook racing the payout task) cannot both pass the check
+    payment = db.query(Payment).filter(
+        Payment.id == payment.id
+    ).with_for_update().populate_existing().one()
+    if payment.status == PaymentStatus.completed:
+        db.commit()  # release the lock
+        return False
+
+    payment.status = PaymentStatus.completed
+    payment.completed_at = datetime.now()
+
+    if payment.earning_id:
+        earning = db.query(CreatorEarnings).filter(
+            CreatorEarnings.id == payment.earning_id
+        ).with_for_update().first()
+        if earning:
+            earning.total_paid = (earning.total_paid or 0) + payment.amount
+            crud_balance.apply_delta(
+                db, earning.creator_id, earning.campaign_id,
+                {"total_paid": Decimal(str(payment.amount))}
+            )
+
+    if payment.campaign_id:
+        crud_outbox.add(
+            db, crud_outbox.CAMPAIGN_SPENT_INCREASED, payment.campaign_id,
+            {"payment_id": str(payment.id), "amount": str(payment.amount)}
+        )
+
+    db.add(payment)
+    db.commit()
+    db.refresh(payment)
+    return True
@@ -0,0 +1,27 @@
+# app/crud/payment_batch.py
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+
+from app.models.standalone_models import PaymentBatch
+from app.schemas.payment import BulkPaymentCreate
+
+def get(db: Session, batch_id: UUID) -> Optional[PaymentBatch]:
+    """Get payment batch by ID"""
+    return db.query(PaymentBatch).filter(PaymentBatch.id == batch_id).first()
+
+def create(
+    db: Session, bulk_data: BulkPaymentCreate, created_by: Optional[str] = None
+) -> PaymentBatch:
+    """Create a payment batch record (committed together with its payments)"""
+    db_batch = PaymentBatch(
+        created_by=created_by,
+        payment_type=bulk_data.payment_type,
+        payment_method=bulk_data.payment_method,
+        amount_per_creator=bulk_data.amount_per_creator,
+        total_count=len(bulk_data.creator_ids),
+        description=bulk_data.description
+    )
+    db.add(db_batch)
+    db.flush()
+    return db_batch
@@ -1,10 +1,12 @@
 
 # app/crud/referral.py
+from sqlalchemy import func, select, update as sa_update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
+from decimal import Decimal
 
-from app.models.referral import Referral
+from app.models.standalone_models import Referral, CreatorBalance
 from app.schemas.referral import ReferralCreate, ReferralUpdate
 
 def get(db: Session, referral_id: UUID) -> Optional[Referral]:
@@ -13,11 +15,11 @@ def get(db: Session, referral_id: UUID) -> Optional[Referral]:
 
 def get_by_referrer_id(db: Session, referrer_id: UUID) -> List[Referral]:
     """Get all referrals by a specific referrer"""
-    return db.query(Referral).filter(Referral.referrer_id == referrer_id).all()
+    return db.query(Referral).filter(Referral.referrer_id == str(referrer_id)).all()
 
 def get_by_referred_id(db: Session, referred_id: UUID) -> List[Referral]:
     """Get all referrals for a specific referred user"""
-    return db.query(Referral).filter(Referral.referred_id == referred_id).all()
+    return db.query(Referral).filter(Referral.referred_id == str(referred_id)).all()
 
 def get_by_referral_code(db: Session, referral_code: str) -> Optional[Referral]:
     """Get referral by referral code"""
@@ -28,8 +30,8 @@ def get_by_referrer_and_campaign(
 ) -> List[Referral]:
     """Get referrals by referrer for a specific campaign"""
     return db.query(Referral).filter(
-        Referral.referrer_id == referrer_id,
-        Referral.campaign_id == campaign_id
+        Referral.referrer_id == str(referrer_id),
+        Referral.campaign_id == str(campaign_id)
     ).all()
 
 def get_multi_filtered(
@@ -43,9 +45,9 @@ def get_multi_filtered(
     query = db.query(Referral)
     
     if referrer_id:
-        query = query.filter(Referral.referrer_id == referrer_id)
+        query = query.filter(Referral.referrer_id == str(referrer_id))
     if campaign_id:
-        query = query.filter(Referral.campaign_id == campaign_id)
+        query = query.filter(Referral.campaign_id == str(campaign_id))
     
     return query.offset(skip).limit(limit).all()
 
@@ -55,9 +57,96 @@ def get_pending_bonuses(db: Session) -> List[Referral]:
         Referral.bonus_earned > Referral.bonus_paid
     ).all()
 
+def get_stats(db: Session, referrer_id: UUID) -> Dict[str, float]:
+    """Referral counts and bonus totals for a referrer, aggregated in one query"""
+    row = db.query(
+        func.count(Referral.id),
+        func.count(Referral.first_campaign_joined_at),
+        func.coalesce(func.sum(Referral.bonus_earned), 0),
+        func.coalesce(func.sum(Referral.bonus_paid), 0)
+    ).filter(Referral.referrer_id == str(referrer_id)).one()
+
+    total_referrals, successful_referrals, bonus_earned, bonus_paid = row
+    return {
+        "total_referrals": total_referrals,
+        "successful_referrals": successful_referrals,
+        "total_bonus_earned": float(bonus_earned),
+        "total_bonus_paid": float(bonus_paid)
+    }
+
+def assign_performance_bonuses(
+    db: Session, bonus_rate: Decimal, referral_id: Optional[UUID] = None
+) -> Dict[UUID, float]:
+    """
+    Credit performance bonuses for referred users' new earnings (all
+    referrals, or just one).
+
+    Bonuses are computed in one query joining referrals to creator_balances
+    and applied with one bulk UPDATE. Only earnings above bonus_earnings_basis
+    are credited, so repeated runs never pay the same earnings twice.
+    Returns the bonus added per referral. Does not commit.
+    """
+    referred_total = (
+        CreatorBalance.base_earnings + CreatorBalance.gmv_commission +
+        CreatorBalance.bonus_earnings + CreatorBalance.referral_earnings
+    )
+    query = db.query(
+        Referral.id, Referral.bonus_earned, Referral.bonus_earnings_basis, referred_total
+    ).join(
+        CreatorBalance, CreatorBalance.creator_id == Referral.referred_id
+    ).filter(
+        Referral.referred_id != Referral.referrer_id,  # placeholder rows used for code generation
+        referred_total > Referral.bonus_earnings_basis
+    )
+    if referral_id:
+        query = query.filter(Referral.id == referral_id)
+
+    rows = query.with_for_update(of=Referral).all()
+
+    bonuses = {}
+    updates = []
+    for ref_id, bonus_earned, basis, total in rows:
+        bonus = ((Decimal(total) - Decimal(basis)) * bonus_rate).quantize(Decimal("0.01"))
+        bonuses[ref_id] = float(bonus)
+        updates.append({
+            "id": ref_id,
+            "bonus_earned": Decimal(bonus_earned or 0) + bonus,
+            "bonus_earnings_basis": total
+        })
+
+    if updates:
+        # Bulk UPDATE by primary key (executemany)
+        db.execute(sa_update(Referral), updates)
+    return bonuses
+
+def backfill_bonus_basis(db: Session) -> int:
+    """
+    Set bonus_earnings_basis to the referred user's current total earnings
+    for referrals that were credited before the basis existed, so the bonus
+    task does not pay their earnings again. Referrals with a basis already
+    set are left alone. Returns the number of rows updated. Does not commit.
+    """
+    referred_total = select(
+        CreatorBalance.base_earnings + CreatorBalance.gmv_commission +
+        CreatorBalance.bonus_earnings + CreatorBalance.referral_earnings
+    ).where(CreatorBalance.creator_id == Referral.referred_id).scalar_subquery()
+
+    result = db.execute(
+        sa_update(Referral)
+        .where(Referral.bonus_earned > 0, Referral.bonus_earnings_basis == 0)
+        .values(bonus_earnings_basis=func.coalesce(referred_total, 0))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
 def create(db: Session, referral: ReferralCreate) -> Referral:
     """Create new referral"""
-    db_referral = Referral(**referral.model_dump())
+    referral_dict = referral.model_dump()
+    # Convert UUID fields to strings
+    for key in ("referrer_id", "referred_id", "campaign_id"):
+        if referral_dict.get(key):
+            referral_dict[key] = str(referral_dict[key])
+    db_referral = Referral(**referral_dict)
     db.add(db_referral)
     db.commit()
     db.refresh(db_referral)
@@ -0,0 +1,61 @@
+# app/crud/webhook_event.py
+import zlib
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.standalone_models import WebhookEvent
+
+WEBHOOK_PARTITIONS = getattr(settings, "WEBHOOK_PARTITIONS", 4)
+MAX_ATTEMPTS = getattr(settings, "WEBHOOK_MAX_ATTEMPTS", 5)
+
+def partition_for(ordering_key: Optional[str]) -> int:
+    """Stable partition for an ordering key, so one consumer sees all events of a payment"""
+    if not ordering_key:
+        return 0
+    return zlib.crc32(ordering_key.encode("utf-8")) % WEBHOOK_PARTITIONS
+
+def ingest(
+    db: Session,
+    provider: str,
+    provider_event_id: str,
+    event_type: Optional[str],
+    payload: Dict[str, Any],
+    ordering_key: Optional[str] = None
+) -> bool:
+    """Store a raw webhook event; returns False if it was already received"""
+    stmt = pg_insert(WebhookEvent).values(
+        provider=provider,
+        provider_event_id=provider_event_id,
+        event_type=event_type,
+        payload=payload,
+        ordering_key=ordering_key,
+        partition=partition_for(ordering_key),
+        status="pending",
+        attempts=0
+    ).on_conflict_do_nothing(
+        index_elements=["provider", "provider_event_id"]
+    ).returning(WebhookEvent.id)
+
+    inserted = db.execute(stmt).first() is not None
+    db.commit()
+    return inserted
+
+def get_pending_for_partition(db: Session, partition: int, limit: int = 100) -> List[WebhookEvent]:
+    """Get the oldest unprocessed events of one partition, in arrival order"""
+    return db.query(WebhookEvent).filter(
+        WebhookEvent.partition == partition,
+        or_(
+            WebhookEvent.status == "pending",
+            (WebhookEvent.status == "failed") & (WebhookEvent.attempts < MAX_ATTEMPTS)
+        )
+    ).order_by(WebhookEvent.received_at).limit(limit).all()
+
+def count_by_status(db: Session) -> Dict[str, int]:
+    """Event counts per processing status"""
+    rows = db.query(WebhookEvent.status, func.count(WebhookEvent.id)).group_by(
+        WebhookEvent.status
+    ).all()
+    return {status: count for status, count in rows}
@@ -1,24 +1,38 @@
 
 # app/external/campaign_service_client.py
+import hashlib
 import httpx
 import logging
 from typing import Dict, Optional, List
 from uuid import UUID
 from app.core.config import settings
+from app.external.http_client import http_clients
+from app.external.lookup_cache import TTLCache, ScopedLookup
 
 logger = logging.getLogger(__name__)
 
+# Shared across all client instances in the process
+campaign_cache = TTLCache(ttl=getattr(settings, "LOOKUP_CACHE_TTL_SECONDS", 30))
+
 class CampaignServiceClient:
     def __init__(self):
         self.base_url = settings.CAMPAIGN_SERVICE_URL
+        # Memoizes lookups for the lifetime of this client (one request / bulk run)
+        self._campaigns = ScopedLookup(campaign_cache)
 
     async def get_campaign(self, campaign_id: UUID) -> Optional[Dict]:
-        """Get campaign details"""
+        """Get campaign details (cached)"""
+        return await self._campaigns.get(
+            str(campaign_id), lambda: self._fetch_campaign(campaign_id)
+        )
+
+    async def _fetch_campaign(self, campaign_id: UUID) -> Optional[Dict]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/campaigns/{campaign_id}")
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "campaign_service", "GET", f"{self.base_url}/campaigns/{campaign_id}"
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Error getting campaign {campaign_id}: {str(e)}")
             return None
@@ -26,10 +40,11 @@ class CampaignServiceClient:
     async def get_creator_application(self, application_id: UUID) -> Optional[Dict]:
         """Get creator application details"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/applications/{application_id}")
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "campaign_service", "GET", f"{self.base_url}/applications/{application_id}"
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Error getting application {application_id}: {str(e)}")
             return None
@@ -37,21 +52,21 @@ class CampaignServiceClient:
     async def get_creator_deliverables(self, application_id: UUID) -> Dict:
         """Get deliverable information for a creator application"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/applications/{application_id}/deliverables"
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Calculate completed count
-                completed_count = sum(1 for d in data if d.get("status") == "approved")
-                
-                return {
-                    "deliverables": data,
-                    "completed_count": completed_count,
-                    "total_count": len(data)
-                }
+            response = await http_clients.request(
+                "campaign_service", "GET",
+                f"{self.base_url}/applications/{application_id}/deliverables"
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            # Calculate completed count
+            completed_count = sum(1 for d in data if d.get("status") == "approved")
+            
+            return {
+                "deliverables": data,
+                "completed_count": completed_count,
+                "total_count": len(data)
+            }
         except httpx.HTTPError as e:
             logger.error(f"Error getting deliverables for application {application_id}: {str(e)}")
             return {"deliverables": [], "completed_count": 0, "total_count": 0}
@@ -59,25 +74,45 @@ class CampaignServiceClient:
     async def get_campaign_creators(self, campaign_id: UUID) -> List[Dict]:
         """Get all creators in a campaign"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/campaigns/{campaign_id}/applications"
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "campaign_service", "GET",
+                f"{self.base_url}/campaigns/{campaign_id}/applications"
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Error getting campaign creators {campaign_id}: {str(e)}")
             return []
 
-    async def update_campaign_spent_amount(self, campaign_id: UUID, amount: float):
-        """Update campaign spent amount after payment"""
+    async def update_campaign_spent_amount(
+        self, campaign_id: UUID, amount: float, event_ids: Optional[List[UUID]] = None
+    ) -> bool:
+        """
+        Update campaign spent amount after payment; returns False if the update failed.
+
+        event_ids (the outbox events being delivered) are sent in the body and,
+        hashed, as the Idempotency-Key header so campaign-service can discard a
+        redelivered increment.
+        """
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.patch(
-                    f"{self.base_url}/campaigns/{campaign_id}/spent",
-                    json={"amount": amount}
-                )
-                response.raise_for_status()
+            self._campaigns.invalidate(str(campaign_id))
+            payload = {"amount": amount}
+            headers = {}
+            if event_ids:
+                payload["event_ids"] = sorted(str(event_id) for event_id in event_ids)
+                headers["Idempotency-Key"] = hashlib.sha256(
+                    ",".join(payload["event_ids"]).encode()
+                ).hexdigest()
+            # Increments are only safe to retry when they carry an idempotency key
+            response = await http_clients.request(
+                "campaign_service", "PATCH",
+                f"{self.base_url}/campaigns/{campaign_id}/spent",
+                idempotent=bool(event_ids),
+                json=payload,
+                headers=headers
+            )
+            response.raise_for_status()
+            return True
         except httpx.HTTPError as e:
             logger.error(f"Error updating campaign spent amount: {str(e)}")
-
+            return False
@@ -6,6 +6,7 @@ import logging
 from typing import Dict, Optional, Any
 from uuid import UUID
 from app.core.config import settings
+from app.external.http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -50,15 +51,13 @@ class FanbasisClient:
                     "currency": "USD"
                 }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/payouts",
-                    json=payload,
-                    headers=headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "fanbasis", "POST", f"{self.base_url}/payouts",
+                json=payload,
+                headers=headers
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except httpx.HTTPError as e:
             logger.error(f"Fanbasis API error: {str(e)}")
@@ -82,14 +81,12 @@ class FanbasisClient:
                     "currency": "USD"
                 }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/payouts/{transaction_id}",
-                    headers=headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "fanbasis", "GET", f"{self.base_url}/payouts/{transaction_id}",
+                headers=headers
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except httpx.HTTPError as e:
             logger.error(f"Error getting payout status: {str(e)}")
@@ -112,14 +109,12 @@ class FanbasisClient:
                     "message": "Payout cancelled successfully"
                 }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/payouts/{transaction_id}/cancel",
-                    headers=headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "fanbasis", "POST", f"{self.base_url}/payouts/{transaction_id}/cancel",
+                headers=headers
+            )
+            response.raise_for_status()
+            return response.json()
                 
         except httpx.HTTPError as e:
             logger.error(f"Error cancelling payout: {str(e)}")
@@ -0,0 +1,220 @@
+# app/external/http_client.py
+import asyncio
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any
+
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Methods that are safe to replay after a transport error or 5xx
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+@dataclass
+class UpstreamConfig:
+    """Connection pool and timeout settings for one upstream service"""
+    name: str
+    base_url: str
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+    max_retries: int = 3
+    backoff_base: float = 0.2
+    backoff_max: float = 5.0
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class UpstreamStats:
+    """Counters exported for each upstream pool"""
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+
+
+def _upstream_setting(upstream: str, key: str, default: Any) -> Any:
+    """Read e.g. USER_SERVICE_MAX_CONNECTIONS from settings, falling back to default"""
+    return getattr(settings, f"{upstream.upper()}_{key}", default)
+
+
+def _default_upstreams() -> Dict[str, UpstreamConfig]:
+    upstreams = {
+        "user_service": settings.USER_SERVICE_URL,
+        "campaign_service": settings.CAMPAIGN_SERVICE_URL,
+        "fanbasis": getattr(settings, "FANBASIS_BASE_URL", "https://api.fanbasis.com"),
+    }
+    configs = {}
+    for name, base_url in upstreams.items():
+        configs[name] = UpstreamConfig(
+            name=name,
+            base_url=base_url,
+            max_connections=_upstream_setting(name, "MAX_CONNECTIONS", 20),
+            max_keepalive_connections=_upstream_setting(name, "MAX_KEEPALIVE_CONNECTIONS", 10),
+            keepalive_expiry=_upstream_setting(name, "KEEPALIVE_EXPIRY", 30.0),
+            connect_timeout=_upstream_setting(name, "CONNECT_TIMEOUT", 5.0),
+            read_timeout=_upstream_setting(name, "READ_TIMEOUT", 30.0 if name == "fanbasis" else 10.0),
+            max_retries=_upstream_setting(name, "MAX_RETRIES", 3),
+        )
+    return configs
+
+
+class HTTPClientRegistry:
+    """
+    Process-wide registry of long-lived httpx.AsyncClient instances, one per upstream.
+
+    Clients keep their connection pools alive between calls; they are opened on
+    application startup (or lazily on first use) and closed on shutdown.
+    Pooled connections are bound to the event loop that opened them, so the
+    clients are rebuilt when used from a new loop (e.g. each asyncio.run in
+    a Celery task).
+    """
+
+    def __init__(self, upstreams: Optional[Dict[str, UpstreamConfig]] = None):
+        self._configs = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._clients_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats: Dict[str, UpstreamStats] = {}
+
+    @property
+    def configs(self) -> Dict[str, UpstreamConfig]:
+        if self._configs is None:
+            self._configs = _default_upstreams()
+        return self._configs
+
+    def register(self, config: UpstreamConfig):
+        """Register (or replace) an upstream configuration"""
+        self.configs[config.name] = config
+
+    def _build_client(self, config: UpstreamConfig) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=config.base_url,
+            headers=config.headers,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                config.read_timeout,
+                connect=config.connect_timeout,
+                pool=config.connect_timeout,
+            ),
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Get the pooled client for an upstream, creating it on first use"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None and self._clients_loop is not loop:
+            # Clients from a previous loop cannot be used (or closed) here
+            self._clients = {}
+            self._clients_loop = loop
+
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            if name not in self.configs:
+                raise KeyError(f"Unknown upstream: {name}")
+            client = self._build_client(self.configs[name])
+            self._clients[name] = client
+            self._stats.setdefault(name, UpstreamStats())
+        return client
+
+    async def startup(self):
+        """Open a client for every configured upstream"""
+        for name in self.configs:
+            self.get(name)
+        logger.info(f"HTTP client pools started: {', '.join(self._clients)}")
+
+    async def shutdown(self):
+        """Close all pooled clients"""
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(c.aclose() for c in clients.values()), return_exceptions=True)
+        logger.info("HTTP client pools closed")
+
+    def _backoff(self, config: UpstreamConfig, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), config.backoff_max)
+        delay = min(config.backoff_base * (2 ** attempt), config.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def request(
+        self,
+        upstream: str,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request through the upstream's pool.
+
+        Idempotent requests (GET/PUT/DELETE... or idempotent=True) are retried with
+        jittered exponential backoff on transport errors and 429/502/503/504.
+        """
+        client = self.get(upstream)
+        config = self.configs[upstream]
+        stats = self._stats[upstream]
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        max_attempts = config.max_retries + 1 if idempotent else 1
+
+        for attempt in range(max_attempts):
+            response = None
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                stats.errors += 1
+                if attempt + 1 >= max_attempts:
+                    raise
+                logger.warning(f"{upstream} {method} {url} failed ({e!r}), retrying")
+            finally:
+                stats.in_flight -= 1
+
+            if response is not None:
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt + 1 >= max_attempts:
+                    return response
+                stats.errors += 1
+                logger.warning(f"{upstream} {method} {url} returned {response.status_code}, retrying")
+
+            stats.retries += 1
+            await asyncio.sleep(self._backoff(config, attempt, response))
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Pool utilization and request counters per upstream"""
+        result = {}
+        for name, config in self.configs.items():
+            stats = self._stats.get(name, UpstreamStats())
+            client = self._clients.get(name)
+            result[name] = {
+                "open": client is not None and not client.is_closed,
+                "max_connections": config.max_connections,
+                "max_keepalive_connections": config.max_keepalive_connections,
+                "in_flight": stats.in_flight,
+                "peak_in_flight": stats.peak_in_flight,
+                "utilization": round(stats.in_flight / config.max_connections, 3),
+                "requests": stats.requests,
+                "retries": stats.retries,
+                "errors": stats.errors,
+            }
+        return result
+
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,119 @@
+# app/external/lookup_cache.py
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Process-wide short-TTL cache for upstream lookups.
+
+    Concurrent misses for the same key are coalesced (single-flight): only the
+    first caller runs the loader, the others await its result. ``None`` results
+    are treated as failures and never cached.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any):
+        if value is None:
+            return
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            # Entries are kept in insertion order, so the first one is the oldest
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await loader()
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+
+class ScopedLookup:
+    """
+    Request-scoped memoization in front of a shared TTLCache.
+
+    Service clients are created per request (or per bulk run), so holding one
+    ScopedLookup per client instance guarantees each id is resolved at most once
+    for the lifetime of that operation, even if the shared entry expires midway.
+    """
+
+    def __init__(self, shared: TTLCache):
+        self.shared = shared
+        self._memo: Dict[str, Any] = {}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if key in self._memo:
+            return self._memo[key]
+        value = await self.shared.get_or_load(key, loader)
+        if value is not None:
+            self._memo[key] = value
+        return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return a cached value without loading it"""
+        if key in self._memo:
+            return self._memo[key]
+        return self.shared.get(key)
+
+    def prime(self, key: str, value: Any):
+        """Seed both layers with a value obtained some other way (e.g. a batch call)"""
+        if value is None:
+            return
+        self._memo[key] = value
+        self.shared.set(key, value)
+
+    def invalidate(self, key: str):
+        self._memo.pop(key, None)
+        self.shared.invalidate(key)
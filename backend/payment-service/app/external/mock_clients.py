@@ -482,9 +482,12 @@ class MockCampaignServiceClient:
             }
         ]
     
-    async def update_campaign_spent_amount(self, campaign_id: UUID, amount: float):
+    async def update_campaign_spent_amount(
+        self, campaign_id: UUID, amount: float, event_ids: Optional[List[UUID]] = None
+    ) -> bool:
         """Mock campaign spent amount update"""
         logger.info(f"💸 Mock Campaign: Updated spent amount for {campaign_id}: +${amount}")
+        return True
 
 # Export all mock clients
 __all__ = [
@@ -0,0 +1,244 @@
+"""
+Local stand-in for the payment providers and upstream services.
+
+Serves Stripe-, Fanbasis-, User Service- and Campaign Service-compatible
+endpoints with configurable latency, rate limits (HTTP 429) and error
+injection, so the payout pipeline can be exercised and benchmarked without
+real API keys. Point the service at it through its usual settings:
+
+    USER_SERVICE_URL=http://127.0.0.1:8765/user-service
+    CAMPAIGN_SERVICE_URL=http://127.0.0.1:8765/campaign-service
+    FANBASIS_BASE_URL=http://127.0.0.1:8765/fanbasis
+    stripe.api_base = "http://127.0.0.1:8765/stripe"
+"""
+import asyncio
+import math
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qs
+import logging
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("stripe", "fanbasis", "user_service", "campaign_service")
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z_P99 = 2.326
+
+
+@dataclass
+class ProviderProfile:
+    """Behaviour of one simulated upstream"""
+    latency_median_ms: float = 80.0
+    latency_p99_ms: float = 400.0
+    rate_limit_per_second: Optional[float] = None  # None disables throttling
+    burst: int = 20
+    retry_after_seconds: int = 1
+    error_rate: float = 0.0  # share of requests answered with 503
+    decline_rate: float = 0.0  # share of payouts accepted but failed by the provider
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """Draw a latency in seconds from a log-normal fitted to the median and p99"""
+        median = max(self.latency_median_ms, 0.0) / 1000
+        if median == 0:
+            return 0.0
+        p99 = max(self.latency_p99_ms / 1000, median)
+        sigma = math.log(p99 / median) / _Z_P99
+        return rng.lognormvariate(math.log(median), sigma)
+
+
+@dataclass
+class ProviderCounters:
+    requests: int = 0
+    throttled: int = 0
+    injected_errors: int = 0
+    declined: int = 0
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class ProviderSimulator:
+    """ASGI app simulating the external services used by the payout pipeline"""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, ProviderProfile]] = None,
+        campaign_status: str = "completed",
+        seed: Optional[int] = None
+    ):
+        self.profiles = {name: ProviderProfile() for name in PROVIDERS}
+        self.profiles.update(profiles or {})
+        self.campaign_status = campaign_status
+        self.counters = {name: ProviderCounters() for name in PROVIDERS}
+        self.rng = random.Random(seed)
+        self._buckets = {
+            name: _TokenBucket(profile.rate_limit_per_second, profile.burst)
+            for name, profile in self.profiles.items()
+            if profile.rate_limit_per_second
+        }
+        self.payouts: Dict[str, Dict] = {}
+        self.app = self._build_app()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Request, throttle and error counters per simulated upstream"""
+        return {name: asdict(counters) for name, counters in self.counters.items()}
+
+    async def _simulate(self, provider: str) -> Optional[JSONResponse]:
+        """Apply rate limit, latency and error injection; returns an error response if any"""
+        profile = self.profiles[provider]
+        counters = self.counters[provider]
+        counters.requests += 1
+
+        bucket = self._buckets.get(provider)
+        if bucket and not bucket.try_acquire():
+            counters.throttled += 1
+            return JSONResponse(
+                {"error": {"type": "rate_limit_error", "message": "Too many requests"}},
+                status_code=429,
+                headers={"Retry-After": str(profile.retry_after_seconds)}
+            )
+
+        await asyncio.sleep(profile.sample_latency(self.rng))
+
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            counters.injected_errors += 1
+            return JSONResponse(
+                {"error": {"type": "api_error", "message": "Injected upstream failure"}},
+                status_code=503
+            )
+        return None
+
+    def _declined(self, provider: str) -> bool:
+        profile = self.profiles[provider]
+        if profile.decline_rate and self.rng.random() < profile.decline_rate:
+            self.counters[provider].declined += 1
+            return True
+        return False
+
+    def _creator(self, user_id: str) -> Dict:
+        return {
+            "id": user_id,
+            "email": f"creator_{user_id[:8]}@simulator.local",
+            "username": f"creator_{user_id[:8]}",
+            "role": "creator"
+        }
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Provider Simulator")
+
+        @app.post("/stripe/v1/payment_intents")
+        async def create_payment_intent(request: Request):
+            error = await self._simulate("stripe")
+            if error:
+                return error
+            form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+            intent_id = f"pi_sim_{secrets.token_hex(12)}"
+            return {
+                "id": intent_id,
+                "object": "payment_intent",
+                "amount": int(form.get("amount", 0)),
+                "currency": form.get("currency", "usd"),
+                "status": "requires_payment_method" if self._declined("stripe") else "succeeded",
+                "client_secret": f"{intent_id}_secret_sim"
+            }
+
+        @app.post("/fanbasis/payouts")
+        async def create_payout(request: Request):
+            error = await self._simulate("fanbasis")
+            if error:
+                return error
+            body = await request.json()
+            transaction_id = f"fb_sim_{secrets.token_hex(12)}"
+            payout = {
+                "transaction_id": transaction_id,
+                "status": "failed" if self._declined("fanbasis") else "completed",
+                "amount": body.get("amount"),
+                "currency": "USD",
+                "created_at": datetime.now().isoformat()
+            }
+            self.payouts[transaction_id] = payout
+            return payout
+
+        @app.get("/fanbasis/payouts/{transaction_id}")
+        async def get_payout(transaction_id: str):
+            error = await self._simulate("fanbasis")
+            if error:
+                return error
+            payout = self.payouts.get(transaction_id)
+            if not payout:
+                return JSONResponse({"error": "not found"}, status_code=404)
+            return payout
+
+        @app.get("/user-service/users/{user_id}")
+        @app.get("/user-service/creators/{user_id}")
+        async def get_user(user_id: str):
+            error = await self._simulate("user_service")
+            return error or self._creator(user_id)
+
+        @app.post("/user-service/users/batch")
+        async def get_users_batch(request: Request):
+            error = await self._simulate("user_service")
+            if error:
+                return error
+            body = await request.json()
+            return {user_id: self._creator(user_id) for user_id in body.get("user_ids", [])}
+
+        @app.get("/campaign-service/campaigns/{campaign_id}")
+        async def get_campaign(campaign_id: str):
+            error = await self._simulate("campaign_service")
+            return error or {"id": campaign_id, "status": self.campaign_status}
+
+        @app.patch("/campaign-service/campaigns/{campaign_id}/spent")
+        async def update_spent(campaign_id: str):
+            error = await self._simulate("campaign_service")
+            return error or {"id": campaign_id, "updated": True}
+
+        return app
+
+    @contextmanager
+    def serve(self, host: str = "127.0.0.1", port: int = 8765) -> Iterator[str]:
+        """Run the simulator with uvicorn in a background thread; yields its base URL"""
+        import uvicorn
+
+        server = uvicorn.Server(uvicorn.Config(
+            self.app, host=host, port=port, log_level="warning", access_log=False
+        ))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        try:
+            while not server.started:
+                if not thread.is_alive():
+                    raise RuntimeError(f"Provider simulator failed to start on {host}:{port}")
+                time.sleep(0.05)
+            logger.info(f"Provider simulator listening on http://{host}:{port}")
+            yield f"http://{host}:{port}"
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+
+
+__all__ = ["ProviderProfile", "ProviderSimulator", "PROVIDERS"]
@@ -5,20 +5,33 @@ import logging
 from typing import Dict, Optional, List
 from uuid import UUID
 from app.core.config import settings
+from app.external.http_client import http_clients
+from app.external.lookup_cache import TTLCache, ScopedLookup
 
 logger = logging.getLogger(__name__)
 
+# Shared across all client instances in the process
+user_cache = TTLCache(ttl=getattr(settings, "LOOKUP_CACHE_TTL_SECONDS", 30))
+creator_cache = TTLCache(ttl=getattr(settings, "LOOKUP_CACHE_TTL_SECONDS", 30))
+
 class UserServiceClient:
     def __init__(self):
         self.base_url = settings.USER_SERVICE_URL
+        # Memoize lookups for the lifetime of this client (one request / bulk run)
+        self._users = ScopedLookup(user_cache)
+        self._creators = ScopedLookup(creator_cache)
 
     async def get_user(self, user_id: UUID) -> Optional[Dict]:
-        """Get user details from User Service"""
+        """Get user details from User Service (cached)"""
+        return await self._users.get(str(user_id), lambda: self._fetch_user(user_id))
+
+    async def _fetch_user(self, user_id: UUID) -> Optional[Dict]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/users/{user_id}")
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "user_service", "GET", f"{self.base_url}/users/{user_id}"
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Error getting user {user_id}: {str(e)}")
             return None
@@ -31,30 +44,52 @@ class UserServiceClient:
         return user_data.get("role") == expected_role
 
     async def get_creator_details(self, creator_id: UUID) -> Optional[Dict]:
-        """Get creator-specific details including payment info"""
+        """Get creator-specific details including payment info (cached)"""
+        return await self._creators.get(
+            str(creator_id), lambda: self._fetch_creator_details(creator_id)
+        )
+
+    async def _fetch_creator_details(self, creator_id: UUID) -> Optional[Dict]:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/creators/{creator_id}")
-                response.raise_for_status()
-                return response.json()
+            response = await http_clients.request(
+                "user_service", "GET", f"{self.base_url}/creators/{creator_id}"
+            )
+            response.raise_for_status()
+            return response.json()
         except httpx.HTTPError as e:
             logger.error(f"Error getting creator details {creator_id}: {str(e)}")
             return None
 
     async def get_users_batch(self, user_ids: List[UUID]) -> Dict[UUID, Dict]:
-        """Get multiple users in a single request"""
+        """Get multiple users in a single request, skipping ids already cached"""
+        result = {}
+        missing = []
+        for uid in dict.fromkeys(user_ids):
+            cached = self._users.peek(str(uid))
+            if cached is not None:
+                result[uid] = cached
+            else:
+                missing.append(uid)
+
+        if not missing:
+            return result
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/users/batch",
-                    json={"user_ids": [str(uid) for uid in user_ids]}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                # Convert back to UUID keys
-                return {UUID(k): v for k, v in data.items()}
+            # Batch lookup is a read, so it is safe to retry despite being a POST
+            response = await http_clients.request(
+                "user_service", "POST", f"{self.base_url}/users/batch",
+                idempotent=True,
+                json={"user_ids": [str(uid) for uid in missing]}
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            # Convert back to UUID keys and seed the per-user cache
+            for k, v in data.items():
+                self._users.prime(k, v)
+                result[UUID(k)] = v
+            return result
         except httpx.HTTPError as e:
             logger.error(f"Error getting users batch: {str(e)}")
-            return {}
+            return result
 
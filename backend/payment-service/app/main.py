@@ -2,9 +2,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.endpoints import earnings, payments, referrals, schedules, webhooks
 from app.core.config import settings
+from app.core.database import async_engine, get_db
+from app.crud import outbox as crud_outbox
 from app.core.exceptions import add_exception_handlers
 from app.core.security import get_current_user
+from app.external.http_client import http_clients
 from fastapi import Depends
+from sqlalchemy.orm import Session
 
 app = FastAPI(
     title="Launchpaid - Payment Service",
@@ -34,6 +38,15 @@ app.include_router(referrals.router, prefix=f"{API_PREFIX}/referrals", tags=["Re
 app.include_router(schedules.router, prefix=f"{API_PREFIX}/schedules", tags=["Payment Schedules"])
 app.include_router(webhooks.router, prefix=f"{API_PREFIX}/webhooks", tags=["Webhooks"])
 
+@app.on_event("startup")
+async def startup_event():
+    await http_clients.startup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await http_clients.shutdown()
+    await async_engine.dispose()
+
 @app.get("/")
 async def root():
     return {"message": "Payment Service is running!"}
@@ -42,6 +55,30 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "payment-service"}
 
+@app.get("/metrics/http-clients")
+async def http_client_metrics():
+    """Connection pool utilization for outbound service clients"""
+    return http_clients.metrics()
+
+@app.get("/metrics/outbox")
+async def outbox_metrics(db: Session = Depends(get_db)):
+    """Pending outbox events, and dead-lettered ones that need attention"""
+    return {
+        "pending": crud_outbox.count_pending(db),
+        "dead_lettered": crud_outbox.count_dead_lettered(db),
+        "recent_dead_lettered": [
+            {
+                "id": str(event.id),
+                "event_type": event.event_type,
+                "aggregate_id": event.aggregate_id,
+                "attempts": event.attempts,
+                "last_error": event.last_error,
+                "created_at": event.created_at,
+            }
+            for event in crud_outbox.get_dead_lettered(db, limit=20)
+        ],
+    }
+
 @app.get("/api/v1/test-auth")
 async def test_auth(current_user: dict = Depends(get_current_user)):
     """Test endpoint to verify authentication is working"""
@@ -2,14 +2,22 @@
 """
 Import all models for the payment service
 """
-from .standalone_models import CreatorEarnings, Payment, PaymentSchedule, Referral
+from .standalone_models import (
+    CreatorEarnings, Payment, PaymentBatch, PaymentSchedule, Referral, OutboxEvent,
+    WebhookEvent, CreatorBalance, CampaignBalance
+)
 from .payment_enums import PaymentStatus, PaymentType, PayoutMethod
 
 __all__ = [
     "CreatorEarnings",
     "Payment", 
+    "PaymentBatch",
     "PaymentSchedule",
     "Referral",
+    "OutboxEvent",
+    "WebhookEvent",
+    "CreatorBalance",
+    "CampaignBalance",
     "PaymentStatus",
     "PaymentType", 
     "PayoutMethod"
@@ -7,7 +7,9 @@ These models don't reference external tables from other services
 """
 import uuid
 import datetime
-from sqlalchemy import Column, String, Text, DateTime, Integer, Boolean, DECIMAL, Enum, text
+from sqlalchemy import (
+    Column, String, Text, DateTime, Integer, Boolean, DECIMAL, Enum, JSON, Index, UniqueConstraint, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.models.base import Base
@@ -49,7 +51,44 @@ class CreatorEarnings(Base):
     @property
     def calculated_pending_payment(self):
         """Calculate pending payment in Python"""
-        return float(self.calculated_total_earnings - self.total_paid)
+        return self.calculated_total_earnings - float(self.total_paid)
+
+
+class _BalanceMixin:
+    """Running totals maintained alongside creator_earnings rows"""
+    base_earnings = Column(DECIMAL(12,2), nullable=False, default=0)
+    gmv_commission = Column(DECIMAL(12,2), nullable=False, default=0)
+    bonus_earnings = Column(DECIMAL(12,2), nullable=False, default=0)
+    referral_earnings = Column(DECIMAL(12,2), nullable=False, default=0)
+    total_paid = Column(DECIMAL(12,2), nullable=False, default=0)
+    earnings_count = Column(Integer, nullable=False, default=0)  # number of creator_earnings rows
+    last_updated = Column(DateTime(timezone=True), default=datetime.datetime.now, onupdate=datetime.datetime.now)
+
+    @property
+    def total_earnings(self):
+        return float(self.base_earnings + self.gmv_commission + self.bonus_earnings + self.referral_earnings)
+
+    @property
+    def pending_payment(self):
+        return float(self.total_earnings - float(self.total_paid))
+
+
+class CreatorBalance(_BalanceMixin, Base):
+    __tablename__ = "creator_balances"
+
+    creator_id = Column(String(36), primary_key=True)  # UUID as string
+
+    def __repr__(self):
+        return f"<CreatorBalance(creator_id={self.creator_id}, total_earnings={self.total_earnings})>"
+
+
+class CampaignBalance(_BalanceMixin, Base):
+    __tablename__ = "campaign_balances"
+
+    campaign_id = Column(String(36), primary_key=True)  # UUID as string
+
+    def __repr__(self):
+        return f"<CampaignBalance(campaign_id={self.campaign_id}, total_earnings={self.total_earnings})>"
 
 
 class Payment(Base):
@@ -60,6 +99,7 @@ class Payment(Base):
     creator_id = Column(String(36), nullable=False)  # UUID as string
     campaign_id = Column(String(36), nullable=True)  # UUID as string
     earning_id = Column(UUID(as_uuid=True), nullable=True)  # Reference to earnings table
+    batch_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # Set for bulk-created payments
     
     # Payment details
     amount = Column(DECIMAL(10,2), nullable=False)
@@ -109,6 +149,85 @@ class Payment(Base):
             self.failure_reason = reason
 
 
+class PaymentBatch(Base):
+    __tablename__ = "payment_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_by = Column(String(36), nullable=True)  # UUID as string
+    payment_type = Column(Enum(PaymentType), nullable=False)
+    payment_method = Column(Enum(PayoutMethod), nullable=False)
+    amount_per_creator = Column(DECIMAL(10,2), nullable=False)
+    total_count = Column(Integer, nullable=False, default=0)
+    description = Column(Text)
+
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.now)
+
+    def __repr__(self):
+        return f"<PaymentBatch(id={self.id}, total_count={self.total_count})>"
+
+
+class OutboxEvent(Base):
+    """
+    Side effects to deliver to other services, written in the same transaction
+    as the state change that caused them and relayed asynchronously
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        Index("ix_outbox_events_pending", "processed_at", "created_at"),
+        Index("ix_outbox_events_due", "processed_at", "next_attempt_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    event_type = Column(String(100), nullable=False)
+    aggregate_id = Column(String(36), nullable=False)  # e.g. campaign ID as string
+    payload = Column(JSON, nullable=False, default=dict)
+
+    # Delivery tracking
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime(timezone=True))  # backoff / claim lease
+
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.now)
+    processed_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, type={self.event_type}, aggregate_id={self.aggregate_id})>"
+
+
+class WebhookEvent(Base):
+    """
+    Raw provider webhook, stored on receipt and processed asynchronously.
+    The (provider, provider_event_id) pair deduplicates provider retries.
+    """
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        UniqueConstraint("provider", "provider_event_id", name="uq_webhook_events_provider_event"),
+        Index("ix_webhook_events_pending", "status", "partition", "received_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    provider = Column(String(20), nullable=False)  # stripe / fanbasis
+    provider_event_id = Column(String(255), nullable=False)
+    event_type = Column(String(100))
+    payload = Column(JSON, nullable=False)
+
+    # Events sharing an ordering key (the provider's payment ID) are processed in order;
+    # partition = hash(ordering_key) so one consumer owns each key
+    ordering_key = Column(String(255))
+    partition = Column(Integer, nullable=False, default=0)
+
+    # Processing state
+    status = Column(String(20), nullable=False, default="pending")  # pending / processed / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+
+    received_at = Column(DateTime(timezone=True), default=datetime.datetime.now)
+    processed_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<WebhookEvent(id={self.id}, provider={self.provider}, type={self.event_type}, status={self.status})>"
+
+
 class PaymentSchedule(Base):
     __tablename__ = "payment_schedules"
 
@@ -152,6 +271,7 @@ class Referral(Base):
     # Bonus tracking
     bonus_earned = Column(DECIMAL(10,2), default=0.00)
     bonus_paid = Column(DECIMAL(10,2), default=0.00)
+    bonus_earnings_basis = Column(DECIMAL(12,2), nullable=False, default=0.00)  # Referred user's earnings already credited
 
     def __repr__(self):
         return f"<Referral(id={self.id}, referrer_id={self.referrer_id}, referred_id={self.referred_id})>"
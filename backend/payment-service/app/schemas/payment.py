@@ -62,3 +62,16 @@ class BulkPaymentCreate(BaseModel):
     def validate_amount(cls, v):
         return round(v, 2)
 
+
+class BulkPaymentItemStatus(BaseModel):
+    payment_id: UUID
+    creator_id: UUID
+    status: PaymentStatus
+    failure_reason: Optional[str] = None
+
+class BulkPaymentBatchResponse(BaseModel):
+    batch_id: UUID
+    total: int
+    status_counts: dict[str, int]
+    items: list[BulkPaymentItemStatus]
+    created_at: datetime
@@ -3,11 +3,13 @@ from sqlalchemy.orm import Session
 from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 from decimal import Decimal, ROUND_HALF_UP
+import asyncio
 import logging
 
 from app.crud import creator_earnings as crud_earnings
+from app.crud import balance as crud_balance
 from app.schemas.creator_earnings import CreatorEarningsCreate, CreatorEarningsUpdate
-from app.models.creator_earnings import CreatorEarnings
+from app.models.standalone_models import CampaignBalance, CreatorEarnings
 from app.external.campaign_service_client import CampaignServiceClient
 from app.utils.calculations import (
     calculate_gmv_commission,
@@ -18,10 +20,34 @@ from app.utils.calculations import (
 
 logger = logging.getLogger(__name__)
 
+def campaign_totals(balance: Optional[CampaignBalance]) -> Dict[str, float]:
+    """Campaign payout totals from its running balance"""
+    if not balance:
+        return {
+            "total_base_earnings": 0.0,
+            "total_gmv_commission": 0.0,
+            "total_bonus_earnings": 0.0,
+            "total_referral_earnings": 0.0,
+            "total_earnings": 0.0,
+            "total_paid": 0.0,
+            "total_pending": 0.0
+        }
+    
+    return {
+        "total_base_earnings": float(balance.base_earnings),
+        "total_gmv_commission": float(balance.gmv_commission),
+        "total_bonus_earnings": float(balance.bonus_earnings),
+        "total_referral_earnings": float(balance.referral_earnings),
+        "total_earnings": balance.total_earnings,
+        "total_paid": float(balance.total_paid),
+        "total_pending": balance.pending_payment
+    }
+
 class EarningsCalculationService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, campaign_client: Optional[CampaignServiceClient] = None):
         self.db = db
-        self.campaign_client = CampaignServiceClient()
+        # Clients memoize lookups per instance, so pass one in to share it with other services
+        self.campaign_client = campaign_client or CampaignServiceClient()
 
     async def calculate_creator_earnings(
         self, 
@@ -37,7 +63,9 @@ class EarningsCalculationService:
         """
         try:
             # Get existing earnings record or create new one
-            existing_earnings = crud_earnings.get_by_application_id(self.db, application_id)
+            existing_earnings = await asyncio.to_thread(
+                crud_earnings.get_by_application_id, self.db, application_id
+            )
             
             if existing_earnings and not force_recalculate:
                 # Update existing record
@@ -59,7 +87,9 @@ class EarningsCalculationService:
             if existing_earnings:
                 # Update existing record
                 update_data = CreatorEarningsUpdate(**earnings_breakdown)
-                return crud_earnings.update(self.db, existing_earnings.id, update_data)
+                return await asyncio.to_thread(
+                    crud_earnings.update, self.db, existing_earnings.id, update_data
+                )
             else:
                 # Create new earnings record
                 earnings_data = CreatorEarningsCreate(
@@ -68,7 +98,7 @@ class EarningsCalculationService:
                     application_id=application_id,
                     **earnings_breakdown
                 )
-                return crud_earnings.create(self.db, earnings_data)
+                return await asyncio.to_thread(crud_earnings.create, self.db, earnings_data)
 
         except Exception as e:
             logger.error(f"Error calculating earnings for creator {creator_id}: {str(e)}")
@@ -184,7 +214,7 @@ class EarningsCalculationService:
         """
         try:
             # Get all creators' GMV for this campaign
-            all_earnings = crud_earnings.get_by_campaign_id(self.db, campaign_id)
+            all_earnings = await asyncio.to_thread(crud_earnings.get_by_campaign_id, self.db, campaign_id)
             
             # Create leaderboard sorted by GMV (assuming we track GMV in earnings)
             leaderboard = []
@@ -240,34 +270,14 @@ class EarningsCalculationService:
         
         # Update the record
         update_data = CreatorEarningsUpdate(**new_breakdown)
-        crud_earnings.update(self.db, earnings.id, update_data)
+        await asyncio.to_thread(crud_earnings.update, self.db, earnings.id, update_data)
 
     async def calculate_campaign_total_payouts(self, campaign_id: UUID) -> Dict[str, float]:
         """
         Calculate total payouts for entire campaign
         """
-        all_earnings = crud_earnings.get_by_campaign_id(self.db, campaign_id)
-        
-        totals = {
-            "total_base_earnings": 0.0,
-            "total_gmv_commission": 0.0,
-            "total_bonus_earnings": 0.0,
-            "total_referral_earnings": 0.0,
-            "total_earnings": 0.0,
-            "total_paid": 0.0,
-            "total_pending": 0.0
-        }
-        
-        for earning in all_earnings:
-            totals["total_base_earnings"] += float(earning.base_earnings)
-            totals["total_gmv_commission"] += float(earning.gmv_commission)
-            totals["total_bonus_earnings"] += float(earning.bonus_earnings)
-            totals["total_referral_earnings"] += float(earning.referral_earnings)
-            totals["total_earnings"] += earning.calculated_total_earnings
-            totals["total_paid"] += float(earning.total_paid)
-            totals["total_pending"] += earning.calculated_pending_payment
-        
-        return totals
+        balance = await asyncio.to_thread(crud_balance.get_campaign_balance, self.db, campaign_id)
+        return campaign_totals(balance)
 
     async def process_deliverable_completion(
         self, 
@@ -311,8 +321,8 @@ class EarningsCalculationService:
         """
         try:
             # Find the application_id for this creator/campaign
-            earnings = crud_earnings.get_by_creator_and_campaign(
-                self.db, creator_id, campaign_id
+            earnings = await asyncio.to_thread(
+                crud_earnings.get_by_creator_and_campaign, self.db, creator_id, campaign_id
             )
             
             if not earnings:
@@ -0,0 +1,97 @@
+# app/services/outbox_relay.py
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from uuid import UUID
+from collections import defaultdict
+from decimal import Decimal
+import logging
+
+from app.crud import outbox as crud_outbox
+from app.external.campaign_service_client import CampaignServiceClient
+
+logger = logging.getLogger(__name__)
+
+class OutboxRelay:
+    """Delivers outbox events to other services in batches"""
+
+    def __init__(self, db: Session, campaign_client: Optional[CampaignServiceClient] = None):
+        self.db = db
+        self.campaign_client = campaign_client or CampaignServiceClient()
+
+    async def relay_batch(self, batch_size: int = 100) -> int:
+        """
+        Claim and deliver one batch of pending events.
+
+        Spent-amount increments are coalesced so each campaign gets a single
+        update per batch. The claim is committed first (the lease keeps other
+        relays off the events) and each campaign's outcome is committed as
+        soon as its update returns, so a later failure cannot undo an
+        increment that was already delivered. Updates carry the event IDs as
+        an idempotency key, making redelivery after a crash safe.
+        Returns the number of events delivered.
+        """
+        try:
+            events = crud_outbox.claim_pending(self.db, limit=batch_size)
+
+            spent_by_campaign: Dict[str, Decimal] = defaultdict(Decimal)
+            event_ids_by_campaign: Dict[str, List[UUID]] = defaultdict(list)
+            unknown_ids = []
+
+            for event in events:
+                if event.event_type == crud_outbox.CAMPAIGN_SPENT_INCREASED:
+                    spent_by_campaign[event.aggregate_id] += Decimal(event.payload["amount"])
+                    event_ids_by_campaign[event.aggregate_id].append(event.id)
+                else:
+                    unknown_ids.append(event.id)
+
+            if unknown_ids:
+                self._record_failure(unknown_ids, "Unknown event type")
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error claiming outbox events: {str(e)}")
+            return 0
+
+        delivered = 0
+        for campaign_id, amount in spent_by_campaign.items():
+            event_ids = event_ids_by_campaign[campaign_id]
+            try:
+                if await self.campaign_client.update_campaign_spent_amount(
+                    UUID(campaign_id), float(amount), event_ids=event_ids
+                ):
+                    crud_outbox.mark_processed(self.db, event_ids)
+                    delivered += len(event_ids)
+                else:
+                    self._record_failure(event_ids, "Campaign service spent amount update failed")
+                self.db.commit()
+            except Exception as e:
+                # The events stay leased and are retried once the lease runs out
+                self.db.rollback()
+                logger.error(f"Error relaying outbox events for campaign {campaign_id}: {str(e)}")
+
+        if events:
+            logger.info(
+                f"Relayed {delivered}/{len(events)} outbox events "
+                f"in {len(spent_by_campaign)} campaign updates"
+            )
+        return delivered
+
+    def _record_failure(self, event_ids: List[UUID], error: str):
+        """Schedule a retry with backoff; events out of attempts are dead-lettered"""
+        dead_lettered = crud_outbox.mark_failed(self.db, event_ids, error)
+        if dead_lettered:
+            logger.error(
+                f"Dead-lettered {len(dead_lettered)} outbox events after "
+                f"{crud_outbox.MAX_ATTEMPTS} attempts ({error}): "
+                f"{', '.join(str(event_id) for event_id in dead_lettered)}"
+            )
+
+    async def relay_pending(self, batch_size: int = 100, max_batches: int = 50) -> int:
+        """Drain pending events batch by batch"""
+        total = 0
+        for _ in range(max_batches):
+            delivered = await self.relay_batch(batch_size)
+            total += delivered
+            if delivered < batch_size:
+                break
+        return total
@@ -1,30 +1,77 @@
 # app/services/payment_service.py
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from uuid import UUID
+from collections import Counter, defaultdict
+import asyncio
 import logging
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.crud import payment as crud_payment, creator_earnings as crud_earnings
-from app.schemas.payment import PaymentCreate, PaymentUpdate, BulkPaymentCreate
-from app.models.standalone_models import Payment  # Updated import
+from app.crud import payment_batch as crud_batch
+from app.schemas.payment import (
+    PaymentCreate,
+    PaymentUpdate,
+    BulkPaymentCreate,
+    BulkPaymentBatchResponse,
+    BulkPaymentItemStatus
+)
+from app.models.standalone_models import Payment, PaymentBatch  # Updated import
 from app.models.payment_enums import PaymentStatus, PaymentType, PayoutMethod
 from app.external.stripe_client import StripeClient
 from app.external.fanbasis_client import FanbasisClient
 from app.external.user_service_client import UserServiceClient
 from app.external.campaign_service_client import CampaignServiceClient
 from app.core.exceptions import PaymentProcessingError, InsufficientFundsError
-from app.utils.calculations import round_currency
 
 logger = logging.getLogger(__name__)
 
+# Bulk submission limits: payments per chunk and concurrent provider calls per provider
+BULK_SUBMIT_CHUNK_SIZE = getattr(settings, "BULK_SUBMIT_CHUNK_SIZE", 50)
+PROVIDER_SUBMIT_CONCURRENCY = {
+    PayoutMethod.stripe: getattr(settings, "STRIPE_SUBMIT_CONCURRENCY", 5),
+    PayoutMethod.fanbasis: getattr(settings, "FANBASIS_SUBMIT_CONCURRENCY", 5),
+    PayoutMethod.manual: 10,
+}
+
+def build_batch_status(batch: PaymentBatch, payments: List[Payment]) -> BulkPaymentBatchResponse:
+    """Per-item status response for a bulk payment batch"""
+    status_counts = Counter(
+        payment.status.value if payment.status else PaymentStatus.pending.value
+        for payment in payments
+    )
+
+    return BulkPaymentBatchResponse(
+        batch_id=batch.id,
+        total=len(payments),
+        status_counts=dict(status_counts),
+        items=[
+            BulkPaymentItemStatus(
+                payment_id=payment.id,
+                creator_id=UUID(payment.creator_id),
+                status=payment.status,
+                failure_reason=payment.failure_reason
+            )
+            for payment in payments
+        ],
+        created_at=batch.created_at
+    )
+
 class PaymentProcessingService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        user_client: Optional[UserServiceClient] = None,
+        campaign_client: Optional[CampaignServiceClient] = None
+    ):
         self.db = db
         self.stripe_client = StripeClient()
         self.fanbasis_client = FanbasisClient()
-        self.user_client = UserServiceClient()
-        self.campaign_client = CampaignServiceClient()
+        # Clients memoize lookups per instance, so pass them in to share across a bulk run
+        self.user_client = user_client or UserServiceClient()
+        self.campaign_client = campaign_client or CampaignServiceClient()
 
     async def create_manual_payment(self, payment_data: PaymentCreate) -> Payment:
         """Create a manual payment initiated by agency/admin"""
@@ -41,7 +88,7 @@ class PaymentProcessingService:
                     raise ValueError(f"Campaign {payment_data.campaign_id} not found")
 
             # Create payment record
-            payment = crud_payment.create(self.db, payment_data)
+            payment = await asyncio.to_thread(crud_payment.create, self.db, payment_data)
             
             logger.info(f"Created manual payment {payment.id} for creator {payment_data.creator_id}")
             return payment
@@ -50,40 +97,86 @@ class PaymentProcessingService:
             logger.error(f"Error creating manual payment: {str(e)}")
             raise PaymentProcessingError(f"Failed to create payment: {str(e)}")
 
-    async def create_bulk_payments(self, bulk_data: BulkPaymentCreate) -> List[Payment]:
-        """Create multiple payments at once"""
-        payments = []
-        
+    async def create_bulk_payments(
+        self, bulk_data: BulkPaymentCreate, created_by: Optional[str] = None
+    ) -> Tuple[PaymentBatch, List[UUID]]:
+        """Create a batch of payments with one creator lookup and a single INSERT"""
         try:
             # Validate all creators exist
             creators = await self.user_client.get_users_batch(bulk_data.creator_ids)
-            
-            for creator_id in bulk_data.creator_ids:
-                if creator_id not in creators:
-                    raise ValueError(f"Creator {creator_id} not found")
-                
-                payment_data = PaymentCreate(
+            missing = [str(cid) for cid in bulk_data.creator_ids if cid not in creators]
+            if missing:
+                raise ValueError(f"Creators not found: {', '.join(missing)}")
+
+            batch = await asyncio.to_thread(crud_batch.create, self.db, bulk_data, created_by=created_by)
+            payments_data = [
+                PaymentCreate(
                     creator_id=creator_id,
                     amount=bulk_data.amount_per_creator,
                     payment_type=bulk_data.payment_type,
                     payment_method=bulk_data.payment_method,
                     description=bulk_data.description
                 )
-                
-                payment = crud_payment.create(self.db, payment_data)
-                payments.append(payment)
+                for creator_id in bulk_data.creator_ids
+            ]
+            payment_ids = await asyncio.to_thread(
+                crud_payment.create_bulk, self.db, payments_data, batch_id=batch.id
+            )
             
-            logger.info(f"Created {len(payments)} bulk payments")
-            return payments
+            logger.info(f"Created batch {batch.id} with {len(payment_ids)} payments")
+            return batch, payment_ids
 
         except Exception as e:
+            await asyncio.to_thread(self.db.rollback)
             logger.error(f"Error creating bulk payments: {str(e)}")
             raise PaymentProcessingError(f"Failed to create bulk payments: {str(e)}")
 
+    async def submit_payment_batch(self, payment_ids: List[UUID]):
+        """Submit payments to their providers, grouped per provider with bounded concurrency"""
+        payments = await asyncio.to_thread(crud_payment.get_many, self.db, payment_ids)
+
+        by_method: Dict[PayoutMethod, List[UUID]] = defaultdict(list)
+        for payment in payments:
+            by_method[payment.payment_method].append(payment.id)
+
+        await asyncio.gather(*(
+            self._submit_provider_group(method, ids) for method, ids in by_method.items()
+        ))
+
+    async def _submit_provider_group(self, method: PayoutMethod, payment_ids: List[UUID]):
+        """Submit one provider's payments in chunks, at most N in flight at a time"""
+        semaphore = asyncio.Semaphore(PROVIDER_SUBMIT_CONCURRENCY.get(method, 5))
+
+        async def submit(payment_id: UUID):
+            async with semaphore:
+                # Concurrent submissions must not share a Session: their flushes,
+                # commits and rollbacks would interleave
+                db = SessionLocal()
+                try:
+                    service = PaymentProcessingService(db, self.user_client, self.campaign_client)
+                    await service.process_payment_async(payment_id)
+                finally:
+                    db.close()
+
+        for start in range(0, len(payment_ids), BULK_SUBMIT_CHUNK_SIZE):
+            chunk = payment_ids[start:start + BULK_SUBMIT_CHUNK_SIZE]
+            await asyncio.gather(*(submit(payment_id) for payment_id in chunk))
+
+        logger.info(f"Submitted {len(payment_ids)} {method.value} payments")
+
+    def get_batch_status(self, batch_id: UUID) -> Optional[BulkPaymentBatchResponse]:
+        """Get per-item status for a bulk payment batch"""
+        batch = crud_batch.get(self.db, batch_id)
+        if not batch:
+            return None
+
+        payments = crud_payment.get_by_batch_id(self.db, batch_id)
+        return build_batch_status(batch, payments)
+
     async def process_payment_async(self, payment_id: UUID):
         """Process payment asynchronously"""
         try:
-            payment = crud_payment.get(self.db, payment_id)
+            payment = await asyncio.to_thread(crud_payment.get, self.db, payment_id)
             if not payment:
                 raise ValueError(f"Payment {payment_id} not found")
 
@@ -92,8 +185,8 @@ class PaymentProcessingService:
                 return
 
             # Update status to processing
-            crud_payment.update(
-                self.db, payment_id, 
+            await asyncio.to_thread(
+                crud_payment.update, self.db, payment_id,
                 PaymentUpdate(status=PaymentStatus.processing, processed_at=datetime.now())
             )
 
@@ -110,8 +203,8 @@ class PaymentProcessingService:
         except Exception as e:
             logger.error(f"Error processing payment {payment_id}: {str(e)}")
             # Mark payment as failed
-            crud_payment.update(
-                self.db, payment_id,
+            await asyncio.to_thread(
+                crud_payment.update, self.db, payment_id,
                 PaymentUpdate(
                     status=PaymentStatus.failed,
                     failure_reason=str(e),
@@ -139,8 +232,8 @@ class PaymentProcessingService:
             )
 
             # Update payment with Stripe details
-            crud_payment.update(
-                self.db, payment.id,
+            await asyncio.to_thread(
+                crud_payment.update, self.db, payment.id,
                 PaymentUpdate(
                     stripe_payment_intent_id=stripe_result["payment_intent_id"],
                     external_transaction_id=stripe_result["payment_intent_id"]
@@ -176,8 +269,8 @@ class PaymentProcessingService:
             )
 
             # Update payment with Fanbasis details
-            crud_payment.update(
-                self.db, payment.id,
+            await asyncio.to_thread(
+                crud_payment.update, self.db, payment.id,
                 PaymentUpdate(
                     fanbasis_transaction_id=fanbasis_result["transaction_id"],
                     external_transaction_id=fanbasis_result["transaction_id"]
@@ -200,44 +293,23 @@ class PaymentProcessingService:
     async def _complete_payment(self, payment_id: UUID):
         """Mark payment as completed and update related records"""
         try:
-            payment = crud_payment.get(self.db, payment_id)
+            payment = await asyncio.to_thread(crud_payment.get, self.db, payment_id)
             if not payment:
                 return
 
-            # Mark payment as completed
-            crud_payment.update(
-                self.db, payment_id,
-                PaymentUpdate(
-                    status=PaymentStatus.completed,
-                    completed_at=datetime.now()
-                )
-            )
-
-            # Update earnings record if linked
-            if payment.earning_id:
-                earning = crud_earnings.get(self.db, payment.earning_id)
-                if earning:
-                    new_total_paid = float(earning.total_paid) + float(payment.amount)
-                    crud_earnings.update(
-                        self.db, earning.id,
-                        {"total_paid": round_currency(new_total_paid)}
-                    )
-
-            # Update campaign spent amount
-            if payment.campaign_id:
-                await self.campaign_client.update_campaign_spent_amount(
-                    UUID(payment.campaign_id), float(payment.amount)
-                )
-
-            logger.info(f"Payment {payment_id} completed successfully")
+            # Status, earnings and the campaign spent-amount outbox event commit together;
+            # the outbox relay delivers the campaign update asynchronously
+            if await asyncio.to_thread(crud_payment.mark_completed, self.db, payment):
+                logger.info(f"Payment {payment_id} completed successfully")
 
         except Exception as e:
+            await asyncio.to_thread(self.db.rollback)
             logger.error(f"Error completing payment {payment_id}: {str(e)}")
 
     async def cancel_payment(self, payment_id: UUID) -> Dict[str, Any]:
         """Cancel a pending payment"""
         try:
-            payment = crud_payment.get(self.db, payment_id)
+            payment = await asyncio.to_thread(crud_payment.get, self.db, payment_id)
             if not payment:
                 raise ValueError(f"Payment {payment_id} not found")
 
@@ -268,8 +340,8 @@ class PaymentProcessingService:
                     logger.warning(f"Could not cancel Fanbasis payout: {str(e)}")
 
             # Update payment status
-            crud_payment.update(
-                self.db, payment_id,
+            await asyncio.to_thread(
+                crud_payment.update, self.db, payment_id,
                 PaymentUpdate(status=PaymentStatus.cancelled)
             )
 
@@ -282,7 +354,7 @@ class PaymentProcessingService:
     async def process_automatic_payout(self, earning_id: UUID) -> Optional[Payment]:
         """Process automatic payout based on earnings"""
         try:
-            earning = crud_earnings.get(self.db, earning_id)
+            earning = await asyncio.to_thread(crud_earnings.get, self.db, earning_id)
             if not earning:
                 return None
 
@@ -292,7 +364,7 @@ class PaymentProcessingService:
 
             # Check if there's a payment schedule for this campaign
             from app.services.schedule_service import PaymentScheduleService
-            schedule_service = PaymentScheduleService(self.db)
+            schedule_service = PaymentScheduleService(self.db, campaign_client=self.campaign_client)
             
             should_payout = await schedule_service.should_trigger_payout(
                 UUID(earning.campaign_id), UUID(earning.creator_id)
@@ -312,7 +384,7 @@ class PaymentProcessingService:
                 description=f"Automatic payout for campaign {earning.campaign_id}"
             )
 
-            payment = crud_payment.create(self.db, payment_data)
+            payment = await asyncio.to_thread(crud_payment.create, self.db, payment_data)
             
             # Process payment asynchronously
             await self.process_payment_async(payment.id)
@@ -3,22 +3,45 @@
 from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
 from uuid import UUID
+import asyncio
 import logging
 from datetime import datetime
+from decimal import Decimal
 
+from app.core.config import settings
 from app.crud import referral as crud_referral
 from app.schemas.referral import ReferralCreate, ReferralUpdate, ReferralStats
-from app.models.referral import Referral
+from app.models.standalone_models import Referral
 from app.external.user_service_client import UserServiceClient
 from app.external.campaign_service_client import CampaignServiceClient
 
 logger = logging.getLogger(__name__)
 
+# Share of the referred user's earnings credited to the referrer
+PERFORMANCE_BONUS_RATE = Decimal(str(getattr(settings, "REFERRAL_PERFORMANCE_BONUS_RATE", "0.05")))
+
+def build_referral_stats(creator_id: UUID, stats: Dict[str, float]) -> ReferralStats:
+    """ReferralStats from the aggregates returned by crud_referral.get_stats"""
+    return ReferralStats(
+        referrer_id=creator_id,
+        total_referrals=stats["total_referrals"],
+        successful_referrals=stats["successful_referrals"],
+        total_bonus_earned=stats["total_bonus_earned"],
+        total_bonus_paid=stats["total_bonus_paid"],
+        pending_bonus=stats["total_bonus_earned"] - stats["total_bonus_paid"]
+    )
+
 class ReferralService:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        user_client: Optional[UserServiceClient] = None,
+        campaign_client: Optional[CampaignServiceClient] = None
+    ):
         self.db = db
-        self.user_client = UserServiceClient()
-        self.campaign_client = CampaignServiceClient()
+        # Clients memoize lookups per instance, so pass them in to share them with other services
+        self.user_client = user_client or UserServiceClient()
+        self.campaign_client = campaign_client or CampaignServiceClient()
 
     async def create_referral(self, referral_data: ReferralCreate) -> Referral:
         """Create a new referral"""
@@ -33,13 +56,13 @@ class ReferralService:
                 raise ValueError(f"Referred user {referral_data.referred_id} not found")
 
             # Create referral
-            referral = crud_referral.create(self.db, referral_data)
+            referral = await asyncio.to_thread(crud_referral.create, self.db, referral_data)
             
             # Generate referral code if not provided
             if not referral.referral_code:
                 referral.generate_referral_code()
-                self.db.commit()
-                self.db.refresh(referral)
+                await asyncio.to_thread(self.db.commit)
+                await asyncio.to_thread(self.db.refresh, referral)
 
             logger.info(f"Created referral {referral.id} from {referral_data.referrer_id} to {referral_data.referred_id}")
             return referral
@@ -52,9 +75,14 @@ class ReferralService:
         """Generate a referral code for a creator"""
         try:
             # Check if referral already exists
-            existing_referrals = crud_referral.get_by_referrer_and_campaign(
-                self.db, creator_id, campaign_id
-            ) if campaign_id else crud_referral.get_by_referrer_id(self.db, creator_id)
+            if campaign_id:
+                existing_referrals = await asyncio.to_thread(
+                    crud_referral.get_by_referrer_and_campaign, self.db, creator_id, campaign_id
+                )
+            else:
+                existing_referrals = await asyncio.to_thread(
+                    crud_referral.get_by_referrer_id, self.db, creator_id
+                )
 
             # Generate new referral or return existing code
             if existing_referrals and campaign_id:
@@ -82,21 +110,21 @@ class ReferralService:
         """Process a referral when someone signs up with a referral code"""
         try:
             # Find referral by code
-            referral = crud_referral.get_by_referral_code(self.db, referral_code)
+            referral = await asyncio.to_thread(crud_referral.get_by_referral_code, self.db, referral_code)
             if not referral:
                 raise ValueError(f"Invalid referral code: {referral_code}")
 
             # Update referral with actual referred user
-            crud_referral.update(
-                self.db, referral.id,
+            await asyncio.to_thread(
+                crud_referral.update, self.db, referral.id,
                 ReferralUpdate(referred_id=referred_user_id)
             )
 
             # Calculate initial referral bonus if applicable
             bonus_amount = await self._calculate_signup_bonus(referral)
             if bonus_amount > 0:
-                crud_referral.update(
-                    self.db, referral.id,
+                await asyncio.to_thread(
+                    crud_referral.update, self.db, referral.id,
                     ReferralUpdate(bonus_earned=bonus_amount)
                 )
 
@@ -114,47 +142,47 @@ class ReferralService:
     async def calculate_and_assign_bonus(self, referral_id: UUID) -> float:
         """Calculate and assign referral bonus based on referred user's performance"""
         try:
-            referral = crud_referral.get(self.db, referral_id)
+            referral = await asyncio.to_thread(crud_referral.get, self.db, referral_id)
             if not referral:
                 raise ValueError(f"Referral {referral_id} not found")
 
-            # Calculate bonus based on referred user's earnings
-            bonus_amount = await self._calculate_performance_bonus(referral)
-            
-            if bonus_amount > 0:
-                current_bonus = float(referral.bonus_earned)
-                new_bonus = current_bonus + bonus_amount
-                
-                crud_referral.update(
-                    self.db, referral_id,
-                    ReferralUpdate(bonus_earned=new_bonus)
-                )
+            # Credit the referred user's earnings not yet counted towards a bonus
+            bonuses = await asyncio.to_thread(
+                crud_referral.assign_performance_bonuses,
+                self.db, PERFORMANCE_BONUS_RATE, referral_id=referral_id
+            )
+            await asyncio.to_thread(self.db.commit)
+            bonus_amount = bonuses.get(referral.id, 0.0)
 
             return bonus_amount
 
         except Exception as e:
+            await asyncio.to_thread(self.db.rollback)
             logger.error(f"Error calculating referral bonus: {str(e)}")
             raise
 
+    async def assign_pending_bonuses(self) -> Dict[str, float]:
+        """Credit performance bonuses for every referral with new referred earnings"""
+        try:
+            bonuses = await asyncio.to_thread(
+                crud_referral.assign_performance_bonuses, self.db, PERFORMANCE_BONUS_RATE
+            )
+            await asyncio.to_thread(self.db.commit)
+
+            total_bonus = sum(bonuses.values())
+            logger.info(f"Assigned {total_bonus:.2f} in performance bonuses to {len(bonuses)} referrals")
+            return {"referrals_updated": len(bonuses), "total_bonus": total_bonus}
+
+        except Exception as e:
+            await asyncio.to_thread(self.db.rollback)
+            logger.error(f"Error assigning referral bonuses: {str(e)}")
+            raise
+
     async def get_referral_stats(self, creator_id: UUID) -> ReferralStats:
         """Get referral statistics for a creator"""
         try:
-            referrals = crud_referral.get_by_referrer_id(self.db, creator_id)
-            
-            total_referrals = len(referrals)
-            successful_referrals = len([r for r in referrals if r.first_campaign_joined_at])
-            total_bonus_earned = sum(float(r.bonus_earned) for r in referrals)
-            total_bonus_paid = sum(float(r.bonus_paid) for r in referrals)
-            pending_bonus = total_bonus_earned - total_bonus_paid
-
-            return ReferralStats(
-                referrer_id=creator_id,
-                total_referrals=total_referrals,
-                successful_referrals=successful_referrals,
-                total_bonus_earned=total_bonus_earned,
-                total_bonus_paid=total_bonus_paid,
-                pending_bonus=pending_bonus
-            )
+            stats = await asyncio.to_thread(crud_referral.get_stats, self.db, creator_id)
+            return build_referral_stats(creator_id, stats)
 
         except Exception as e:
             logger.error(f"Error getting referral stats: {str(e)}")
@@ -165,26 +193,3 @@ class ReferralService:
         # This could be configured per campaign or globally
         # For now, return a fixed amount
         return 5.00  # $5 signup bonus
-
-    async def _calculate_performance_bonus(self, referral: Referral) -> float:
-        """Calculate bonus based on referred user's performance"""
-        try:
-            # Get referred user's earnings
-            from app.crud import creator_earnings as crud_earnings
-            referred_earnings = crud_earnings.get_by_creator_id(
-                self.db, referral.referred_id
-            )
-
-            if not referred_earnings:
-                return 0.0
-
-            # Calculate percentage of referred user's earnings
-            total_earnings = sum(e.calculated_total_earnings for e in referred_earnings)
-            bonus_rate = 0.05  # 5% of referred user's earnings
-            
-            return total_earnings * bonus_rate
-
-        except Exception as e:
-            logger.error(f"Error calculating performance bonus: {str(e)}")
-            return 0.0
-
@@ -15,9 +15,9 @@ from app.services.payment_service import PaymentProcessingService
 logger = logging.getLogger(__name__)
 
 class PaymentScheduleService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, campaign_client: Optional[CampaignServiceClient] = None):
         self.db = db
-        self.campaign_client = CampaignServiceClient()
+        self.campaign_client = campaign_client or CampaignServiceClient()
 
     async def create_schedule(self, schedule_data: PaymentScheduleCreate) -> PaymentSchedule:
         """Create a new payment schedule"""
@@ -47,7 +47,10 @@ class PaymentScheduleService:
             # Get eligible creators
             eligible_creators = await self.get_eligible_creators(schedule.campaign_id)
             
-            payment_service = PaymentProcessingService(self.db)
+            # Share one campaign client so the whole run resolves each campaign once
+            payment_service = PaymentProcessingService(
+                self.db, campaign_client=self.campaign_client
+            )
             created_payments = []
 
             for creator_data in eligible_creators:
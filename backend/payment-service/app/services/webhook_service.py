@@ -1,21 +1,21 @@
 # app/services/webhook_service.py
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from datetime import datetime  # Added missing import
 import logging
 
-from app.crud import payment as crud_payment
+from sqlalchemy import text
+
+from app.crud import payment as crud_payment, webhook_event as crud_webhook_event
 from app.schemas.webhook import WebhookProcessingResult, StripeWebhookPayload, FanbasisWebhookPayload
 from app.schemas.payment import PaymentUpdate
 from app.models.payment_enums import PaymentStatus
-from app.external.campaign_service_client import CampaignServiceClient
 
 logger = logging.getLogger(__name__)
 
 class WebhookProcessingService:
     def __init__(self, db: Session):
         self.db = db
-        self.campaign_client = CampaignServiceClient()
 
     async def process_stripe_webhook(self, event: Dict[str, Any]) -> WebhookProcessingResult:
         """Process Stripe webhook events"""
@@ -61,17 +61,8 @@ class WebhookProcessingService:
                     message=f"Payment not found for Stripe ID: {payment_intent_id}"
                 )
 
-            # Update payment status
-            crud_payment.update(
-                self.db, payment.id,
-                PaymentUpdate(
-                    status=PaymentStatus.completed,
-                    completed_at=datetime.now()
-                )
-            )
-
-            # Update earnings and campaign spent amount
-            await self._update_payment_completion(payment)
+            # Update payment status, earnings and campaign spent amount (via outbox)
+            crud_payment.mark_completed(self.db, payment)
 
             return WebhookProcessingResult(
                 success=True,
@@ -173,14 +164,7 @@ class WebhookProcessingService:
 
             # Update payment based on status
             if status == "completed":
-                crud_payment.update(
-                    self.db, payment.id,
-                    PaymentUpdate(
-                        status=PaymentStatus.completed,
-                        completed_at=datetime.now()
-                    )
-                )
-                await self._update_payment_completion(payment)
+                crud_payment.mark_completed(self.db, payment)
                 
             elif status == "failed":
                 failure_reason = webhook_data.get("failure_reason", "Unknown error")
@@ -213,27 +197,107 @@ class WebhookProcessingService:
                 error_details={"error": str(e), "webhook_data": webhook_data}
             )
 
-    async def _update_payment_completion(self, payment):
-        """Update related records when payment is completed"""
-        try:
-            from app.crud import creator_earnings as crud_earnings
-            from app.utils.calculations import round_currency
-            
-            # Update earnings record if linked
-            if payment.earning_id:
-                earning = crud_earnings.get(self.db, payment.earning_id)
-                if earning:
-                    new_total_paid = float(earning.total_paid) + float(payment.amount)
-                    crud_earnings.update(
-                        self.db, earning.id,
-                        {"total_paid": round_currency(new_total_paid)}
-                    )
 
-            # Update campaign spent amount
-            if payment.campaign_id:
-                await self.campaign_client.update_campaign_spent_amount(
-                    payment.campaign_id, float(payment.amount)
-                )
+class WebhookEventProcessor:
+    """
+    Consumer for stored webhook events.
+
+    Each partition is drained by at most one consumer at a time (Postgres
+    advisory lock), events are handled in arrival order, and a failure for a
+    payment holds back that payment's later events until it is retried.
+    """
+
+    ADVISORY_LOCK_NAMESPACE = 48_201
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _try_lock_partition(self, db: Session, partition: int) -> bool:
+        return bool(db.execute(
+            text("SELECT pg_try_advisory_lock(:ns, :partition)"),
+            {"ns": self.ADVISORY_LOCK_NAMESPACE, "partition": partition}
+        ).scalar())
+
+    def _unlock_partition(self, db: Session, partition: int):
+        db.execute(
+            text("SELECT pg_advisory_unlock(:ns, :partition)"),
+            {"ns": self.ADVISORY_LOCK_NAMESPACE, "partition": partition}
+        )
+
+    async def process_partition(self, partition: int, batch_size: int = 100) -> Dict[str, int]:
+        """Process one batch of pending events for a partition"""
+        stats = {"processed": 0, "failed": 0, "deferred": 0}
+
+        # The advisory lock belongs to the database connection, and handlers
+        # commit as they go, so the whole batch runs on one dedicated connection
+        # rather than whichever pooled connection each transaction checks out
+        with self.db.get_bind().connect() as connection:
+            db = Session(bind=connection, autoflush=False, expire_on_commit=False)
+            try:
+                if not self._try_lock_partition(db, partition):
+                    logger.debug(f"Webhook partition {partition} is busy, skipping")
+                    return stats
+                db.commit()
+
+                try:
+                    await self._process_events(db, partition, batch_size, stats)
+                finally:
+                    db.rollback()
+                    self._unlock_partition(db, partition)
+                    db.commit()
+            finally:
+                db.close()
+
+        return stats
+
+    async def _process_events(self, db: Session, partition: int, batch_size: int, stats: Dict[str, int]):
+        events = crud_webhook_event.get_pending_for_partition(db, partition, limit=batch_size)
+        webhook_service = WebhookProcessingService(db)
+        blocked_keys: Set[str] = set()
+
+        for event in events:
+            if event.ordering_key and event.ordering_key in blocked_keys:
+                stats["deferred"] += 1
+                continue
+
+            try:
+                if event.provider == "stripe":
+                    result = await webhook_service.process_stripe_webhook(event.payload)
+                else:
+                    result = await webhook_service.process_fanbasis_webhook(event.payload)
+                error = None if result.success else result.message
+            except Exception as e:
+                error = str(e)
+
+            if error is not None:
+                # Drop only this handler's uncommitted changes; earlier events are committed
+                db.rollback()
+
+            event.attempts += 1
+            if error is None:
+                event.status = "processed"
+                event.processed_at = datetime.now()
+                event.last_error = None
+                stats["processed"] += 1
+            else:
+                event.status = "failed"
+                event.last_error = error
+                stats["failed"] += 1
+                if event.ordering_key:
+                    blocked_keys.add(event.ordering_key)
+
+            # Record the outcome before the next handler runs
+            db.commit()
+
+        if events:
+            logger.info(f"Webhook partition {partition}: {stats}")
+
+    async def process_all_partitions(self, batch_size: int = 100) -> Dict[str, int]:
+        """Process one batch from every partition sequentially (for single-worker setups)"""
+        totals = {"processed": 0, "failed": 0, "deferred": 0}
+        for partition in range(crud_webhook_event.WEBHOOK_PARTITIONS):
+            stats = await self.process_partition(partition, batch_size)
+            for key, value in stats.items():
+                totals[key] += value
+        return totals
 
-        except Exception as e:
-            logger.error(f"Error updating payment completion records: {str(e)}")
\ No newline at end of file
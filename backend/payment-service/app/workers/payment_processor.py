@@ -14,7 +14,8 @@ logger = logging.getLogger(__name__)
 celery_app = Celery(
     "payment_processor",
     broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.workers.webhook_handler"]
 )
 
 celery_app.conf.update(
@@ -88,11 +89,78 @@ def calculate_earnings_task(creator_id: str, campaign_id: str, application_id: s
         logger.error(f"Error calculating earnings: {str(e)}")
         return {"success": False, "error": str(e)}
 
+@celery_app.task
+def relay_outbox_task():
+    """Celery task to deliver pending outbox events (e.g. campaign spent amounts)"""
+    import asyncio
+    from app.services.outbox_relay import OutboxRelay
+
+    db = SessionLocal()
+    try:
+        delivered = asyncio.run(OutboxRelay(db).relay_pending())
+        return {"success": True, "delivered": delivered}
+    except Exception as e:
+        logger.error(f"Error relaying outbox events: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
+
+@celery_app.task
+def reconcile_balances_task():
+    """Celery task to verify creator/campaign balances against the earnings rows"""
+    from app.crud import balance as crud_balance
+
+    db = SessionLocal()
+    try:
+        mismatches = crud_balance.reconcile(db, fix=True)
+        drifted = len(mismatches["creators"]) + len(mismatches["campaigns"])
+        if drifted:
+            logger.warning(f"Corrected {drifted} drifted balances: {mismatches}")
+        return {"success": True, "corrected": drifted}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error reconciling balances: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
+
+@celery_app.task
+def assign_referral_bonuses_task():
+    """Celery task to credit performance bonuses for all referrals in one batch"""
+    import asyncio
+    from app.services.referral_service import ReferralService
+
+    db = SessionLocal()
+    try:
+        result = asyncio.run(ReferralService(db).assign_pending_bonuses())
+        return {"success": True, **result}
+    except Exception as e:
+        logger.error(f"Error assigning referral bonuses: {str(e)}")
+        return {"success": False, "error": str(e)}
+    finally:
+        db.close()
+
 # Periodic tasks
 celery_app.conf.beat_schedule = {
     'process-scheduled-payouts': {
         'task': 'app.workers.payment_processor.process_scheduled_payouts_task',
         'schedule': 3600.0,  # Run every hour
     },
+    'relay-outbox-events': {
+        'task': 'app.workers.payment_processor.relay_outbox_task',
+        'schedule': 10.0,  # Run every 10 seconds
+    },
+    'dispatch-webhook-events': {
+        'task': 'app.workers.webhook_handler.dispatch_webhook_partitions_task',
+        'schedule': 2.0,  # Run every 2 seconds
+    },
+    'reconcile-balances': {
+        'task': 'app.workers.payment_processor.reconcile_balances_task',
+        'schedule': 86400.0,  # Run daily
+    },
+    'assign-referral-bonuses': {
+        'task': 'app.workers.payment_processor.assign_referral_bonuses_task',
+        'schedule': 3600.0,  # Run every hour
+    },
 }
 celery_app.conf.timezone = 'UTC'
\ No newline at end of file
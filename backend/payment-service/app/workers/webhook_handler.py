@@ -0,0 +1,30 @@
+# app/workers/webhook_handler.py
+import asyncio
+import logging
+
+from app.core.database import SessionLocal
+from app.crud.webhook_event import WEBHOOK_PARTITIONS
+from app.services.webhook_service import WebhookEventProcessor
+from app.workers.payment_processor import celery_app
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task
+def dispatch_webhook_partitions_task():
+    """Fan out one processing task per webhook partition"""
+    for partition in range(WEBHOOK_PARTITIONS):
+        process_webhook_partition_task.delay(partition)
+    return {"success": True, "partitions": WEBHOOK_PARTITIONS}
+
+@celery_app.task
+def process_webhook_partition_task(partition: int, batch_size: int = 100):
+    """Celery task to process stored webhook events for one partition, in order"""
+    db = SessionLocal()
+    try:
+        stats = asyncio.run(WebhookEventProcessor(db).process_partition(partition, batch_size))
+        return {"success": True, "partition": partition, **stats}
+    except Exception as e:
+        logger.error(f"Error processing webhook partition {partition}: {str(e)}")
+        return {"success": False, "partition": partition, "error": str(e)}
+    finally:
+        db.close()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Build creator_balances and campaign_balances from the existing creator_earnings
+rows. Run once after deploying the balance ledgers (safe to re-run; it is the
+same reconcile the daily task performs).
+
+    python -m scripts.backfill_balances
+"""
+from app.core.database import SessionLocal
+from app.crud import balance as crud_balance
+
+def backfill_balances():
+    db = SessionLocal()
+    try:
+        mismatches = crud_balance.reconcile(db, fix=True)
+        print(
+            f"Backfilled {len(mismatches['creators'])} creator balances and "
+            f"{len(mismatches['campaigns'])} campaign balances"
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_balances()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Set referrals.bonus_earnings_basis for referrals credited before the column
+existed. Run once after add_referral_bonus_basis.sql and before enabling the
+assign-referral-bonuses task, otherwise its first run credits those referrals
+a bonus on the referred user's lifetime earnings again (safe to re-run).
+
+    python -m scripts.backfill_referral_bonus_basis
+"""
+from app.core.database import SessionLocal
+from app.crud import referral as crud_referral
+
+def backfill_referral_bonus_basis():
+    db = SessionLocal()
+    try:
+        updated = crud_referral.backfill_bonus_basis(db)
+        db.commit()
+        print(f"Set the bonus earnings basis on {updated} referrals")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_referral_bonus_basis()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Payout throughput benchmark.
+
+Drives create_bulk_payments/submit_payment_batch or execute_schedule against
+the local provider simulator (app/external/provider_simulator.py) and reports
+payouts/sec, p50/p99 per-payout latency and retry amplification.
+
+Requires a database reachable through DATABASE_URL; rows created by the run
+are deleted afterwards unless --keep-data is given.
+
+    python -m scripts.benchmark_payouts --scenario bulk --count 500 --method fanbasis \\
+        --latency-median-ms 120 --latency-p99-ms 900 --rate-limit 50 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List
+
+BULK_MAX_CREATORS = 100  # BulkPaymentCreate.creator_ids limit
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the payout pipeline against simulated providers")
+    parser.add_argument("--scenario", choices=["bulk", "schedule"], default="bulk")
+    parser.add_argument("--count", type=int, default=200, help="number of payouts")
+    parser.add_argument("--method", choices=["fanbasis", "stripe"], default="fanbasis",
+                        help="payout method for the bulk scenario (schedules always use stripe)")
+    parser.add_argument("--amount", type=float, default=25.0)
+    parser.add_argument("--latency-median-ms", type=float, default=80.0)
+    parser.add_argument("--latency-p99-ms", type=float, default=400.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="provider requests/sec before 429s")
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of provider requests failing with 503")
+    parser.add_argument("--decline-rate", type=float, default=0.0, help="share of payouts declined by the provider")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0,
+                        help="share of user/campaign service requests failing with 503")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--keep-data", action="store_true", help="do not delete the rows created by the run")
+    return parser.parse_args()
+
+
+def point_settings_at(base_url: str):
+    """Route the service's upstream URLs to the simulator (settings are read from the environment)"""
+    os.environ["USER_SERVICE_URL"] = f"{base_url}/user-service"
+    os.environ["CAMPAIGN_SERVICE_URL"] = f"{base_url}/campaign-service"
+    os.environ["FANBASIS_BASE_URL"] = f"{base_url}/fanbasis"
+    os.environ["TESTING_MODE"] = "false"
+
+
+@contextmanager
+def timed(cls, method_name: str, samples: List[float]):
+    """Record the wall time of every call to cls.method_name"""
+    original = getattr(cls, method_name)
+
+    async def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await original(self, *args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - started)
+
+    setattr(cls, method_name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(cls, method_name, original)
+
+
+async def run_bulk(db, args) -> List[uuid.UUID]:
+    from app.models.payment_enums import PaymentType, PayoutMethod
+    from app.schemas.payment import BulkPaymentCreate
+    from app.services.payment_service import PaymentProcessingService
+
+    service = PaymentProcessingService(db)
+    creator_ids = [uuid.uuid4() for _ in range(args.count)]
+    payment_ids = []
+    for start in range(0, len(creator_ids), BULK_MAX_CREATORS):
+        _, ids = await service.create_bulk_payments(BulkPaymentCreate(
+            creator_ids=creator_ids[start:start + BULK_MAX_CREATORS],
+            amount_per_creator=args.amount,
+            payment_type=PaymentType.bonus,
+            payment_method=PayoutMethod(args.method),
+            description="Payout benchmark"
+        ), created_by="benchmark")
+        payment_ids.extend(ids)
+
+    await service.submit_payment_batch(payment_ids)
+    return payment_ids
+
+
+def setup_schedule(db, args, created: Dict[str, list]) -> uuid.UUID:
+    """Create an automated schedule and one pending earning per payout"""
+    from app.crud import creator_earnings as crud_earnings, payment_schedule as crud_schedule
+    from app.schemas.creator_earnings import CreatorEarningsCreate
+    from app.schemas.payment_schedule import PaymentScheduleCreate
+
+    campaign_id = uuid.uuid4()
+    # The simulator reports campaigns as completed, so this schedule triggers for every earning
+    schedule = crud_schedule.create(db, PaymentScheduleCreate(
+        campaign_id=campaign_id,
+        schedule_name="Payout benchmark",
+        is_automated=True,
+        trigger_on_campaign_completion=True
+    ))
+    created["schedules"].append(schedule.id)
+    created["campaigns"].append(str(campaign_id))
+
+    for _ in range(args.count):
+        earning = crud_earnings.create(db, CreatorEarningsCreate(
+            creator_id=uuid.uuid4(),
+            campaign_id=campaign_id,
+            application_id=uuid.uuid4(),
+            base_earnings=args.amount
+        ))
+        created["earnings"].append(earning.id)
+
+    return schedule.id
+
+
+async def run_schedule(db, schedule_id: uuid.UUID) -> List[uuid.UUID]:
+    from app.services.schedule_service import PaymentScheduleService
+
+    results = await PaymentScheduleService(db).execute_schedule(schedule_id)
+    return [result["payment_id"] for result in results]
+
+
+def percentile(samples: List[float], pct: int) -> float:
+    if not samples:
+        return 0.0
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def build_report(args, elapsed: float, statuses: Dict[str, int], samples: List[float],
+                 simulator_stats: Dict[str, Dict], client_metrics: Dict[str, Dict]) -> Dict:
+    upstreams = {}
+    for name, sim in simulator_stats.items():
+        if not sim["requests"]:
+            continue
+        retries = client_metrics.get(name, {}).get("retries", 0)
+        logical = max(sim["requests"] - retries, 1)
+        upstreams[name] = {
+            **sim,
+            "client_retries": retries,
+            "retry_amplification": round(sim["requests"] / logical, 3),
+        }
+
+    completed = statuses.get("completed", 0)
+    return {
+        "scenario": args.scenario,
+        "method": "stripe" if args.scenario == "schedule" else args.method,
+        "payouts": sum(statuses.values()),
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "payouts_per_second": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(samples, 50) * 1000, 1),
+            "p99": round(percentile(samples, 99) * 1000, 1),
+            "max": round(max(samples) * 1000, 1) if samples else 0.0,
+        },
+        "upstreams": upstreams,
+    }
+
+
+def print_report(report: Dict):
+    print(f"Scenario:          {report['scenario']} ({report['method']})")
+    print(f"Payouts:           {report['payouts']} {report['statuses']}")
+    print(f"Elapsed:           {report['elapsed_seconds']}s")
+    print(f"Throughput:        {report['payouts_per_second']} completed payouts/sec")
+    print(f"Latency p50/p99:   {report['latency_ms']['p50']}ms / {report['latency_ms']['p99']}ms "
+          f"(max {report['latency_ms']['max']}ms)")
+    print("Upstreams:")
+    for name, stats in report["upstreams"].items():
+        print(f"  {name:<17} requests={stats['requests']} throttled={stats['throttled']} "
+              f"errors={stats['injected_errors']} declined={stats['declined']} "
+              f"retries={stats['client_retries']} amplification={stats['retry_amplification']}x")
+
+
+def cleanup(db, payment_ids: List[uuid.UUID], created: Dict[str, list]):
+    from app.crud import creator_earnings as crud_earnings, payment_schedule as crud_schedule
+    from app.models.standalone_models import OutboxEvent, Payment, PaymentBatch
+
+    batch_ids = {p.batch_id for p in db.query(Payment).filter(Payment.id.in_(payment_ids)) if p.batch_id}
+    db.query(Payment).filter(Payment.id.in_(payment_ids)).delete(synchronize_session=False)
+    db.query(PaymentBatch).filter(PaymentBatch.id.in_(batch_ids)).delete(synchronize_session=False)
+    db.query(OutboxEvent).filter(
+        OutboxEvent.aggregate_id.in_(created["campaigns"])
+    ).delete(synchronize_session=False)
+    db.commit()
+    for schedule_id in created["schedules"]:
+        crud_schedule.remove(db, schedule_id)
+    # Earnings go through the CRUD layer so the balance ledgers are reverted too
+    for earning_id in created["earnings"]:
+        crud_earnings.remove(db, earning_id)
+
+
+def main():
+    args = parse_args()
+
+    from app.external.provider_simulator import ProviderProfile, ProviderSimulator
+
+    provider_profile = ProviderProfile(
+        latency_median_ms=args.latency_median_ms,
+        latency_p99_ms=args.latency_p99_ms,
+        rate_limit_per_second=args.rate_limit,
+        burst=args.burst,
+        error_rate=args.error_rate,
+        decline_rate=args.decline_rate,
+    )
+    upstream_profile = ProviderProfile(latency_median_ms=15, latency_p99_ms=60, error_rate=args.upstream_error_rate)
+    simulator = ProviderSimulator(
+        profiles={
+            "stripe": provider_profile,
+            "fanbasis": provider_profile,
+            "user_service": upstream_profile,
+            "campaign_service": upstream_profile,
+        },
+        seed=args.seed,
+    )
+
+    with simulator.serve(port=args.port) as base_url:
+        point_settings_at(base_url)
+
+        # Import after the environment points at the simulator
+        import stripe
+        from app.core.database import SessionLocal
+        from app.crud import payment as crud_payment
+        from app.external.http_client import http_clients
+        from app.services.payment_service import PaymentProcessingService
+
+        stripe.api_base = f"{base_url}/stripe"
+
+        db = SessionLocal()
+        samples: List[float] = []
+        created = {"earnings": [], "schedules": [], "campaigns": []}
+        payment_ids: List[uuid.UUID] = []
+        try:
+            schedule_id = setup_schedule(db, args, created) if args.scenario == "schedule" else None
+
+            async def run():
+                try:
+                    with timed(PaymentProcessingService, "process_payment_async", samples):
+                        if args.scenario == "bulk":
+                            return await run_bulk(db, args)
+                        return await run_schedule(db, schedule_id)
+                finally:
+                    await http_clients.shutdown()
+
+            started = time.perf_counter()
+            payment_ids = asyncio.run(run())
+            elapsed = time.perf_counter() - started
+
+            db.expire_all()
+            statuses: Dict[str, int] = {}
+            for payment in crud_payment.get_many(db, payment_ids):
+                statuses[payment.status.value] = statuses.get(payment.status.value, 0) + 1
+
+            report = build_report(args, elapsed, statuses, samples, simulator.stats(), http_clients.metrics())
+            if args.json:
+                print(json.dumps(report, indent=2))
+            else:
+                print_report(report)
+        finally:
+            if not args.keep_data:
+                cleanup(db, payment_ids, created)
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
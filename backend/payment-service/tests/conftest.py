@@ -1,9 +1,11 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.core.database import get_db, Base
+from app.core.database import get_db, get_async_db, Base
+from app.models.base import Base as ModelsBase
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -17,7 +19,15 @@ def override_get_db():
     finally:
         db.close()
 
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 @pytest.fixture
 def client():
@@ -35,3 +45,18 @@ def db_session():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def models_db():
+    """Session on a fresh database with the service's model tables"""
+    # The legacy schema-qualified models share this metadata; only the
+    # standalone models' tables are used by the app
+    tables = [table for table in ModelsBase.metadata.tables.values() if table.schema is None]
+    ModelsBase.metadata.create_all(bind=engine, tables=tables)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        ModelsBase.metadata.drop_all(bind=engine, tables=tables)
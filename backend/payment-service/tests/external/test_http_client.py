@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.external.http_client import HTTPClientRegistry, UpstreamConfig
+
+
+class MockRegistry(HTTPClientRegistry):
+    """Registry whose clients answer from `responses` (status codes or exceptions) in turn"""
+
+    def __init__(self, responses, **config):
+        super().__init__({"upstream": UpstreamConfig(
+            name="upstream", base_url="http://upstream", backoff_base=0, backoff_max=0, **config
+        )})
+        self.responses = list(responses)
+        self.sent = []
+        self.built = 0
+
+    def _handle(self, request):
+        self.sent.append(request.method)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return httpx.Response(response)
+
+    def _build_client(self, config):
+        self.built += 1
+        return httpx.AsyncClient(base_url=config.base_url, transport=httpx.MockTransport(self._handle))
+
+
+@pytest.mark.asyncio
+async def test_idempotent_requests_are_retried():
+    registry = MockRegistry([503, httpx.ConnectError("refused"), 200])
+
+    response = await registry.request("upstream", "GET", "/users/1")
+
+    assert response.status_code == 200
+    assert registry.sent == ["GET"] * 3
+    assert registry.metrics()["upstream"]["retries"] == 2
+    assert registry.metrics()["upstream"]["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_requests_are_sent_once():
+    registry = MockRegistry([503, 200])
+
+    response = await registry.request("upstream", "POST", "/payouts")
+
+    assert response.status_code == 503
+    assert registry.sent == ["POST"]
+
+    registry.responses = [503, 200]
+    response = await registry.request("upstream", "POST", "/payouts", idempotent=True)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_retries_stop_after_max_retries():
+    registry = MockRegistry([httpx.ConnectError("refused")] * 3, max_retries=2)
+
+    with pytest.raises(httpx.ConnectError):
+        await registry.request("upstream", "GET", "/users/1")
+    assert len(registry.sent) == 3
+
+
+def test_clients_are_pooled_per_loop():
+    registry = MockRegistry([200] * 4)
+
+    async def two_requests():
+        await registry.request("upstream", "GET", "/a")
+        await registry.request("upstream", "GET", "/b")
+        return registry.get("upstream")
+
+    first = asyncio.run(two_requests())
+    assert registry.built == 1
+
+    # A new loop (e.g. the next asyncio.run in a worker task) gets a new client
+    second = asyncio.run(two_requests())
+    assert registry.built == 2
+    assert second is not first
+
+
+def test_unknown_upstream_is_rejected():
+    with pytest.raises(KeyError):
+        MockRegistry([]).get("missing")
@@ -0,0 +1,110 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.external import campaign_service_client
+from app.external.campaign_service_client import CampaignServiceClient
+from app.external.lookup_cache import ScopedLookup, TTLCache
+from app.services.earnings_service import EarningsCalculationService
+
+
+class Loader:
+    """Counts calls; waits on `release` so concurrent callers overlap"""
+
+    def __init__(self, value="value", error=None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=30)
+    loader = Loader()
+    loader.release.clear()
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 5
+    assert loader.calls == 1
+    assert await cache.get_or_load("k", loader) == "value"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_waiter_and_are_not_cached():
+    cache = TTLCache(ttl=30)
+    loader = Loader(error=RuntimeError("down"))
+    loader.release.clear()
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(3)]
+    await asyncio.sleep(0)
+    loader.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert loader.calls == 1
+
+    missing = Loader(value=None)
+    assert await cache.get_or_load("k", missing) is None
+    assert await cache.get_or_load("k", missing) is None
+    assert missing.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.external.lookup_cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(ttl=30)
+    loader = Loader()
+
+    await cache.get_or_load("k", loader)
+    now[0] += 31
+    await cache.get_or_load("k", loader)
+
+    assert loader.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_scoped_lookup_outlives_shared_expiry():
+    shared = TTLCache(ttl=30)
+    scoped = ScopedLookup(shared)
+    loader = Loader()
+
+    await scoped.get("k", loader)
+    shared.clear()
+
+    assert await scoped.get("k", loader) == "value"
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_services_sharing_a_client_fetch_each_campaign_once(monkeypatch):
+    monkeypatch.setattr(campaign_service_client, "campaign_cache", TTLCache(ttl=30))
+    client = CampaignServiceClient()
+    fetched = []
+
+    async def fetch(campaign_id):
+        fetched.append(campaign_id)
+        return {"id": str(campaign_id)}
+
+    monkeypatch.setattr(client, "_fetch_campaign", fetch)
+    campaign_id = uuid4()
+
+    services = [EarningsCalculationService(None, campaign_client=client) for _ in range(3)]
+    for service in services:
+        assert await service.campaign_client.get_campaign(campaign_id) == {"id": str(campaign_id)}
+
+    assert fetched == [campaign_id]
@@ -0,0 +1,60 @@
+import random
+import statistics
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.external.provider_simulator import ProviderProfile, ProviderSimulator
+
+INSTANT = {"latency_median_ms": 0}
+
+
+def client_for(**profiles):
+    """Simulator without latency; `profiles` override fields per upstream"""
+    simulator = ProviderSimulator(
+        profiles={
+            name: ProviderProfile(**{**INSTANT, **profiles.get(name, {})})
+            for name in ("stripe", "fanbasis", "user_service", "campaign_service")
+        },
+        seed=1
+    )
+    return simulator, TestClient(simulator.app)
+
+
+def test_latency_matches_median_and_p99():
+    profile = ProviderProfile(latency_median_ms=100, latency_p99_ms=500)
+    rng = random.Random(7)
+    samples = sorted(profile.sample_latency(rng) for _ in range(20_000))
+
+    assert statistics.median(samples) == pytest.approx(0.100, rel=0.05)
+    assert samples[int(len(samples) * 0.99)] == pytest.approx(0.500, rel=0.1)
+
+
+def test_requests_over_the_rate_limit_are_throttled():
+    simulator, client = client_for(fanbasis={"rate_limit_per_second": 0.001, "burst": 2, "retry_after_seconds": 3})
+
+    responses = [client.post("/fanbasis/payouts", json={"amount": 10}) for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[-1].headers["Retry-After"] == "3"
+    assert simulator.stats()["fanbasis"]["throttled"] == 1
+
+
+def test_injected_errors_and_declines():
+    simulator, client = client_for(stripe={"error_rate": 1.0}, fanbasis={"decline_rate": 1.0})
+
+    assert client.post("/stripe/v1/payment_intents", data={"amount": "1000"}).status_code == 503
+
+    payout = client.post("/fanbasis/payouts", json={"amount": 10}).json()
+    assert payout["status"] == "failed"
+    assert client.get(f"/fanbasis/payouts/{payout['transaction_id']}").json() == payout
+    assert simulator.stats()["stripe"]["injected_errors"] == 1
+    assert simulator.stats()["fanbasis"]["declined"] == 1
+
+
+def test_upstream_lookups():
+    _, client = client_for()
+
+    assert client.get("/user-service/creators/abcdef123456").json()["role"] == "creator"
+    assert set(client.post("/user-service/users/batch", json={"user_ids": ["a", "b"]}).json()) == {"a", "b"}
+    assert client.get("/campaign-service/campaigns/c1").json() == {"id": "c1", "status": "completed"}
@@ -0,0 +1,67 @@
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.crud import balance as crud_balance, creator_earnings as crud_earnings
+from app.models.standalone_models import CampaignBalance, CreatorBalance, CreatorEarnings
+from app.schemas.creator_earnings import CreatorEarningsCreate, CreatorEarningsUpdate
+from app.services.earnings_service import EarningsCalculationService
+
+
+def create_earnings(db, creator_id, campaign_id, **amounts):
+    return crud_earnings.create(db, CreatorEarningsCreate(
+        creator_id=creator_id, campaign_id=campaign_id, application_id=uuid4(), **amounts
+    ))
+
+
+def test_ledgers_follow_earnings_changes(models_db):
+    creator_id, campaign_id = uuid4(), uuid4()
+    first = create_earnings(models_db, creator_id, campaign_id, base_earnings=100, gmv_commission=20)
+    create_earnings(models_db, uuid4(), campaign_id, base_earnings=50)
+
+    crud_earnings.update(models_db, first.id, CreatorEarningsUpdate(bonus_earnings=30))
+
+    creator = crud_balance.get_creator_balance(models_db, creator_id)
+    campaign = crud_balance.get_campaign_balance(models_db, campaign_id)
+    assert (creator.total_earnings, creator.earnings_count) == (150.0, 1)
+    assert (campaign.total_earnings, campaign.earnings_count) == (200.0, 2)
+
+    crud_earnings.remove(models_db, first.id)
+    models_db.refresh(campaign)
+    assert (campaign.total_earnings, campaign.earnings_count) == (50.0, 1)
+
+
+@pytest.mark.asyncio
+async def test_campaign_totals_come_from_the_ledger(models_db):
+    campaign_id = uuid4()
+    create_earnings(models_db, uuid4(), campaign_id, base_earnings=100, referral_earnings=5)
+    create_earnings(models_db, uuid4(), campaign_id, gmv_commission=40)
+
+    totals = await EarningsCalculationService(models_db).calculate_campaign_total_payouts(campaign_id)
+
+    assert totals["total_earnings"] == 145.0
+    assert totals["total_base_earnings"] == 100.0
+    assert totals["total_pending"] == 145.0
+
+
+def test_reconcile_repairs_drift_and_backfills_missing_balances(models_db):
+    creator_id, campaign_id = uuid4(), uuid4()
+    create_earnings(models_db, creator_id, campaign_id, base_earnings=100)
+    # Earnings written before the ledgers existed
+    models_db.add(CreatorEarnings(
+        creator_id=str(uuid4()), campaign_id=str(campaign_id), application_id=str(uuid4()),
+        base_earnings=Decimal("25.00")
+    ))
+    crud_balance.get_creator_balance(models_db, creator_id).base_earnings = Decimal("90.00")
+    models_db.commit()
+
+    assert {key: len(rows) for key, rows in crud_balance.reconcile(models_db, fix=False).items()} == {
+        "creators": 2, "campaigns": 1
+    }
+
+    crud_balance.reconcile(models_db, fix=True)
+
+    assert crud_balance.reconcile(models_db, fix=False) == {"creators": [], "campaigns": []}
+    assert models_db.query(CreatorBalance).count() == 2
+    assert models_db.get(CampaignBalance, str(campaign_id)).total_earnings == 125.0
@@ -0,0 +1,80 @@
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from app.crud import payment as crud_payment
+from app.models.payment_enums import PaymentStatus, PaymentType, PayoutMethod
+from app.models.standalone_models import CreatorEarnings, OutboxEvent, Payment
+from app.services.outbox_relay import OutboxRelay
+
+
+def add_payment(db, campaign_id, amount="40.00", earning_id=None):
+    payment = Payment(
+        creator_id=str(uuid4()),
+        campaign_id=campaign_id,
+        earning_id=earning_id,
+        amount=Decimal(amount),
+        payment_type=PaymentType.base_payout,
+        payment_method=PayoutMethod.stripe,
+        status=PaymentStatus.processing
+    )
+    db.add(payment)
+    db.commit()
+    return payment
+
+
+class Campaigns:
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.updates = []
+
+    async def update_campaign_spent_amount(self, campaign_id, amount, event_ids=None):
+        self.updates.append((str(campaign_id), amount, sorted(event_ids)))
+        return self.ok
+
+
+def test_completion_writes_status_and_outbox_event_together(models_db):
+    campaign_id = str(uuid4())
+    earning = CreatorEarnings(creator_id=str(uuid4()), campaign_id=campaign_id, application_id=str(uuid4()))
+    models_db.add(earning)
+    models_db.commit()
+    payment = add_payment(models_db, campaign_id, earning_id=earning.id)
+
+    assert crud_payment.mark_completed(models_db, payment)
+
+    assert payment.status == PaymentStatus.completed
+    models_db.refresh(earning)
+    assert earning.total_paid == Decimal("40.00")
+    event = models_db.query(OutboxEvent).one()
+    assert (event.aggregate_id, event.payload["amount"]) == (campaign_id, "40.00")
+
+
+def test_stale_payment_is_not_completed_twice(models_db):
+    payment = add_payment(models_db, str(uuid4()))
+    # Another worker completes the payment after this one loaded it
+    other = models_db.__class__(bind=models_db.bind)
+    other_payment = other.get(Payment, payment.id)
+    assert crud_payment.mark_completed(other, other_payment)
+    other.close()
+
+    assert payment.status == PaymentStatus.processing  # stale in this session
+    assert not crud_payment.mark_completed(models_db, payment)
+    assert models_db.query(OutboxEvent).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_relay_coalesces_increments_per_campaign(models_db):
+    first, second = str(uuid4()), str(uuid4())
+    for campaign_id, amount in ((first, "10.00"), (first, "15.50"), (second, "5.00")):
+        crud_payment.mark_completed(models_db, add_payment(models_db, campaign_id, amount))
+    campaigns = Campaigns()
+
+    delivered = await OutboxRelay(models_db, campaign_client=campaigns).relay_batch()
+
+    assert delivered == 3
+    assert sorted((c, a) for c, a, _ in campaigns.updates) == sorted([(first, 25.5), (second, 5.0)])
+    assert models_db.query(OutboxEvent).filter(OutboxEvent.processed_at.is_(None)).count() == 0
+    # Nothing left to deliver
+    assert await OutboxRelay(models_db, campaign_client=campaigns).relay_batch() == 0
+    assert len(campaigns.updates) == 2
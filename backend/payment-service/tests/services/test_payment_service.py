@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from uuid import uuid4
+
+import pytest
+
+from app.core.exceptions import PaymentProcessingError
+from app.crud import payment as crud_payment
+from app.models.payment_enums import PaymentStatus, PaymentType, PayoutMethod
+from app.models.standalone_models import Payment
+from app.schemas.payment import BulkPaymentCreate
+from app.services import payment_service
+from app.services.payment_service import PaymentProcessingService
+
+
+class Users:
+    def __init__(self, known):
+        self.known = set(known)
+        self.batch_calls = 0
+
+    async def get_users_batch(self, user_ids):
+        self.batch_calls += 1
+        return {uid: {"id": str(uid)} for uid in user_ids if uid in self.known}
+
+
+def bulk(creator_ids, method=PayoutMethod.stripe):
+    return BulkPaymentCreate(
+        creator_ids=creator_ids,
+        amount_per_creator=25,
+        payment_type=PaymentType.bonus,
+        payment_method=method
+    )
+
+
+@pytest.mark.asyncio
+async def test_bulk_payments_share_a_batch(models_db):
+    creator_ids = [uuid4() for _ in range(3)]
+    users = Users(creator_ids)
+    service = PaymentProcessingService(models_db, user_client=users)
+
+    batch, payment_ids = await service.create_bulk_payments(bulk(creator_ids), created_by="agency")
+
+    assert users.batch_calls == 1
+    assert batch.total_count == 3
+    payments = models_db.query(Payment).all()
+    assert {p.id for p in payments} == set(payment_ids)
+    assert {p.batch_id for p in payments} == {batch.id}
+
+    status = service.get_batch_status(batch.id)
+    assert status.total == 3
+    assert status.status_counts == {PaymentStatus.pending.value: 3}
+    assert {item.creator_id for item in status.items} == set(creator_ids)
+
+
+@pytest.mark.asyncio
+async def test_unknown_creators_reject_the_whole_batch(models_db):
+    known, unknown = uuid4(), uuid4()
+    service = PaymentProcessingService(models_db, user_client=Users([known]))
+
+    with pytest.raises(PaymentProcessingError, match=str(unknown)):
+        await service.create_bulk_payments(bulk([known, unknown]))
+
+    assert models_db.query(Payment).count() == 0
+
+
+@pytest.mark.asyncio
+async def test_submission_is_grouped_per_provider_with_bounded_concurrency(models_db, monkeypatch):
+    stripe_ids = [uuid4() for _ in range(5)]
+    fanbasis_ids = [uuid4() for _ in range(3)]
+    users = Users(stripe_ids + fanbasis_ids)
+    service = PaymentProcessingService(models_db, user_client=users)
+    _, stripe_payments = await service.create_bulk_payments(bulk(stripe_ids))
+    _, fanbasis_payments = await service.create_bulk_payments(bulk(fanbasis_ids, PayoutMethod.fanbasis))
+
+    monkeypatch.setitem(payment_service.PROVIDER_SUBMIT_CONCURRENCY, PayoutMethod.stripe, 2)
+    method_of = {pid: "stripe" for pid in stripe_payments} | {pid: "fanbasis" for pid in fanbasis_payments}
+    sessions = []
+    in_flight = {"stripe": 0, "fanbasis": 0}
+    peak = {"stripe": 0, "fanbasis": 0}
+    submitted = []
+
+    async def process(self, payment_id):
+        method = method_of[payment_id]
+        sessions.append(self.db)
+        in_flight[method] += 1
+        peak[method] = max(peak[method], in_flight[method])
+        await asyncio.sleep(0)
+        submitted.append(payment_id)
+        in_flight[method] -= 1
+
+    monkeypatch.setattr(payment_service, "SessionLocal", lambda: models_db.__class__(bind=models_db.bind))
+    monkeypatch.setattr(PaymentProcessingService, "process_payment_async", process)
+
+    await service.submit_payment_batch(stripe_payments + fanbasis_payments)
+
+    assert sorted(submitted) == sorted(stripe_payments + fanbasis_payments)
+    assert peak["stripe"] == 2
+    # Fanbasis runs alongside stripe under its own limit
+    assert peak["fanbasis"] == 3
+    # Every submission gets its own session
+    assert len({id(db) for db in sessions}) == len(submitted)
+    assert models_db not in sessions
+
+
+@pytest.mark.asyncio
+async def test_session_io_runs_off_the_event_loop(models_db, monkeypatch):
+    creator_ids = [uuid4()]
+    threads = []
+    create_bulk = crud_payment.create_bulk
+
+    def recording_create_bulk(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return create_bulk(*args, **kwargs)
+
+    monkeypatch.setattr(crud_payment, "create_bulk", recording_create_bulk)
+    service = PaymentProcessingService(models_db, user_client=Users(creator_ids))
+
+    await service.create_bulk_payments(bulk(creator_ids))
+
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+import pytest
+
+from app.crud import referral as crud_referral
+from app.models.standalone_models import CreatorBalance, Referral
+from app.services.referral_service import ReferralService
+
+
+def add_referral(db, referred_id, earnings, **kwargs):
+    db.add(CreatorBalance(creator_id=referred_id, base_earnings=Decimal(earnings)))
+    referral = Referral(referrer_id="referrer", referred_id=referred_id, **kwargs)
+    db.add(referral)
+    db.commit()
+    return referral
+
+
+@pytest.mark.asyncio
+async def test_second_bonus_run_credits_nothing(models_db):
+    referral = add_referral(models_db, "referred", "200.00")
+    service = ReferralService(models_db)
+
+    first = await service.assign_pending_bonuses()
+    second = await service.assign_pending_bonuses()
+
+    assert first == {"referrals_updated": 1, "total_bonus": 10.0}
+    assert second == {"referrals_updated": 0, "total_bonus": 0}
+    models_db.refresh(referral)
+    assert referral.bonus_earned == Decimal("10.00")
+    assert referral.bonus_earnings_basis == Decimal("200.00")
+
+
+@pytest.mark.asyncio
+async def test_only_new_earnings_are_credited(models_db):
+    referral = add_referral(models_db, "referred", "200.00")
+    service = ReferralService(models_db)
+    await service.assign_pending_bonuses()
+
+    balance = models_db.get(CreatorBalance, "referred")
+    balance.gmv_commission = Decimal("100.00")
+    models_db.commit()
+
+    assert await service.assign_pending_bonuses() == {"referrals_updated": 1, "total_bonus": 5.0}
+    models_db.refresh(referral)
+    assert referral.bonus_earned == Decimal("15.00")
+
+
+@pytest.mark.asyncio
+async def test_backfilled_referrals_are_not_credited_again(models_db):
+    credited = add_referral(models_db, "credited", "300.00", bonus_earned=Decimal("15.00"))
+    uncredited = add_referral(models_db, "uncredited", "100.00")
+
+    assert crud_referral.backfill_bonus_basis(models_db) == 1
+    models_db.commit()
+    # Already set: a re-run leaves the basis alone
+    assert crud_referral.backfill_bonus_basis(models_db) == 0
+
+    result = await ReferralService(models_db).assign_pending_bonuses()
+
+    assert result == {"referrals_updated": 1, "total_bonus": 5.0}
+    models_db.refresh(credited)
+    models_db.refresh(uncredited)
+    assert (credited.bonus_earned, credited.bonus_earnings_basis) == (Decimal("15.00"), Decimal("300.00"))
+    assert uncredited.bonus_earned == Decimal("5.00")
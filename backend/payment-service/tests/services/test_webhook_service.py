@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud import webhook_event as crud_webhook_event
+from app.models.standalone_models import WebhookEvent
+from app.schemas.webhook import WebhookProcessingResult
+from app.services.webhook_service import WebhookEventProcessor, WebhookProcessingService
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Payloads the Stripe handler saw; payloads with "fail" set are failed"""
+    handled = []
+
+    async def process_stripe_webhook(self, event):
+        handled.append(event["id"])
+        if event.get("fail"):
+            return WebhookProcessingResult(success=False, message="payment not found")
+        return WebhookProcessingResult(success=True, message="ok")
+
+    monkeypatch.setattr(WebhookProcessingService, "process_stripe_webhook", process_stripe_webhook)
+    return handled
+
+
+def add_event(db, event_id, ordering_key, seconds_ago, fail=False, **columns):
+    event = WebhookEvent(
+        provider="stripe",
+        provider_event_id=event_id,
+        payload={"id": event_id, "fail": fail},
+        ordering_key=ordering_key,
+        partition=0,
+        received_at=datetime.now() - timedelta(seconds=seconds_ago),
+        **columns
+    )
+    db.add(event)
+    db.commit()
+    return event
+
+
+async def process(db, batch_size=100):
+    stats = {"processed": 0, "failed": 0, "deferred": 0}
+    await WebhookEventProcessor(db)._process_events(db, 0, batch_size, stats)
+    return stats
+
+
+def test_partition_is_stable_per_ordering_key():
+    assert crud_webhook_event.partition_for(None) == 0
+    assert crud_webhook_event.partition_for("pi_1") == crud_webhook_event.partition_for("pi_1")
+    assert all(
+        0 <= crud_webhook_event.partition_for(f"pi_{i}") < crud_webhook_event.WEBHOOK_PARTITIONS
+        for i in range(50)
+    )
+
+
+@pytest.mark.asyncio
+async def test_events_are_processed_in_arrival_order(models_db, handled):
+    add_event(models_db, "evt_2", "pi_1", 10)
+    add_event(models_db, "evt_1", "pi_1", 20)
+    add_event(models_db, "evt_3", "pi_2", 5)
+
+    assert await process(models_db) == {"processed": 3, "failed": 0, "deferred": 0}
+    assert handled == ["evt_1", "evt_2", "evt_3"]
+    assert {event.status for event in models_db.query(WebhookEvent)} == {"processed"}
+
+
+@pytest.mark.asyncio
+async def test_failure_holds_back_later_events_for_the_payment(models_db, handled):
+    failing = add_event(models_db, "evt_1", "pi_1", 30, fail=True)
+    held = add_event(models_db, "evt_2", "pi_1", 20)
+    other = add_event(models_db, "evt_3", "pi_2", 10)
+
+    assert await process(models_db) == {"processed": 1, "failed": 1, "deferred": 1}
+    assert handled == ["evt_1", "evt_3"]
+    assert (failing.status, failing.attempts, failing.last_error) == ("failed", 1, "payment not found")
+    assert (held.status, other.status) == ("pending", "processed")
+
+    # The retry runs the failed event first, then releases the held one
+    failing.payload = {"id": "evt_1"}
+    models_db.commit()
+    assert await process(models_db) == {"processed": 2, "failed": 0, "deferred": 0}
+    assert handled[-2:] == ["evt_1", "evt_2"]
+
+
+def test_events_out_of_attempts_are_not_picked_up(models_db):
+    add_event(models_db, "evt_1", "pi_1", 20, status="failed", attempts=crud_webhook_event.MAX_ATTEMPTS)
+    retry = add_event(models_db, "evt_2", "pi_2", 10, status="failed", attempts=1)
+
+    assert crud_webhook_event.get_pending_for_partition(models_db, 0) == [retry]
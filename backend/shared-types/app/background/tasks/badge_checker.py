@@ -7,6 +7,7 @@ import asyncio
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -23,12 +24,13 @@ from app.core.config import settings
 logger = get_logger(__name__)
 
 
-async def check_creator_badges(creator_id: UUID) -> List[str]:
+async def check_creator_badges(creator_id: UUID, current_gmv: Optional[Decimal] = None) -> List[str]:
     """
     Check and assign badges for a single creator
     
     Args:
         creator_id: UUID of the creator
+        current_gmv: GMV just fetched for the creator, to skip recalculating it
         
     Returns:
         List of newly assigned badge types
@@ -40,8 +42,9 @@ async def check_creator_badges(creator_id: UUID) -> List[str]:
             gmv_calculator = GMVCalculator(session)
             
             # Calculate current GMV
-            logger.info(f"Calculating GMV for creator {creator_id}")
-            current_gmv = await gmv_calculator.calculate_total_gmv(creator_id)
+            if current_gmv is None:
+                logger.info(f"Calculating GMV for creator {creator_id}")
+                current_gmv = await gmv_calculator.calculate_total_gmv(creator_id)
             
             # Check and assign badges
             new_badges = await badge_service.check_and_assign_badges(creator_id, current_gmv)
@@ -4,12 +4,12 @@ Synchronizes GMV data from TikTok Shop API
 """
 
 import asyncio
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, cast, column, values, String
 from sqlalchemy import update as sql_update
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -23,31 +23,44 @@ from app.core.config import settings
 logger = get_logger(__name__)
 
 
-async def sync_creator_gmv(creator_id: UUID) -> Optional[Dict[str, Any]]:
+def _bulk_gmv_update(changes: List[Tuple[UUID, Decimal]]):
+    """UPDATE users ... FROM (VALUES ...) setting each creator's new GMV"""
+    rows = values(
+        column("id", String),
+        column("current_gmv", String),
+        name="gmv_changes"
+    ).data([(str(creator_id), str(gmv)) for creator_id, gmv in changes])
+    
+    return (
+        sql_update(User)
+        .where(User.id == cast(rows.c.id, User.id.type))
+        .values(
+            current_gmv=cast(rows.c.current_gmv, User.current_gmv.type),
+            updated_at=datetime.utcnow()
+        )
+    )
+
+
+async def sync_creators_gmv(creator_ids: List[UUID]) -> List[Optional[Dict[str, Any]]]:
     """
-    Sync GMV data for a single creator
+    Sync GMV data for a batch of creators
+    
+    Reads the batch with one SELECT, fetches GMV for all of it at once and
+    writes every changed GMV with one bulk UPDATE.
     
     Args:
-        creator_id: UUID of the creator
+        creator_ids: UUIDs of the creators
         
     Returns:
-        Sync result dictionary or None if failed
+        Sync result dictionary (or None if failed) for each creator, in order
     """
     async with async_session_maker() as session:
         try:
-            # Get creator's TikTok user ID
             result = await session.execute(
-                select(User.tiktok_user_id, User.current_gmv)
-                .where(User.id == creator_id)
+                select(User.id, User.tiktok_user_id, User.current_gmv)
+                .where(User.id.in_(creator_ids))
             )
-            row = result.one_or_none()
-            
-            if not row or not row[0]:
-                logger.warning(f"Creator {creator_id} has no TikTok user ID")
-                return None
-            
-            tiktok_user_id = row[0]
-            previous_gmv = row[1] or Decimal(0)
+            creators = {row[0]: (row[1], row[2] or Decimal(0)) for row in result.all()}
             
             # Initialize TikTok service
             tiktok_service = TikTokShopService()
@@ -56,37 +69,61 @@ async def sync_creator_gmv(creator_id: UUID) -> Optional[Dict[str, Any]]:
                 logger.warning("TikTok Shop API not configured, using mock data")
             
             # Fetch GMV data
-            gmv_data = await tiktok_service.get_creator_gmv(tiktok_user_id)
-            
-            if not gmv_data:
-                logger.error(f"Failed to fetch GMV for creator {creator_id}")
-                return None
-            
-            new_gmv = Decimal(str(gmv_data.get('total_gmv', 0)))
+            gmv_by_tiktok_id = await tiktok_service.get_creators_gmv(
+                [tiktok_user_id for tiktok_user_id, _ in creators.values() if tiktok_user_id]
+            )
             
-            # Update creator's GMV if changed
-            if new_gmv != previous_gmv:
+            results: Dict[UUID, Optional[Dict[str, Any]]] = {}
+            changes = []
+            for creator_id in creator_ids:
+                tiktok_user_id, previous_gmv = creators.get(creator_id, (None, None))
+                
+                if not tiktok_user_id:
+                    logger.warning(f"Creator {creator_id} has no TikTok user ID")
+                    results[creator_id] = None
+                    continue
+                
+                gmv_data = gmv_by_tiktok_id.get(tiktok_user_id)
+                if not gmv_data:
+                    logger.error(f"Failed to fetch GMV for creator {creator_id}")
+                    results[creator_id] = None
+                    continue
+                
+                new_gmv = Decimal(str(gmv_data.get('total_gmv', 0)))
+                if new_gmv != previous_gmv:
+                    changes.append((creator_id, previous_gmv, new_gmv))
+                
+                results[creator_id] = {
+                    "creator_id": str(creator_id),
+                    "gmv": float(new_gmv),
+                    "unchanged": True,
+                    "timestamp": datetime.utcnow()
+                }
+            
+            # Update changed GMVs in one statement
+            if changes:
                 await session.execute(
-                    sql_update(User)
-                    .where(User.id == creator_id)
-                    .values(
-                        current_gmv=new_gmv,
-                        updated_at=datetime.utcnow()
-                    )
+                    _bulk_gmv_update([(creator_id, new_gmv) for creator_id, _, new_gmv in changes])
                 )
                 await session.commit()
-                
+            
+            for creator_id, previous_gmv, new_gmv in changes:
                 logger.info(
                     f"Updated GMV for creator {creator_id}: "
                     f"{previous_gmv} -> {new_gmv}"
                 )
+            
+            # Check for new badges where GMV increased
+            increased = [change for change in changes if change[2] > change[1]]
+            if increased:
+                from app.background.tasks.badge_checker import check_creator_badges
+                badge_results = await asyncio.gather(*(
+                    check_creator_badges(creator_id, current_gmv=new_gmv)
+                    for creator_id, _, new_gmv in increased
+                ))
                 
-                # Check for new badges if GMV increased
-                if new_gmv > previous_gmv:
-                    from app.background.tasks.badge_checker import check_creator_badges
-                    new_badges = await check_creator_badges(creator_id)
-                    
-                    return {
+                for (creator_id, previous_gmv, new_gmv), new_badges in zip(increased, badge_results):
+                    results[creator_id] = {
                         "creator_id": str(creator_id),
                         "previous_gmv": float(previous_gmv),
                         "new_gmv": float(new_gmv),
@@ -95,16 +132,24 @@ async def sync_creator_gmv(creator_id: UUID) -> Optional[Dict[str, Any]]:
                         "timestamp": datetime.utcnow()
                     }
             
-            return {
-                "creator_id": str(creator_id),
-                "gmv": float(new_gmv),
-                "unchanged": True,
-                "timestamp": datetime.utcnow()
-            }
+            return [results[creator_id] for creator_id in creator_ids]
             
         except Exception as e:
-            logger.error(f"Error syncing GMV for creator {creator_id}: {str(e)}")
-            return None
+            logger.error(f"Error syncing GMV for {len(creator_ids)} creators: {str(e)}")
+            return [None] * len(creator_ids)
+
+
+async def sync_creator_gmv(creator_id: UUID) -> Optional[Dict[str, Any]]:
+    """
+    Sync GMV data for a single creator
+    
+    Args:
+        creator_id: UUID of the creator
+        
+    Returns:
+        Sync result dictionary or None if failed
+    """
+    return (await sync_creators_gmv([creator_id]))[0]
 
 
 async def sync_all_creators_gmv(
@@ -115,7 +160,7 @@ async def sync_all_creators_gmv(
     Sync GMV data for all creators
     
     Args:
-        batch_size: Number of creators to process concurrently
+        batch_size: Number of creators read, fetched and updated together
         only_active: Only sync active creators
         
     Returns:
@@ -150,16 +195,12 @@ async def sync_all_creators_gmv(
             for i in range(0, len(creator_ids), batch_size):
                 batch_ids = creator_ids[i:i + batch_size]
                 
-                # Process batch concurrently
-                tasks = [sync_creator_gmv(creator_id) for creator_id in batch_ids]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                # Requests within the batch are paced by TikTokShopService
+                results = await sync_creators_gmv(batch_ids)
                 
                 # Process results
                 for result in results:
-                    if isinstance(result, Exception):
-                        total_errors += 1
-                        logger.error(f"Sync error: {str(result)}")
-                    elif result:
+                    if result:
                         total_synced += 1
                         if not result.get('unchanged'):
                             total_updated += 1
@@ -173,9 +214,6 @@ async def sync_all_creators_gmv(
                     f"Progress: {total_synced + total_errors}/{len(creator_ids)} "
                     f"(Updated: {total_updated}, Errors: {total_errors})"
                 )
-                
-                # Rate limiting
-                await asyncio.sleep(2)
             
             execution_time = (datetime.utcnow() - start_time).total_seconds()
             
@@ -230,16 +268,13 @@ async def sync_recent_campaign_participants(
             
             logger.info(f"Syncing GMV for {len(creator_ids)} recent participants")
             
-            # Process all at once if small batch
-            tasks = [sync_creator_gmv(creator_id) for creator_id in creator_ids]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = []
+            for i in range(0, len(creator_ids), 50):
+                results.extend(await sync_creators_gmv(creator_ids[i:i + 50]))
             
             # Count results
-            synced = sum(1 for r in results if r and not isinstance(r, Exception))
-            updated = sum(
-                1 for r in results 
-                if r and not isinstance(r, Exception) and not r.get('unchanged')
-            )
+            synced = sum(1 for r in results if r)
+            updated = sum(1 for r in results if r and not r.get('unchanged'))
             
             return {
                 "creators_synced": synced,
@@ -100,12 +100,14 @@ from app.core.exceptions import (
 from app.core.cache import (
     CacheManager,
     get_cache,
+    close_cache,
     cached,
     cache_key,
     TaggedCache,
     CacheBackend,
     RedisBackend,
     MemoryBackend,
+    TwoTierBackend,
     cache_key_wrapper,
     cache
 )
@@ -3,14 +3,18 @@
 Enhanced cache module with Redis support and fallback
 """
 
-from typing import Any, Optional, Callable, Union, TypeVar, Generic, List
+from typing import Any, Optional, Callable, Union, TypeVar, Generic, List, Dict, Set
+from collections import OrderedDict
 from functools import wraps
+import fnmatch
 import json
-import pickle
 import hashlib
 from datetime import timedelta
 from contextlib import asynccontextmanager
 import asyncio
+import inspect
+import math
+import random
 import secrets
 import time
 
@@ -26,6 +30,7 @@ except ImportError:
         redis = None
         HAS_REDIS = False
 
+from app.core import serialization
 from app.core.config import settings
 from app.utils.logging import get_logger
 
@@ -33,6 +38,49 @@ logger = get_logger(__name__)
 
 T = TypeVar('T')
 
+# Marker for values stored by get_or_set together with their refresh metadata
+_ENTRY_MARKER = "__cache_entry__"
+
+# Delete a lock only if it still holds our token
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+# SET the value and add its key to each tag set (KEYS[2..]). A tag set lives
+# as long as its longest-lived member; an untimed member makes it persistent.
+_SET_WITH_TAGS_SCRIPT = """
+local expire = tonumber(ARGV[2])
+if expire > 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', expire)
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+for i = 2, #KEYS do
+    local existed = redis.call('EXISTS', KEYS[i]) == 1
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if expire == 0 then
+        redis.call('PERSIST', KEYS[i])
+    else
+        local ttl = redis.call('TTL', KEYS[i])
+        if not existed or (ttl >= 0 and ttl < expire) then
+            redis.call('EXPIRE', KEYS[i], expire)
+        end
+    end
+end
+"""
+
+
+def _is_entry(value: Any) -> bool:
+    return isinstance(value, dict) and value.get(_ENTRY_MARKER) == 1
+
+
+def _unwrap(value: Any) -> Any:
+    return value["value"] if _is_entry(value) else value
+
 
 class CacheBackend:
     """Base cache backend interface"""
@@ -54,6 +102,23 @@ class CacheBackend:
     
     async def clear_pattern(self, pattern: str) -> int:
         raise NotImplementedError
+    
+    async def set_with_tags(
+        self, key: str, value: Any, tag_keys: List[str], expire: Optional[int] = None
+    ) -> None:
+        """Set a value and add its key to every tag set, atomically"""
+        raise NotImplementedError
+    
+    async def invalidate_tags(self, tag_keys: List[str]) -> List[str]:
+        """Delete every key in the tag sets and the sets; returns the deleted keys"""
+        raise NotImplementedError
+    
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+    
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        """Current values of counters (0 if unset)"""
+        raise NotImplementedError
 
 
 class RedisBackend(CacheBackend):
@@ -67,32 +132,18 @@ class RedisBackend(CacheBackend):
             value = await self.redis.get(key)
             if value is None:
                 return None
-            
-            # Try to deserialize
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                # Try pickle for complex objects
-                try:
-                    return pickle.loads(value)
-                except:
-                    # Return as string
-                    return value.decode() if isinstance(value, bytes) else value
+            return serialization.loads(value)
+        except serialization.SerializationError as e:
+            # e.g. written by an older release; treat as a miss and let it be replaced
+            logger.warning(f"Unreadable cache value for key {key}: {e}")
+            return None
         except Exception as e:
             logger.error(f"Redis get error for key {key}: {e}")
             return None
     
     async def set(self, key: str, value: Any, expire: Optional[int] = None) -> None:
         try:
-            # Serialize value
-            if isinstance(value, (str, int, float)):
-                serialized = str(value)
-            else:
-                try:
-                    serialized = json.dumps(value)
-                except (TypeError, ValueError):
-                    # Use pickle for complex objects
-                    serialized = pickle.dumps(value)
+            serialized = serialization.dumps(value)
             
             if expire:
                 await self.redis.setex(key, expire, serialized)
@@ -135,35 +186,108 @@ class RedisBackend(CacheBackend):
         except Exception as e:
             logger.error(f"Redis clear pattern error for {pattern}: {e}")
             return 0
+    
+    async def set_with_tags(
+        self, key: str, value: Any, tag_keys: List[str], expire: Optional[int] = None
+    ) -> None:
+        try:
+            await self.redis.eval(
+                _SET_WITH_TAGS_SCRIPT,
+                1 + len(tag_keys),
+                key,
+                *tag_keys,
+                serialization.dumps(value),
+                expire or 0
+            )
+        except Exception as e:
+            logger.error(f"Redis set with tags error for key {key}: {e}")
+    
+    async def invalidate_tags(self, tag_keys: List[str]) -> List[str]:
+        try:
+            # Snapshot and drop the tag sets in one transaction; keys tagged
+            # afterwards land in fresh sets
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                pipe.delete(*tag_keys)
+                results = await pipe.execute()
+            
+            keys = set()
+            for members in results[:-1]:
+                keys.update(members)
+            if keys:
+                await self.redis.delete(*keys)
+            return [k.decode() if isinstance(k, bytes) else k for k in keys]
+        except Exception as e:
+            logger.error(f"Redis invalidate tags error for {tag_keys}: {e}")
+            return []
+    
+    async def incr(self, key: str) -> int:
+        return await self.redis.incr(key)
+    
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        try:
+            return [int(value or 0) for value in await self.redis.mget(keys)]
+        except Exception as e:
+            logger.error(f"Redis get counters error for {keys}: {e}")
+            return [0] * len(keys)
 
 
 class MemoryBackend(CacheBackend):
-    """In-memory cache backend (fallback)"""
+    """
+    In-memory cache backend (fallback, and the L1 of TwoTierBackend)
+
+    Holds at most `max_entries` keys, evicting the least recently used.
+    """
     
-    def __init__(self):
-        self._cache = {}
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.CACHE_MEMORY_MAX_ENTRIES
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
         self._expires = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Set[str]] = {}
+        self._counters: Dict[str, int] = {}
     
-    async def get(self, key: str) -> Optional[Any]:
-        # Check expiration
+    def _drop(self, key: str) -> None:
+        self._cache.pop(key, None)
+        self._expires.pop(key, None)
+        for tag_key in self._key_tags.pop(key, ()):
+            members = self._tags.get(tag_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._tags[tag_key]
+    
+    def _expired(self, key: str) -> bool:
         if key in self._expires and self._expires[key] < time.time():
-            await self.delete(key)
+            self._drop(key)
+            return True
+        return False
+    
+    async def get(self, key: str) -> Optional[Any]:
+        if key not in self._cache or self._expired(key):
             return None
         
-        return self._cache.get(key)
+        self._cache.move_to_end(key)
+        return self._cache[key]
     
     async def set(self, key: str, value: Any, expire: Optional[int] = None) -> None:
         self._cache[key] = value
+        self._cache.move_to_end(key)
         
         if expire:
             self._expires[key] = time.time() + expire
+        else:
+            self._expires.pop(key, None)
+        
+        while len(self._cache) > self.max_entries:
+            self._drop(next(iter(self._cache)))
     
     async def delete(self, key: str) -> None:
-        self._cache.pop(key, None)
-        self._expires.pop(key, None)
+        self._drop(key)
     
     async def exists(self, key: str) -> bool:
-        return key in self._cache
+        return key in self._cache and not self._expired(key)
     
     async def expire(self, key: str, seconds: int) -> None:
         if key in self._cache:
@@ -171,11 +295,182 @@ class MemoryBackend(CacheBackend):
     
     async def clear_pattern(self, pattern: str) -> int:
         """Clear all keys matching pattern (simple glob matching)"""
-        import fnmatch
         keys_to_delete = [k for k in self._cache.keys() if fnmatch.fnmatch(k, pattern)]
         for key in keys_to_delete:
-            await self.delete(key)
+            self._drop(key)
         return len(keys_to_delete)
+    
+    async def set_with_tags(
+        self, key: str, value: Any, tag_keys: List[str], expire: Optional[int] = None
+    ) -> None:
+        await self.set(key, value, expire)
+        if key not in self._cache:
+            return  # evicted immediately (max_entries reached by this key alone)
+        for tag_key in tag_keys:
+            self._tags.setdefault(tag_key, set()).add(key)
+        self._key_tags.setdefault(key, set()).update(tag_keys)
+    
+    async def invalidate_tags(self, tag_keys: List[str]) -> List[str]:
+        keys = set()
+        for tag_key in tag_keys:
+            keys.update(self._tags.pop(tag_key, ()))
+        for key in keys:
+            self._drop(key)
+        return list(keys)
+    
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+    
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        return [self._counters.get(key, 0) for key in keys]
+    
+    def clear(self) -> None:
+        self._cache.clear()
+        self._expires.clear()
+        self._tags.clear()
+        self._key_tags.clear()
+
+
+class TwoTierBackend(CacheBackend):
+    """
+    Bounded in-process L1 in front of a shared Redis L2
+
+    Reads are served from L1 when possible and fill it from L2 on a miss;
+    L1 entries live at most `l1_ttl` seconds. Writes and deletes go to both
+    tiers and are published on `channel` so every other worker evicts its
+    L1 copy. If the subscription drops, L1 is flushed once it reconnects,
+    since invalidations may have been missed.
+    """
+    
+    def __init__(
+        self,
+        l2: RedisBackend,
+        l1: Optional[MemoryBackend] = None,
+        l1_ttl: Optional[int] = None,
+        channel: Optional[str] = None
+    ):
+        self.l1 = l1 or MemoryBackend(settings.CACHE_L1_MAX_ENTRIES)
+        self.l2 = l2
+        self.redis = l2.redis
+        self.l1_ttl = l1_ttl or settings.CACHE_L1_TTL_SECONDS
+        self.channel = channel or settings.CACHE_INVALIDATION_CHANNEL
+        self._origin = secrets.token_hex(8)
+        self._listener: Optional[asyncio.Task] = None
+    
+    def _l1_expire(self, expire: Optional[int]) -> int:
+        return min(expire, self.l1_ttl) if expire else self.l1_ttl
+    
+    async def start(self) -> None:
+        """Start listening for invalidations from other workers"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+    
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+    
+    async def _publish(self, op: str, value: Union[str, List[str]]) -> None:
+        try:
+            await self.redis.publish(
+                self.channel,
+                json.dumps({"origin": self._origin, "op": op, "value": value})
+            )
+        except Exception as e:
+            logger.error(f"Cache invalidation publish error for {value}: {e}")
+    
+    async def _listen(self) -> None:
+        reconnecting = False
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                if reconnecting:
+                    self.l1.clear()
+                    logger.info("Cache invalidation channel reconnected, L1 flushed")
+                
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    event = json.loads(message["data"])
+                    if event["origin"] == self._origin:
+                        continue
+                    if event["op"] == "pattern":
+                        await self.l1.clear_pattern(event["value"])
+                    elif event["op"] == "keys":
+                        for key in event["value"]:
+                            await self.l1.delete(key)
+                    else:
+                        await self.l1.delete(event["value"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation listener error: {e}")
+                reconnecting = True
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+    
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.l1.get(key)
+        if value is not None:
+            return value
+        
+        value = await self.l2.get(key)
+        if value is not None:
+            await self.l1.set(key, value, self.l1_ttl)
+        return value
+    
+    async def set(self, key: str, value: Any, expire: Optional[int] = None) -> None:
+        await self.l2.set(key, value, expire)
+        await self.l1.set(key, value, self._l1_expire(expire))
+        await self._publish("key", key)
+    
+    async def delete(self, key: str) -> None:
+        await self.l2.delete(key)
+        await self.l1.delete(key)
+        await self._publish("key", key)
+    
+    async def exists(self, key: str) -> bool:
+        return await self.l1.exists(key) or await self.l2.exists(key)
+    
+    async def expire(self, key: str, seconds: int) -> None:
+        await self.l2.expire(key, seconds)
+        if seconds < self.l1_ttl:
+            await self.l1.expire(key, seconds)
+    
+    async def clear_pattern(self, pattern: str) -> int:
+        count = await self.l2.clear_pattern(pattern)
+        await self.l1.clear_pattern(pattern)
+        await self._publish("pattern", pattern)
+        return count
+    
+    async def set_with_tags(
+        self, key: str, value: Any, tag_keys: List[str], expire: Optional[int] = None
+    ) -> None:
+        await self.l2.set_with_tags(key, value, tag_keys, expire)
+        await self.l1.set(key, value, self._l1_expire(expire))
+        await self._publish("key", key)
+    
+    async def invalidate_tags(self, tag_keys: List[str]) -> List[str]:
+        keys = await self.l2.invalidate_tags(tag_keys)
+        for key in keys:
+            await self.l1.delete(key)
+        if keys:
+            await self._publish("keys", keys)
+        return keys
+    
+    async def incr(self, key: str) -> int:
+        return await self.l2.incr(key)
+    
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        # Always read from Redis so a bump in any worker is seen immediately
+        return await self.l2.get_counters(keys)
 
 
 class CacheManager:
@@ -186,6 +481,8 @@ class CacheManager:
     def __init__(self, backend: Optional[CacheBackend] = None):
         self.backend = backend or MemoryBackend()
         self._prefix = getattr(settings, 'CACHE_KEY_PREFIX', 'tsc')
+        # One computation per key at a time (single flight)
+        self._inflight: Dict[str, asyncio.Task] = {}
     
     def _make_key(self, key: str, namespace: Optional[str] = None) -> str:
         """Create namespaced cache key"""
@@ -203,7 +500,7 @@ class CacheManager:
     ) -> Optional[T]:
         """Get value from cache"""
         full_key = self._make_key(key, namespace)
-        value = await self.backend.get(full_key)
+        value = _unwrap(await self.backend.get(full_key))
         return value if value is not None else default
     
     async def set(
@@ -241,20 +538,157 @@ class CacheManager:
         key: str,
         func: Callable,
         expire: Optional[Union[int, timedelta]] = None,
-        namespace: Optional[str] = None
+        namespace: Optional[str] = None,
+        stale_ttl: int = 0,
+        early_refresh_beta: float = 1.0,
+        distributed: bool = False
     ) -> Any:
-        """Get from cache or compute and set"""
-        value = await self.get(key, namespace)
-        if value is not None:
-            return value
+        """
+        Get from cache or compute and set
+        
+        Concurrent misses for a key in this process share one call to
+        `func`; with `distributed` a Redis lock extends that across
+        processes, and the others wait for the winner's value. Before
+        expiry, a request may recompute early with a probability that rises
+        as expiry nears and with the cost of `func` (XFetch, scaled by
+        `early_refresh_beta`; 0 disables). With `stale_ttl`, an expired value
+        is kept that many seconds longer and served while one background
+        task refreshes it, so `func` must not depend on request-scoped
+        resources in that mode.
+        """
+        if isinstance(expire, timedelta):
+            expire = int(expire.total_seconds())
         
-        # Compute value
-        value = await func() if asyncio.iscoroutinefunction(func) else func()
+        full_key = self._make_key(key, namespace)
+        entry = await self.backend.get(full_key)
         
-        # Cache it
-        await self.set(key, value, expire, namespace)
+        if not _is_entry(entry):
+            if entry is not None:
+                return entry  # stored with set()
+            return await self._load_shared(full_key, func, expire, stale_ttl, distributed)
         
-        return value
+        expires_at = entry["expires_at"]
+        if expires_at is None:
+            return entry["value"]
+        
+        now = time.time()
+        if now >= expires_at:
+            if now < expires_at + stale_ttl:
+                self._refresh_in_background(full_key, func, expire, stale_ttl, distributed)
+                return entry["value"]
+            return await self._load_shared(full_key, func, expire, stale_ttl, distributed)
+        
+        # 1 - random() is in (0, 1], so the log is finite and <= 0
+        early_by = entry["delta"] * early_refresh_beta * -math.log(1.0 - random.random())
+        if early_refresh_beta > 0 and now + early_by >= expires_at and full_key not in self._inflight:
+            if stale_ttl:
+                self._refresh_in_background(full_key, func, expire, stale_ttl, distributed)
+            else:
+                return await self._load_shared(full_key, func, expire, stale_ttl, distributed)
+        
+        return entry["value"]
+    
+    def _start_load(
+        self,
+        full_key: str,
+        func: Callable,
+        expire: Optional[int],
+        stale_ttl: int,
+        distributed: bool
+    ) -> asyncio.Task:
+        """The in-flight computation for a key, starting one if needed"""
+        task = self._inflight.get(full_key)
+        if task is None:
+            task = asyncio.create_task(self._load(full_key, func, expire, stale_ttl, distributed))
+            self._inflight[full_key] = task
+            
+            def _done(t: asyncio.Task):
+                if self._inflight.get(full_key) is t:
+                    del self._inflight[full_key]
+                if not t.cancelled() and t.exception() is not None:
+                    logger.warning(f"Cache refresh failed for {full_key}: {t.exception()}")
+            
+            task.add_done_callback(_done)
+        return task
+    
+    async def _load_shared(
+        self,
+        full_key: str,
+        func: Callable,
+        expire: Optional[int],
+        stale_ttl: int,
+        distributed: bool
+    ) -> Any:
+        # Shielded so one caller going away does not cancel the others' result
+        return await asyncio.shield(self._start_load(full_key, func, expire, stale_ttl, distributed))
+    
+    def _refresh_in_background(
+        self,
+        full_key: str,
+        func: Callable,
+        expire: Optional[int],
+        stale_ttl: int,
+        distributed: bool
+    ) -> None:
+        self._start_load(full_key, func, expire, stale_ttl, distributed)
+    
+    async def _load(
+        self,
+        full_key: str,
+        func: Callable,
+        expire: Optional[int],
+        stale_ttl: int,
+        distributed: bool
+    ) -> Any:
+        redis_client = getattr(self.backend, "redis", None) if distributed else None
+        lock_key = self._make_key(full_key, "locks")
+        lock_token = None
+        
+        if redis_client is not None:
+            lock_token = secrets.token_urlsafe(16)
+            timeout = settings.CACHE_FILL_LOCK_TIMEOUT_SECONDS
+            if not await redis_client.set(lock_key, lock_token, nx=True, ex=timeout):
+                lock_token = None
+                value = await self._wait_for_fill(full_key, timeout)
+                if value is not None:
+                    return value
+                # The lock holder failed or is too slow; compute it here
+        
+        try:
+            started = time.monotonic()
+            value = func()
+            if inspect.isawaitable(value):
+                value = await value
+            
+            if value is not None:
+                entry = {
+                    _ENTRY_MARKER: 1,
+                    "value": value,
+                    "expires_at": time.time() + expire if expire else None,
+                    "delta": time.monotonic() - started
+                }
+                await self.backend.set(full_key, entry, expire + stale_ttl if expire else None)
+            return value
+        finally:
+            if lock_token is not None:
+                try:
+                    await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, lock_token)
+                except Exception as e:
+                    logger.error(f"Cache fill lock release error for {full_key}: {e}")
+    
+    async def _wait_for_fill(self, full_key: str, timeout: float) -> Optional[Any]:
+        """Poll until another process stores a fresh value for the key"""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            entry = await self.backend.get(full_key)
+            if entry is not None and (
+                not _is_entry(entry) or entry["expires_at"] is None or entry["expires_at"] > time.time()
+            ):
+                return _unwrap(entry)
+        return None
     
     @asynccontextmanager
     async def lock(
@@ -268,8 +702,9 @@ class CacheManager:
         lock_value = secrets.token_urlsafe(16)
         
         # Try to acquire lock
-        if isinstance(self.backend, RedisBackend):
-            acquired = await self.backend.redis.set(
+        redis_client = getattr(self.backend, "redis", None)
+        if redis_client is not None:
+            acquired = await redis_client.set(
                 lock_key, lock_value, nx=True, ex=timeout
             )
         else:
@@ -294,21 +729,58 @@ class CacheManager:
 
 # Global cache instance
 _cache_instance: Optional[CacheManager] = None
+_cache_init_lock: Optional[asyncio.Lock] = None
+
+
+async def _create_backend() -> CacheBackend:
+    """Two-tier Redis backend when REDIS_URL is reachable, memory otherwise"""
+    if not HAS_REDIS or not settings.REDIS_URL:
+        logger.info("Cache initialized with memory backend (Redis not configured)")
+        return MemoryBackend()
+    
+    try:
+        client = redis.from_url(settings.get_redis_url(settings.REDIS_CACHE_DB))
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis unavailable ({e}), cache initialized with memory backend")
+        return MemoryBackend()
+    
+    backend = TwoTierBackend(RedisBackend(client))
+    await backend.start()
+    logger.info("Cache initialized with two-tier (memory + Redis) backend")
+    return backend
 
 
 async def get_cache() -> CacheManager:
     """Get or create cache instance"""
-    global _cache_instance
+    global _cache_instance, _cache_init_lock
     
     if _cache_instance is None:
-        # For now, use memory backend
-        # Redis can be added later when available
-        _cache_instance = CacheManager(MemoryBackend())
-        logger.info("Cache initialized with memory backend")
+        if _cache_init_lock is None:
+            _cache_init_lock = asyncio.Lock()
+        async with _cache_init_lock:
+            if _cache_instance is None:
+                _cache_instance = CacheManager(await _create_backend())
     
     return _cache_instance
 
 
+async def close_cache() -> None:
+    """Stop the invalidation listener and close the Redis connection"""
+    global _cache_instance
+    
+    if _cache_instance is None:
+        return
+    
+    backend = _cache_instance.backend
+    if isinstance(backend, TwoTierBackend):
+        await backend.close()
+    redis_client = getattr(backend, "redis", None)
+    if redis_client is not None:
+        await redis_client.close()
+    _cache_instance = None
+
+
 # Cache key builder
 def cache_key(*args, **kwargs) -> str:
     """Build cache key from arguments"""
@@ -327,7 +799,9 @@ def cache_key(*args, **kwargs) -> str:
 def cached(
     expire: Union[int, timedelta] = 300,
     namespace: Optional[str] = None,
-    key_builder: Optional[Callable] = None
+    key_builder: Optional[Callable] = None,
+    stale_ttl: int = 0,
+    distributed: bool = False
 ):
     """
     Decorator for caching async function results
@@ -336,6 +810,9 @@ def cached(
         expire: Cache expiration in seconds or timedelta
         namespace: Cache namespace
         key_builder: Custom key builder function
+        stale_ttl: Serve an expired result this many seconds longer while it
+            is refreshed in the background (see CacheManager.get_or_set)
+        distributed: Coalesce recomputation across processes with a Redis lock
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -349,20 +826,14 @@ def cached(
             else:
                 key = cache_key(func.__name__, *args, **kwargs)
             
-            # Try to get from cache
-            cached_value = await cache.get(key, namespace)
-            if cached_value is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return cached_value
-            
-            # Call function
-            result = await func(*args, **kwargs)
-            
-            # Cache result
-            await cache.set(key, result, expire, namespace)
-            logger.debug(f"Cached result for {func.__name__}")
-            
-            return result
+            return await cache.get_or_set(
+                key,
+                lambda: func(*args, **kwargs),
+                expire,
+                namespace,
+                stale_ttl=stale_ttl,
+                distributed=distributed
+            )
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs):
@@ -377,11 +848,25 @@ def cached(
 
 # Tag-based cache invalidation
 class TaggedCache:
-    """Cache with tag-based invalidation"""
+    """
+    Cache with tag-based invalidation
+    
+    Two strategies:
+    - set_with_tags / invalidate_tag: each tag is a set of keys (a Redis
+      set, or a Python set in memory); invalidation deletes the members.
+    - set_versioned / get_versioned / bump_tag: keys embed the current
+      generation of each tag, so bumping a tag is one INCR and old entries
+      are simply never read again. They are left to expire, so give
+      versioned entries an expiry.
+    """
     
     def __init__(self, cache: CacheManager):
         self.cache = cache
         self.tag_namespace = "tags"
+        self.generation_namespace = "tag_gen"
+    
+    def _tag_keys(self, tags: List[str]) -> List[str]:
+        return [self.cache._make_key(tag, self.tag_namespace) for tag in tags]
     
     async def set_with_tags(
         self,
@@ -392,42 +877,66 @@ class TaggedCache:
         namespace: Optional[str] = None
     ):
         """Set value with tags"""
-        # Set the value
-        await self.cache.set(key, value, expire, namespace)
-        
-        # Store tags
-        for tag in tags:
-            tag_key = f"{self.tag_namespace}:{tag}"
-            tagged_keys = await self.cache.get(tag_key, default=[])
-            if key not in tagged_keys:
-                tagged_keys.append(key)
-                await self.cache.set(tag_key, tagged_keys)
-    
-    async def invalidate_tag(self, tag: str):
-        """Invalidate all keys with a tag"""
-        tag_key = f"{self.tag_namespace}:{tag}"
-        tagged_keys = await self.cache.get(tag_key, default=[])
-        
-        # Delete all tagged keys
-        for key in tagged_keys:
-            await self.cache.delete(key)
-        
-        # Delete the tag list
-        await self.cache.delete(tag_key)
+        if isinstance(expire, timedelta):
+            expire = int(expire.total_seconds())
         
-        return len(tagged_keys)
+        await self.cache.backend.set_with_tags(
+            self.cache._make_key(key, namespace), value, self._tag_keys(tags), expire
+        )
+    
+    async def invalidate_tag(self, tag: str) -> int:
+        """Invalidate all keys with a tag; returns how many keys were indexed under it"""
+        return await self.invalidate_tags([tag])
+    
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """Invalidate all keys with any of the tags; returns how many keys were indexed"""
+        keys = await self.cache.backend.invalidate_tags(self._tag_keys(tags))
+        return len(keys)
+    
+    async def _versioned_key(self, key: str, tags: List[str]) -> str:
+        generations = await self.cache.backend.get_counters(
+            [self.cache._make_key(tag, self.generation_namespace) for tag in tags]
+        )
+        return f"{key}@{'.'.join(str(g) for g in generations)}"
+    
+    async def get_versioned(
+        self,
+        key: str,
+        tags: List[str],
+        namespace: Optional[str] = None,
+        default: Optional[T] = None
+    ) -> Optional[T]:
+        """Get a value stored under the tags' current generations"""
+        return await self.cache.get(await self._versioned_key(key, tags), namespace, default)
+    
+    async def set_versioned(
+        self,
+        key: str,
+        value: Any,
+        tags: List[str],
+        expire: Optional[Union[int, timedelta]] = None,
+        namespace: Optional[str] = None
+    ) -> None:
+        """Set a value under the tags' current generations"""
+        await self.cache.set(await self._versioned_key(key, tags), value, expire, namespace)
+    
+    async def bump_tag(self, tag: str) -> int:
+        """Invalidate every versioned entry carrying the tag in O(1)"""
+        return await self.cache.backend.incr(self.cache._make_key(tag, self.generation_namespace))
 
 
 # Export main components
 __all__ = [
     "CacheManager",
     "get_cache",
+    "close_cache",
     "cached",
     "cache_key",
     "TaggedCache",
     "CacheBackend",
     "RedisBackend",
-    "MemoryBackend"
+    "MemoryBackend",
+    "TwoTierBackend"
 ]
 
 # Backward compatibility
@@ -10,6 +10,7 @@ from pydantic import Field, validator
 import json
 import secrets
 import logging
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,9 @@ class Settings(BaseSettings):
     RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_HOUR: int = 1000
     RATE_LIMIT_PER_MINUTE: int = 100
+    RATE_LIMIT_ALGORITHM: str = "sliding_window"  # sliding_window, sliding_log or token_bucket
+    RATE_LIMIT_LOCAL_PRECHECK: bool = True
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000
     LOGIN_ATTEMPT_LIMIT: int = 5
     LOGIN_ATTEMPT_WINDOW_MINUTES: int = 15
     PASSWORD_RESET_LIMIT_PER_HOUR: int = 3
@@ -87,6 +91,14 @@ class Settings(BaseSettings):
     REDIS_CELERY_BROKER_DB: int = 4
     REDIS_CELERY_RESULT_DB: int = 5
     
+    # Cache
+    CACHE_MEMORY_MAX_ENTRIES: int = 10000
+    CACHE_L1_MAX_ENTRIES: int = 10000
+    CACHE_L1_TTL_SECONDS: int = 30  # bounds staleness if an invalidation is missed
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_FILL_LOCK_TIMEOUT_SECONDS: int = 10  # cross-process recompute lock in get_or_set
+    CACHE_COMPRESSION_THRESHOLD_BYTES: int = 1024  # zstd-compress larger cached values
+    
     # Service Discovery (for microservices)
     SERVICE_DISCOVERY_ENABLED: bool = False
     USER_SERVICE_URL: str = Field(default="http://user-service:8000")
@@ -128,6 +140,10 @@ class Settings(BaseSettings):
     TIKTOK_SHOP_APP_ID: Optional[str] = None
     TIKTOK_SHOP_SHOP_ID: Optional[str] = None
     TIKTOK_SHOP_API_URL: str = "https://open-api.tiktokglobalshop.com"
+    TIKTOK_SHOP_MAX_CONNECTIONS: int = 20
+    TIKTOK_SHOP_MAX_REQUESTS_PER_SECOND: float = 10.0
+    TIKTOK_SHOP_MIN_REQUESTS_PER_SECOND: float = 0.5
+    TIKTOK_SHOP_MAX_RETRIES: int = 3
     
     # Discord Integration
     DISCORD_BOT_TOKEN: Optional[str] = None
@@ -197,6 +213,7 @@ class Settings(BaseSettings):
     BADGE_SYNC_BATCH_SIZE: int = 100
     BADGE_PROGRESS_CACHE_TTL: int = 300
     BADGE_LEADERBOARD_CACHE_TTL: int = 1800
+    BADGE_NETWORK_STATS_CACHE_TTL: int = 300
     BADGE_GMV_SYNC_ENABLED: bool = True
     BADGE_NOTIFICATION_ENABLED: bool = True
     
@@ -272,8 +289,8 @@ class Settings(BaseSettings):
     
     def get_redis_url(self, db: int = 0) -> str:
         """Get Redis URL with specific database"""
-        base_url = self.REDIS_URL.rsplit("/", 1)[0]
-        return f"{base_url}/{db}"
+        # REDIS_URL may or may not already name a database
+        return urlsplit(self.REDIS_URL)._replace(path=f"/{db}").geturl()
     
     @property
     def celery_broker_url(self) -> str:
@@ -1,12 +1,30 @@
 # shared-types/app/core/limiter.py
 """
 Rate limiting module with Redis support
+
+Three algorithms, each a single-round-trip Lua script using the Redis
+server clock (so every worker agrees on time):
+
+- sliding_window: weighted previous + current fixed-window counters in one
+  hash. O(1) memory per key; approximates a true sliding window.
+- sliding_log: a sorted set of request timestamps. Exact, but memory grows
+  with the limit.
+- token_bucket: refills at limit/window per second up to `burst` tokens.
+
+An in-process token bucket sits in front of Redis. It only denies a
+client that has already exceeded its limit within this one process (a
+process cannot see more traffic than the whole cluster), so abusive
+clients are turned away locally, as are clients Redis has told to wait. Without Redis, or when
+Redis errors, the in-process limiter alone decides.
 """
 
+from collections import OrderedDict
 from typing import Optional, Callable, Dict, Tuple, List
 from fastapi import Request, Response
+import asyncio
+import math
+import secrets
 import time
-import hashlib
 
 try:
     import redis.asyncio as redis
@@ -21,6 +39,109 @@ from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+SLIDING_WINDOW = "sliding_window"
+SLIDING_LOG = "sliding_log"
+TOKEN_BUCKET = "token_bucket"
+
+# Each script returns {allowed, remaining, retry_after_ms}.
+# ARGV: window_ms, limit, cost
+_SLIDING_WINDOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local current = math.floor(now / window)
+local into = now % window
+
+local state = redis.call('HMGET', KEYS[1], 'w', 'c', 'p')
+local w = tonumber(state[1])
+local c = tonumber(state[2]) or 0
+local p = tonumber(state[3]) or 0
+if w ~= current then
+    if w == current - 1 then p = c else p = 0 end
+    c = 0
+end
+
+local estimated = p * (1 - into / window) + c
+if estimated + cost > limit then
+    local retry
+    if c + cost > limit then
+        -- Not before the next window, once this one's count has decayed enough
+        retry = window - into + math.ceil(window * (1 - (limit - cost) / c))
+    else
+        retry = math.ceil(window * (1 - (limit - c - cost) / p)) - into
+    end
+    return {0, math.max(0, math.floor(limit - estimated)), math.max(retry, 1)}
+end
+
+c = c + cost
+redis.call('HSET', KEYS[1], 'w', current, 'c', c, 'p', p)
+redis.call('PEXPIRE', KEYS[1], window * 2)
+return {1, math.floor(limit - estimated - cost), 0}
+"""
+
+# ARGV: window_ms, limit, cost, unique member prefix
+_SLIDING_LOG_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local window = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count + cost > limit then
+    -- Wait until enough of the oldest entries have left the window
+    local index = count + cost - limit - 1
+    local entry = redis.call('ZRANGE', KEYS[1], index, index, 'WITHSCORES')
+    return {0, math.max(0, limit - count), math.max(tonumber(entry[2]) + window - now, 1)}
+end
+
+for i = 1, cost do
+    redis.call('ZADD', KEYS[1], now, ARGV[4] .. ':' .. i)
+end
+redis.call('PEXPIRE', KEYS[1], window)
+return {1, limit - count - cost, 0}
+"""
+
+# ARGV: window_ms, limit (tokens refilled per window), cost, capacity
+_TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local rate = tonumber(ARGV[2]) / tonumber(ARGV[1])
+local cost = tonumber(ARGV[3])
+local capacity = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry = math.ceil((cost - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens), retry}
+"""
+
+_SCRIPTS = {
+    SLIDING_WINDOW: _SLIDING_WINDOW_SCRIPT,
+    SLIDING_LOG: _SLIDING_LOG_SCRIPT,
+    TOKEN_BUCKET: _TOKEN_BUCKET_SCRIPT,
+}
+
 
 async def get_rate_limit_key(request: Request) -> str:
     """
@@ -41,74 +162,183 @@ async def get_rate_limit_key(request: Request) -> str:
     return f"ip:{ip}"
 
 
+class LocalRateLimiter:
+    """
+    In-process token buckets, bounded to `max_keys` (least recently used
+    keys are dropped)
+    
+    A bucket with capacity `limit` refilling at limit/window per second
+    only runs dry once a client has made `limit` requests within one
+    window, so it is a safe pre-check for every algorithm.
+    """
+    
+    def __init__(self, max_keys: Optional[int] = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_MAX_KEYS
+        # key -> [tokens, updated_at, blocked_until]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+    
+    def _bucket(self, key: str, capacity: float, rate: float, now: float) -> List[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [capacity, now, 0.0]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        return bucket
+    
+    def acquire(
+        self,
+        key: str,
+        capacity: float,
+        rate: float,
+        cost: int = 1
+    ) -> Tuple[bool, int, float]:
+        """
+        Take `cost` tokens from a bucket refilling at `rate` per second
+        Returns (allowed, remaining, retry_after_seconds)
+        """
+        now = time.monotonic()
+        bucket = self._bucket(key, capacity, rate, now)
+        
+        if bucket[2] > now:
+            return False, 0, bucket[2] - now
+        if bucket[0] < cost:
+            return False, int(bucket[0]), (cost - bucket[0]) / rate
+        
+        bucket[0] -= cost
+        return True, int(bucket[0]), 0.0
+    
+    def refund(self, key: str, cost: int, block_seconds: float = 0) -> None:
+        """Return tokens for a request Redis denied, and turn the key away until it may retry"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] += cost
+            bucket[2] = max(bucket[2], time.monotonic() + block_seconds)
+    
+    def clear(self) -> None:
+        self._buckets.clear()
+
+
 class RateLimiter:
-    """Simple rate limiter implementation"""
+    """
+    Rate limiter over the Lua scripts above
+    
+    `limit` requests per `window` seconds; for token_bucket, `burst` is the
+    bucket size (defaults to `limit`).
+    """
     
-    def __init__(self):
+    def __init__(self, algorithm: Optional[str] = None, local_precheck: Optional[bool] = None):
         self.enabled = getattr(settings, 'RATE_LIMIT_ENABLED', True)
         self.default_limit = getattr(settings, 'RATE_LIMIT_PER_MINUTE', 100)
         self.default_window = 60  # seconds
+        self.algorithm = algorithm or settings.RATE_LIMIT_ALGORITHM
+        self.local_precheck = (
+            settings.RATE_LIMIT_LOCAL_PRECHECK if local_precheck is None else local_precheck
+        )
+        self.local = LocalRateLimiter()
+        # Scripts registered on the client last passed in, so a check sends
+        # only EVALSHA; callers keep one client, so this is registered once
+        self._scripts: Dict[str, Callable] = {}
+        self._scripts_client: Optional["redis.Redis"] = None
+        if self.algorithm not in _SCRIPTS:
+            raise ValueError(f"Unknown rate limit algorithm: {self.algorithm}")
     
     async def check_rate_limit(
         self,
         key: str,
         limit: int = None,
         window: int = None,
-        redis_client: Optional[redis.Redis] = None
+        redis_client: Optional[redis.Redis] = None,
+        cost: int = 1,
+        burst: Optional[int] = None,
+        algorithm: Optional[str] = None
     ) -> Tuple[bool, Dict[str, any]]:
         """
         Check if rate limit is exceeded
         Returns (allowed, metadata)
         """
-        if not self.enabled:
-            return True, {"limit": limit or self.default_limit, "remaining": -1, "reset": 0}
-        
         limit = limit or self.default_limit
         window = window or self.default_window
         
-        # If no Redis, always allow (with warning)
-        if not redis_client:
-            logger.warning("Rate limiting requested but Redis not available")
+        if not self.enabled:
             return True, {"limit": limit, "remaining": -1, "reset": 0}
         
+        algorithm = algorithm or self.algorithm
+        capacity = (burst or limit) if algorithm == TOKEN_BUCKET else limit
+        rate = limit / window
+        bucket_key = f"rl:{algorithm}:{key}:{window}"
+        
+        if cost > capacity:
+            return False, self._metadata(limit, 0, window, window)
+        
+        if self.local_precheck or not redis_client:
+            allowed, remaining, retry_after = self.local.acquire(bucket_key, capacity, rate, cost)
+            if not allowed or not redis_client:
+                return allowed, self._metadata(limit, remaining, window, retry_after if not allowed else None)
+        
         try:
-            now = int(time.time())
-            window_start = now - window
-            key = f"rate_limit:{key}:{window}"
-            
-            # Use simple counter approach
-            pipe = redis_client.pipeline()
-            pipe.incr(key)
-            pipe.expire(key, window)
-            results = await pipe.execute()
-            
-            current_count = results[0]
-            
-            allowed = current_count <= limit
-            remaining = max(0, limit - current_count)
-            reset = now + window
-            
-            metadata = {
-                "limit": limit,
-                "remaining": remaining,
-                "reset": reset,
-                "retry_after": window if not allowed else None
-            }
-            
-            return allowed, metadata
-            
+            allowed, remaining, retry_after_ms = await self._script(redis_client, algorithm)(
+                keys=[bucket_key],
+                args=self._script_args(algorithm, window, limit, cost, capacity)
+            )
         except Exception as e:
-            logger.error(f"Rate limit check error: {e}")
-            # On error, allow the request
-            return True, {"limit": limit, "remaining": -1, "reset": 0}
+            logger.error(f"Rate limit check error, using in-process limiter: {e}")
+            if self.local_precheck:
+                # The local bucket already admitted this request
+                return True, self._metadata(limit, -1, window, None)
+            allowed, remaining, retry_after = self.local.acquire(bucket_key, capacity, rate, cost)
+            return allowed, self._metadata(limit, remaining, window, retry_after if not allowed else None)
+        
+        if not allowed:
+            retry_after = retry_after_ms / 1000
+            if self.local_precheck:
+                self.local.refund(bucket_key, cost, retry_after)
+            return False, self._metadata(limit, remaining, window, retry_after)
+        
+        return True, self._metadata(limit, remaining, window, None)
+    
+    def _script(self, redis_client: "redis.Redis", algorithm: str) -> Callable:
+        if redis_client is not self._scripts_client:
+            self._scripts = {
+                name: redis_client.register_script(source) for name, source in _SCRIPTS.items()
+            }
+            self._scripts_client = redis_client
+        return self._scripts[algorithm]
+    
+    @staticmethod
+    def _script_args(algorithm: str, window: int, limit: int, cost: int, capacity: int) -> List:
+        args = [window * 1000, limit, cost]
+        if algorithm == SLIDING_LOG:
+            args.append(secrets.token_hex(8))
+        elif algorithm == TOKEN_BUCKET:
+            args.append(capacity)
+        return args
+    
+    @staticmethod
+    def _metadata(limit: int, remaining: int, window: int, retry_after: Optional[float]) -> Dict[str, any]:
+        return {
+            "limit": limit,
+            "remaining": remaining,
+            "reset": int(time.time()) + window,
+            "retry_after": math.ceil(retry_after) if retry_after is not None else None
+        }
 
 
 class AdvancedRateLimiter:
-    """Advanced rate limiter with tier support"""
+    """
+    Advanced rate limiter with tier support
     
-    def __init__(self, redis_url: str = None):
-        self.redis_url = redis_url or settings.REDIS_URL
+    Tiers are enforced as token buckets: `requests` per window sustained,
+    at most `burst` at once.
+    """
+    
+    def __init__(self, redis_url: str = None, algorithm: str = TOKEN_BUCKET):
+        self.redis_url = redis_url or settings.get_redis_url(settings.REDIS_RATE_LIMIT_DB)
         self._redis_client = None
+        self.limiter = RateLimiter(algorithm=algorithm)
         self.tier_limits = {
             "free": {"requests": 60, "burst": 10},
             "pro": {"requests": 600, "burst": 100},
@@ -144,73 +374,18 @@ class AdvancedRateLimiter:
         Check rate limit with tier support
         Returns (allowed, metadata)
         """
-        redis_client = await self.get_redis()
-        if not redis_client:
-            # No Redis, allow but warn
-            logger.warning("Advanced rate limiting requested but Redis not available")
-            return True, {
-                "limit": max_requests,
-                "remaining": -1,
-                "reset": 0,
-                "tier": tier,
-                "cost": cost
-            }
+        limits = self.tier_limits.get(tier, self.tier_limits["free"])
         
-        try:
-            # Get tier limits
-            limits = self.tier_limits.get(tier, self.tier_limits["free"])
-            max_requests = limits["requests"]
-            
-            now = int(time.time())
-            bucket_key = f"rl:{key}:{window_seconds}"
-            
-            # Simple sliding window implementation
-            pipe = redis_client.pipeline()
-            
-            # Remove old entries
-            pipe.zremrangebyscore(bucket_key, 0, now - window_seconds)
-            
-            # Count current entries
-            pipe.zcard(bucket_key)
-            
-            # Execute pipeline
-            results = await pipe.execute()
-            current_count = results[1]
-            
-            # Check if allowed
-            if current_count + cost > max_requests:
-                allowed = False
-            else:
-                # Add new entry
-                await redis_client.zadd(bucket_key, {f"{now}:{cost}": now})
-                await redis_client.expire(bucket_key, window_seconds)
-                allowed = True
-            
-            # Calculate metadata
-            remaining = max(0, max_requests - current_count - (cost if allowed else 0))
-            reset_time = now + window_seconds
-            
-            metadata = {
-                "limit": max_requests,
-                "remaining": remaining,
-                "reset": reset_time,
-                "retry_after": window_seconds if not allowed else None,
-                "tier": tier,
-                "cost": cost
-            }
-            
-            return allowed, metadata
-            
-        except Exception as e:
-            logger.error(f"Advanced rate limit check error: {e}")
-            # On error, allow the request
-            return True, {
-                "limit": max_requests,
-                "remaining": -1,
-                "reset": 0,
-                "tier": tier,
-                "cost": cost
-            }
+        allowed, metadata = await self.limiter.check_rate_limit(
+            key,
+            limit=limits["requests"],
+            window=window_seconds,
+            redis_client=await self.get_redis(),
+            cost=cost,
+            burst=limits["burst"]
+        )
+        metadata.update(tier=tier, cost=cost)
+        return allowed, metadata
     
     async def get_user_tier(self, user_id: str) -> str:
         """Get user's rate limit tier"""
@@ -299,7 +474,9 @@ __all__ = [
     "rate_limit",
     "get_rate_limit_key",
     "RateLimiter",
-    "AdvancedRateLimiter"
+    "AdvancedRateLimiter",
+    "LocalRateLimiter",
+    "SLIDING_WINDOW",
+    "SLIDING_LOG",
+    "TOKEN_BUCKET"
 ]
-
-import asyncio
\ No newline at end of file
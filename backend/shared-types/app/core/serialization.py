@@ -0,0 +1,209 @@
+# app/core/serialization.py
+"""
+Binary serialization for cached values
+
+Every payload starts with a one-byte format tag, so reads never guess:
+
+    0x01  msgpack               0x11  msgpack, zstd-compressed
+    0x02  JSON                  0x12  JSON, zstd-compressed
+
+msgpack (preferred) round-trips Decimal, UUID, datetime, date and Pydantic
+models through extension types. JSON is only used when msgpack is not
+installed; those types then come back as strings. Payloads of at least
+CACHE_COMPRESSION_THRESHOLD_BYTES are zstd-compressed when zstandard is
+installed. Nothing is ever unpickled.
+"""
+
+from typing import Any, Optional
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from uuid import UUID
+import importlib
+import json
+
+from pydantic import BaseModel
+
+# msgpack, orjson and zstandard are optional - will work without them
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    msgpack = None
+    HAS_MSGPACK = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+from app.core.config import settings
+
+FORMAT_MSGPACK = 0x01
+FORMAT_JSON = 0x02
+COMPRESSED = 0x10
+
+# msgpack extension type codes
+_EXT_DECIMAL = 1
+_EXT_UUID = 2
+_EXT_DATETIME = 3
+_EXT_DATE = 4
+_EXT_MODEL = 5
+
+# Only models from these packages are rebuilt from cached data
+_MODEL_MODULE_PREFIXES = ("app.",)
+
+_compressor = zstandard.ZstdCompressor(level=3) if HAS_ZSTD else None
+_decompressor = zstandard.ZstdDecompressor() if HAS_ZSTD else None
+
+
+class SerializationError(ValueError):
+    """Cached data could not be encoded or decoded"""
+
+
+def _model_path(model: BaseModel) -> str:
+    cls = type(model)
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+@lru_cache(maxsize=256)
+def _load_model_class(path: str) -> type:
+    module_name, _, qualname = path.partition(":")
+    if not module_name.startswith(_MODEL_MODULE_PREFIXES):
+        raise SerializationError(f"Refusing to load model {path}")
+
+    obj: Any = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    if not (isinstance(obj, type) and issubclass(obj, BaseModel)):
+        raise SerializationError(f"{path} is not a Pydantic model")
+    return obj
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(value).encode())
+    if isinstance(value, UUID):
+        return msgpack.ExtType(_EXT_UUID, value.bytes)
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode())
+    if isinstance(value, BaseModel):
+        try:
+            fields = msgpack.packb(value.model_dump(), default=_msgpack_default, use_bin_type=True)
+        except TypeError:
+            # A field type msgpack cannot carry; let Pydantic reduce it to JSON types
+            fields = msgpack.packb(value.model_dump(mode="json"), use_bin_type=True)
+        return msgpack.ExtType(_EXT_MODEL, _model_path(value).encode() + b"\0" + fields)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == _EXT_UUID:
+        return UUID(bytes=data)
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    if code == _EXT_MODEL:
+        path, _, fields = data.partition(b"\0")
+        model_class = _load_model_class(path.decode())
+        return model_class.model_validate(
+            msgpack.unpackb(fields, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+        )
+    return msgpack.ExtType(code, data)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value into a tagged (and possibly compressed) payload"""
+    try:
+        if HAS_MSGPACK:
+            fmt = FORMAT_MSGPACK
+            payload = msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+        elif HAS_ORJSON:
+            fmt = FORMAT_JSON
+            payload = orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            fmt = FORMAT_JSON
+            payload = json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+    except (TypeError, ValueError) as e:
+        raise SerializationError(str(e)) from e
+
+    if HAS_ZSTD and len(payload) >= settings.CACHE_COMPRESSION_THRESHOLD_BYTES:
+        compressed = _compressor.compress(payload)
+        if len(compressed) < len(payload):
+            return bytes([fmt | COMPRESSED]) + compressed
+
+    return bytes([fmt]) + payload
+
+
+def loads(data: Optional[bytes]) -> Any:
+    """Deserialize a payload written by dumps()"""
+    if data is None:
+        return None
+    if isinstance(data, str):
+        data = data.encode()
+    if not data:
+        raise SerializationError("Empty payload")
+
+    tag, payload = data[0], data[1:]
+    fmt = tag & ~COMPRESSED
+    if fmt not in (FORMAT_MSGPACK, FORMAT_JSON):
+        raise SerializationError(f"Unknown format tag {tag:#04x}")
+
+    if tag & COMPRESSED and not HAS_ZSTD:
+        raise SerializationError("zstd-compressed payload but zstandard is not installed")
+    if fmt == FORMAT_MSGPACK and not HAS_MSGPACK:
+        raise SerializationError("msgpack payload but msgpack is not installed")
+
+    try:
+        if tag & COMPRESSED:
+            payload = _decompressor.decompress(payload)
+        if fmt == FORMAT_MSGPACK:
+            return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+        return orjson.loads(payload) if HAS_ORJSON else json.loads(payload)
+    except SerializationError:
+        raise
+    except Exception as e:
+        raise SerializationError(f"Corrupt payload: {e}") from e
+
+
+__all__ = [
+    "dumps",
+    "loads",
+    "SerializationError",
+    "FORMAT_MSGPACK",
+    "FORMAT_JSON",
+    "COMPRESSED",
+]
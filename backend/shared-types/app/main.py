@@ -2,6 +2,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.cache import get_cache, close_cache
+from app.services.integrations.tiktok_shop_service import TikTokShopService
 from app.api.v1.endpoints.creators import router as creators_router
 from app.api.v1.endpoints.badges.router import router as badges_router  # Fixed import path
 import logging
@@ -53,5 +55,12 @@ async def list_routes():
 
 @app.on_event("startup")
 async def startup_event():
+    # Select the cache backend (two-tier Redis or memory) before serving requests
+    await get_cache()
     logger.info("Creator Service started on port 8006")
-    logger.info(f"Available routes: {[route.path for route in app.routes if hasattr(route, 'path')]}")
\ No newline at end of file
+    logger.info(f"Available routes: {[route.path for route in app.routes if hasattr(route, 'path')]}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_cache()
+    await TikTokShopService.close_client()
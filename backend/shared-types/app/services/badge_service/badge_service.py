@@ -21,6 +21,9 @@ from app.schemas.badge import (
     BadgeHistoryResponse,
     BadgeStatsResponse
 )
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.db.session import async_session_maker
 from app.utils.badge_constants import BADGE_TIERS, BadgeTier
 from app.utils.logging import get_logger
 # If exceptions module doesn't exist yet, we'll handle it gracefully
@@ -245,44 +248,60 @@ class BadgeService:
         Returns:
             Badge statistics across all creators
         """
+        # Cached network-wide; concurrent misses share one computation
+        cache = await get_cache()
+        return await cache.get_or_set(
+            "network_stats",
+            self._compute_network_badge_stats,
+            expire=settings.BADGE_NETWORK_STATS_CACHE_TTL,
+            namespace="badges",
+            distributed=True
+        )
+    
+    async def _compute_network_badge_stats(self) -> BadgeStatsResponse:
+        # Runs in a task shared by every waiting request, so it must not use
+        # the caller's request-scoped session
         try:
-            # Count badges by type
-            result = await self.session.execute(
-                select(
-                    CreatorBadge.badge_type,
-                    func.count(CreatorBadge.id).label('count')
-                )
-                .group_by(CreatorBadge.badge_type)
-            )
-            
-            badge_counts = {row[0]: row[1] for row in result}
-            
-            # Get total creators
-            total_creators = await self.session.execute(
-                select(func.count(User.id))
-                .where(User.role == 'creator')
-            )
-            total = total_creators.scalar() or 0
-            
-            # Build distribution
-            distribution = {}
-            for tier in BADGE_TIERS:
-                count = badge_counts.get(tier.badge_type, 0)
-                distribution[tier.badge_type] = {
-                    "count": count,
-                    "percentage": (count / total * 100) if total > 0 else 0,
-                    "name": tier.name
-                }
-            
-            return BadgeStatsResponse(
-                total_badges_earned=sum(badge_counts.values()),
-                creators_with_badges=len(set(badge_counts.keys())),
-                badge_distribution=distribution
-            )
-            
+            async with async_session_maker() as session:
+                return await self._network_badge_stats(session)
         except Exception as e:
             logger.error(f"Error fetching badge stats: {str(e)}")
             raise
+
+    async def _network_badge_stats(self, session: AsyncSession) -> BadgeStatsResponse:
+        # Count badges by type
+        result = await session.execute(
+            select(
+                CreatorBadge.badge_type,
+                func.count(CreatorBadge.id).label('count')
+            )
+            .group_by(CreatorBadge.badge_type)
+        )
+        
+        badge_counts = {row[0]: row[1] for row in result}
+        
+        # Get total creators
+        total_creators = await session.execute(
+            select(func.count(User.id))
+            .where(User.role == 'creator')
+        )
+        total = total_creators.scalar() or 0
+        
+        # Build distribution
+        distribution = {}
+        for tier in BADGE_TIERS:
+            count = badge_counts.get(tier.badge_type, 0)
+            distribution[tier.badge_type] = {
+                "count": count,
+                "percentage": (count / total * 100) if total > 0 else 0,
+                "name": tier.name
+            }
+        
+        return BadgeStatsResponse(
+            total_badges_earned=sum(badge_counts.values()),
+            creators_with_badges=len(set(badge_counts.keys())),
+            badge_distribution=distribution
+        )
     
     def _get_badge_status(self, current_gmv: Decimal, tier: BadgeTier) -> str:
         """Determine badge status based on GMV"""
@@ -18,6 +18,9 @@ from app.schemas.creator import (
     CreatorRankingResponse,
     CreatorAnalyticsSummary
 )
+from app.core.cache import get_cache
+from app.core.config import settings
+from app.db.session import async_session_maker
 from app.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -57,65 +60,92 @@ class CreatorAnalyticsService:
         offset: int = 0
     ) -> Dict[str, Any]:
         """Get creator leaderboard"""
+        # Cached per page; concurrent misses share one computation
+        cache = await get_cache()
+        return await cache.get_or_set(
+            f"{period}:{limit}:{offset}",
+            lambda: self._compute_creator_leaderboard(period, limit, offset),
+            expire=settings.BADGE_LEADERBOARD_CACHE_TTL,
+            namespace="creator_leaderboard",
+            distributed=True
+        )
+    
+    async def _compute_creator_leaderboard(
+        self,
+        period: str,
+        limit: int,
+        offset: int
+    ) -> Dict[str, Any]:
+        # Runs in a task shared by every waiting request, so it must not use
+        # the caller's request-scoped session
         try:
-            # Base query for creators
-            query = select(User).where(User.role == UserRole.creator)
-            
-            # TODO: Add period filtering when order data is available
-            # For now, order by current GMV
-            query = query.order_by(User.current_gmv.desc().nullslast())
-            
-            # Count total
-            count_result = await self.session.execute(
-                select(func.count()).select_from(User).where(User.role == UserRole.creator)
-            )
-            total = count_result.scalar() or 0
-            
-            # Apply pagination
-            query = query.offset(offset).limit(limit)
-            
-            # Load with badges
-            query = query.options(selectinload(User.badges))
-            
-            # Execute
-            result = await self.session.execute(query)
-            creators = result.scalars().all()
-            
-            # Build leaderboard entries
-            leaderboard = []
-            for idx, creator in enumerate(creators, start=offset + 1):
-                # Count badges
-                earned_badges = [b for b in creator.badges if b.is_active]
-                highest_badge = None
-                if earned_badges:
-                    sorted_badges = sorted(
-                        earned_badges,
-                        key=lambda b: b.gmv_threshold or 0,
-                        reverse=True
-                    )
-                    highest_badge = sorted_badges[0].badge_name
-                
-                leaderboard.append(CreatorRankingResponse(
-                    rank=idx,
-                    creator_id=creator.id,
-                    username=creator.username,
-                    profile_image_url=creator.profile_image_url,
-                    total_gmv=float(creator.current_gmv or 0),
-                    badges_earned=len(earned_badges),
-                    highest_badge=highest_badge,
-                    content_niche=creator.content_niche,
-                    follower_count=creator.follower_count,
-                    change_in_rank=0  # TODO: Track historical rankings
-                ))
-            
-            return {
-                'total': total,
-                'creators': leaderboard
-            }
-            
+            async with async_session_maker() as session:
+                return await self._creator_leaderboard(session, period, limit, offset)
         except Exception as e:
             logger.error(f"Error getting leaderboard: {str(e)}")
             raise
+
+    async def _creator_leaderboard(
+        self,
+        session: AsyncSession,
+        period: str,
+        limit: int,
+        offset: int
+    ) -> Dict[str, Any]:
+        # Base query for creators
+        query = select(User).where(User.role == UserRole.creator)
+        
+        # TODO: Add period filtering when order data is available
+        # For now, order by current GMV
+        query = query.order_by(User.current_gmv.desc().nullslast())
+        
+        # Count total
+        count_result = await session.execute(
+            select(func.count()).select_from(User).where(User.role == UserRole.creator)
+        )
+        total = count_result.scalar() or 0
+        
+        # Apply pagination
+        query = query.offset(offset).limit(limit)
+        
+        # Load with badges
+        query = query.options(selectinload(User.badges))
+        
+        # Execute
+        result = await session.execute(query)
+        creators = result.scalars().all()
+        
+        # Build leaderboard entries
+        leaderboard = []
+        for idx, creator in enumerate(creators, start=offset + 1):
+            # Count badges
+            earned_badges = [b for b in creator.badges if b.is_active]
+            highest_badge = None
+            if earned_badges:
+                sorted_badges = sorted(
+                    earned_badges,
+                    key=lambda b: b.gmv_threshold or 0,
+                    reverse=True
+                )
+                highest_badge = sorted_badges[0].badge_name
+            
+            leaderboard.append(CreatorRankingResponse(
+                rank=idx,
+                creator_id=creator.id,
+                username=creator.username,
+                profile_image_url=creator.profile_image_url,
+                total_gmv=float(creator.current_gmv or 0),
+                badges_earned=len(earned_badges),
+                highest_badge=highest_badge,
+                content_niche=creator.content_niche,
+                follower_count=creator.follower_count,
+                change_in_rank=0  # TODO: Track historical rankings
+            ))
+        
+        return {
+            'total': total,
+            'creators': leaderboard
+        }
     
     async def get_creator_ranking(self, creator_id: UUID) -> Dict[str, Any]:
         """Get specific creator's ranking"""
@@ -3,7 +3,9 @@ TikTok Shop Integration Service
 Handles communication with TikTok Shop Partner Center API
 """
 
+import asyncio
 import os
+import time
 from typing import Optional, Dict, List, Any
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -16,9 +18,46 @@ from app.utils.logging import get_logger
 logger = get_logger(__name__)
 
 
+class AdaptiveRateLimiter:
+    """
+    Paces outgoing requests to the TikTok Shop API
+    
+    Starts at `max_rate` requests per second. Each throttled (429) or failed
+    (5xx) response halves the rate and honours Retry-After; each success
+    raises it by a tenth of `max_rate` again.
+    """
+    
+    def __init__(self, max_rate: Optional[float] = None, min_rate: Optional[float] = None):
+        self.max_rate = max_rate or settings.TIKTOK_SHOP_MAX_REQUESTS_PER_SECOND
+        self.min_rate = min_rate or settings.TIKTOK_SHOP_MIN_REQUESTS_PER_SECOND
+        self.rate = self.max_rate
+        self._next_at = 0.0
+    
+    async def acquire(self) -> None:
+        """Wait for the next request slot"""
+        now = time.monotonic()
+        slot = max(now, self._next_at)
+        self._next_at = slot + 1 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+    
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+        if retry_after:
+            self._next_at = max(self._next_at, time.monotonic() + retry_after)
+
+
 class TikTokShopService:
     """Service for integrating with TikTok Shop API"""
     
+    # One pooled client and rate limiter per event loop, shared by all instances
+    _client: Optional[AsyncClient] = None
+    _client_loop: Optional[asyncio.AbstractEventLoop] = None
+    _rate_limiter: Optional[AdaptiveRateLimiter] = None
+    
     def __init__(self):
         self.api_key = os.getenv("TIKTOK_SHOP_API_KEY", "")
         self.api_secret = os.getenv("TIKTOK_SHOP_API_SECRET", "")
@@ -34,6 +73,51 @@ class TikTokShopService:
         """Check if TikTok Shop API is properly configured"""
         return not self.mock_mode
     
+    @classmethod
+    def _get_client(cls) -> AsyncClient:
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._client.is_closed or cls._client_loop is not loop:
+            cls._client = AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(
+                    max_connections=settings.TIKTOK_SHOP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.TIKTOK_SHOP_MAX_CONNECTIONS
+                )
+            )
+            cls._client_loop = loop
+            cls._rate_limiter = AdaptiveRateLimiter()
+        return cls._client
+    
+    @classmethod
+    async def close_client(cls) -> None:
+        """Close the shared HTTP client"""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+    
+    async def _get(self, path: str, params: Dict[str, Any]) -> httpx.Response:
+        """GET from the API, paced and retried while it throttles or fails"""
+        client = self._get_client()
+        rate_limiter = self._rate_limiter
+        
+        for _ in range(settings.TIKTOK_SHOP_MAX_RETRIES + 1):
+            await rate_limiter.acquire()
+            response = await client.get(
+                f"{self.base_url}{path}",
+                headers=self._get_headers(),
+                params=params
+            )
+            if response.status_code != 429 and response.status_code < 500:
+                rate_limiter.on_success()
+                return response
+            
+            retry_after = response.headers.get("Retry-After")
+            rate_limiter.on_throttle(
+                float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        
+        return response
+    
     async def get_creator_gmv(self, tiktok_user_id: str) -> Optional[Dict[str, Any]]:
         """
         Get total GMV for a creator
@@ -49,35 +133,45 @@ class TikTokShopService:
                 return self._get_mock_gmv_data(tiktok_user_id)
             
             # Real API implementation
-            async with AsyncClient() as client:
-                headers = self._get_headers()
-                params = {
-                    "creator_id": tiktok_user_id,
-                    "shop_id": self.shop_id
+            params = {
+                "creator_id": tiktok_user_id,
+                "shop_id": self.shop_id
+            }
+            
+            response = await self._get("/api/v1/creator/gmv", params)
+            
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "total_gmv": data.get("total_gmv", 0),
+                    "currency": data.get("currency", "USD"),
+                    "last_updated": datetime.utcnow()
                 }
-                
-                response = await client.get(
-                    f"{self.base_url}/api/v1/creator/gmv",
-                    headers=headers,
-                    params=params,
-                    timeout=30.0
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "total_gmv": data.get("total_gmv", 0),
-                        "currency": data.get("currency", "USD"),
-                        "last_updated": datetime.utcnow()
-                    }
-                else:
-                    logger.error(f"TikTok API error: {response.status_code} - {response.text}")
-                    return None
+            else:
+                logger.error(f"TikTok API error: {response.status_code} - {response.text}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error fetching GMV from TikTok: {str(e)}")
             return None
     
+    async def get_creators_gmv(self, tiktok_user_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get total GMV for many creators
+        
+        Requests run concurrently on the shared connection pool, paced by
+        the adaptive rate limiter.
+        
+        Args:
+            tiktok_user_ids: TikTok user IDs of the creators
+            
+        Returns:
+            GMV data dictionary (or None if it could not be fetched) by TikTok user ID
+        """
+        unique_ids = list(dict.fromkeys(tiktok_user_ids))
+        results = await asyncio.gather(*(self.get_creator_gmv(user_id) for user_id in unique_ids))
+        return dict(zip(unique_ids, results))
+    
     async def get_creator_gmv_by_period(
         self, 
         tiktok_user_id: str,
@@ -99,33 +193,26 @@ class TikTokShopService:
             if self.mock_mode:
                 return self._get_mock_period_gmv(tiktok_user_id, start_date, end_date)
             
-            async with AsyncClient() as client:
-                headers = self._get_headers()
-                params = {
-                    "creator_id": tiktok_user_id,
-                    "shop_id": self.shop_id,
-                    "start_date": start_date.strftime("%Y-%m-%d"),
-                    "end_date": end_date.strftime("%Y-%m-%d")
+            params = {
+                "creator_id": tiktok_user_id,
+                "shop_id": self.shop_id,
+                "start_date": start_date.strftime("%Y-%m-%d"),
+                "end_date": end_date.strftime("%Y-%m-%d")
+            }
+            
+            response = await self._get("/api/v1/creator/gmv/period", params)
+            
+            if response.status_code == 200:
+                data = response.json()
+                return {
+                    "period_gmv": data.get("gmv", 0),
+                    "order_count": data.get("order_count", 0),
+                    "start_date": start_date,
+                    "end_date": end_date
                 }
-                
-                response = await client.get(
-                    f"{self.base_url}/api/v1/creator/gmv/period",
-                    headers=headers,
-                    params=params,
-                    timeout=30.0
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return {
-                        "period_gmv": data.get("gmv", 0),
-                        "order_count": data.get("order_count", 0),
-                        "start_date": start_date,
-                        "end_date": end_date
-                    }
-                else:
-                    logger.error(f"TikTok API error: {response.status_code}")
-                    return None
+            else:
+                logger.error(f"TikTok API error: {response.status_code}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error fetching period GMV: {str(e)}")
@@ -148,25 +235,18 @@ class TikTokShopService:
             if self.mock_mode:
                 return self._get_mock_detailed_breakdown(tiktok_user_id)
             
-            async with AsyncClient() as client:
-                headers = self._get_headers()
-                params = {
-                    "creator_id": tiktok_user_id,
-                    "shop_id": self.shop_id
-                }
-                
-                response = await client.get(
-                    f"{self.base_url}/api/v1/creator/gmv/breakdown",
-                    headers=headers,
-                    params=params,
-                    timeout=30.0
-                )
-                
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    logger.error(f"TikTok API error: {response.status_code}")
-                    return None
+            params = {
+                "creator_id": tiktok_user_id,
+                "shop_id": self.shop_id
+            }
+            
+            response = await self._get("/api/v1/creator/gmv/breakdown", params)
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"TikTok API error: {response.status_code}")
+                return None
                     
         except Exception as e:
             logger.error(f"Error fetching GMV breakdown: {str(e)}")
@@ -0,0 +1,124 @@
+# scripts/benchmark_cache_serialization.py
+"""
+Compare the cache's tagged msgpack/zstd serialization with the previous
+json-or-pickle behaviour of RedisBackend.
+
+Run from the shared-types directory:
+    python -m scripts.benchmark_cache_serialization
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+from uuid import uuid4
+import json
+import pickle
+import timeit
+
+from app.core import serialization
+from app.schemas.creator import CreatorRankingResponse
+
+
+def legacy_dumps(value: Any) -> bytes:
+    """RedisBackend.set before the serialization layer"""
+    if isinstance(value, (str, int, float)):
+        return str(value).encode()
+    try:
+        return json.dumps(value).encode()
+    except (TypeError, ValueError):
+        return pickle.dumps(value)
+
+
+def legacy_loads(value: bytes) -> Any:
+    """RedisBackend.get before the serialization layer"""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        try:
+            return pickle.loads(value)
+        except Exception:
+            return value.decode() if isinstance(value, bytes) else value
+    except UnicodeDecodeError:
+        return pickle.loads(value)
+
+
+def sample_payloads() -> Dict[str, Any]:
+    now = datetime.now(timezone.utc)
+    leaderboard = [
+        CreatorRankingResponse(
+            rank=i,
+            creator_id=uuid4(),
+            username=f"creator_{i}",
+            profile_image_url=None,
+            total_gmv=12345.67 * i,
+            badges_earned=i % 7,
+            highest_badge="gmv_10k" if i % 3 else None,
+            content_niche="fashion",
+            follower_count=i * 1000,
+        )
+        for i in range(1, 51)
+    ]
+    return {
+        "counter (int)": 42,
+        "small dict": {"creator_id": str(uuid4()), "gmv": 1234.5, "badges": ["a", "b"]},
+        "leaderboard (50 models)": {
+            "total": 50,
+            "creators": leaderboard,
+            "total_gmv": Decimal("15740231.50"),
+            "generated_at": now,
+        },
+        "large list (2k dicts)": [
+            {"id": i, "status": "active", "niche": "fashion", "followers": i * 10}
+            for i in range(2000)
+        ],
+    }
+
+
+def bench(func: Callable[[], Any], number: int) -> float:
+    """Microseconds per call, best of 3"""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1_000_000
+
+
+def run(number: int = 2000) -> List[Dict[str, Any]]:
+    rows = []
+    for name, value in sample_payloads().items():
+        legacy = legacy_dumps(value)
+        tagged = serialization.dumps(value)
+        restored = serialization.loads(tagged)
+        rows.append({
+            "payload": name,
+            "legacy_bytes": len(legacy),
+            "tagged_bytes": len(tagged),
+            "legacy_set_us": bench(lambda: legacy_dumps(value), number),
+            "tagged_set_us": bench(lambda: serialization.dumps(value), number),
+            "legacy_get_us": bench(lambda: legacy_loads(legacy), number),
+            "tagged_get_us": bench(lambda: serialization.loads(tagged), number),
+            "legacy_type": type(legacy_loads(legacy)).__name__,
+            "round_trip": restored == value,
+        })
+    return rows
+
+
+def main():
+    print(
+        f"msgpack={serialization.HAS_MSGPACK} orjson={serialization.HAS_ORJSON} "
+        f"zstd={serialization.HAS_ZSTD}"
+    )
+    header = (
+        f"{'payload':<26}{'bytes old/new':>16}{'set µs old/new':>20}"
+        f"{'get µs old/new':>20}  legacy type  round trip"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in run():
+        print(
+            f"{row['payload']:<26}"
+            f"{row['legacy_bytes']:>8}/{row['tagged_bytes']:<7}"
+            f"{row['legacy_set_us']:>10.1f}/{row['tagged_set_us']:<9.1f}"
+            f"{row['legacy_get_us']:>10.1f}/{row['tagged_get_us']:<9.1f}"
+            f"  {row['legacy_type']:<11}  {row['round_trip']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# scripts/benchmark_rate_limiter.py
+"""
+Measure rate limit checks per second for each algorithm, against the
+Redis rate limit database, with and without the in-process pre-check.
+
+"distinct clients" spreads checks over many keys that stay under their
+limit, so every check reaches Redis. "abusive client" sends every check
+from one key far over its limit, which the pre-check absorbs locally.
+
+Run from the shared-types directory (Redis must be reachable):
+    python -m scripts.benchmark_rate_limiter
+"""
+
+from typing import Any, Dict, List
+import asyncio
+import time
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.limiter import RateLimiter, SLIDING_WINDOW, SLIDING_LOG, TOKEN_BUCKET
+
+CHECKS = 5000
+CONCURRENCY = 50
+
+
+async def checks_per_second(
+    limiter: RateLimiter, client: redis.Redis, keys: List[str], limit: int
+) -> float:
+    queue = iter(range(CHECKS))
+
+    async def worker():
+        for i in queue:
+            await limiter.check_rate_limit(
+                keys[i % len(keys)], limit=limit, window=60, redis_client=client
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return CHECKS / (time.perf_counter() - started)
+
+
+async def run(client: redis.Redis) -> List[Dict[str, Any]]:
+    rows = []
+    for algorithm in (SLIDING_WINDOW, SLIDING_LOG, TOKEN_BUCKET):
+        for precheck in (False, True):
+            row = {"algorithm": algorithm, "precheck": precheck}
+            for scenario, keys, limit in (
+                ("distinct", [f"bench:{algorithm}:{precheck}:{i}" for i in range(CHECKS)], 100),
+                ("abusive", [f"bench:{algorithm}:{precheck}:abuser"], 10),
+            ):
+                limiter = RateLimiter(algorithm=algorithm, local_precheck=precheck)
+                row[scenario] = await checks_per_second(limiter, client, keys, limit)
+            rows.append(row)
+    return rows
+
+
+async def main():
+    client = redis.from_url(settings.get_redis_url(settings.REDIS_RATE_LIMIT_DB), decode_responses=True)
+    try:
+        await client.ping()
+        rows = await run(client)
+        async for key in client.scan_iter(match="rl:*bench:*", count=1000):
+            await client.delete(key)
+    finally:
+        await client.close()
+
+    header = f"{'algorithm':<16}{'pre-check':<11}{'distinct clients/s':>20}{'abusive client/s':>20}"
+    print(f"{CHECKS} checks, {CONCURRENCY} concurrent")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['algorithm']:<16}{str(row['precheck']):<11}"
+            f"{row['distinct']:>20,.0f}{row['abusive']:>20,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
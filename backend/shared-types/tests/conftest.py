@@ -0,0 +1,13 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time(); advance it by adding to clock.now"""
+    class Clock:
+        now = 1_000_000.0
+
+    monkeypatch.setattr(time, "time", lambda: Clock.now)
+    return Clock
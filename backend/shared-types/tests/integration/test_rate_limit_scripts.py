@@ -0,0 +1,159 @@
+"""
+Tests for the rate limit Lua scripts' decisions and retry-after math
+
+Needs the Redis rate limit database; skipped when it is not reachable.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.limiter import _SCRIPTS, SLIDING_LOG, SLIDING_WINDOW, TOKEN_BUCKET
+
+# Allowance for time passing between reading Redis TIME and running a script
+DRIFT_MS = 50
+
+
+@pytest_asyncio.fixture
+async def client():
+    client = redis.from_url(settings.get_redis_url(settings.REDIS_RATE_LIMIT_DB), decode_responses=True)
+    try:
+        await client.ping()
+    except Exception:
+        await client.close()
+        pytest.skip("Redis is not reachable")
+    yield client
+    await client.close()
+
+
+@pytest_asyncio.fixture
+async def key(client):
+    key = f"rl:test:{uuid.uuid4().hex}"
+    yield key
+    await client.delete(key)
+
+
+async def redis_now_ms(client) -> int:
+    seconds, microseconds = await client.time()
+    return seconds * 1000 + microseconds // 1000
+
+
+async def run(client, algorithm, key, *args):
+    return await client.register_script(_SCRIPTS[algorithm])(keys=[key], args=list(args))
+
+
+async def early_in_window(client, window: int) -> int:
+    """Wait until the first half of a window; returns the ms into it"""
+    into = await redis_now_ms(client) % window
+    if into >= window // 2:
+        await asyncio.sleep((window - into) / 1000)
+        into = await redis_now_ms(client) % window
+    return into
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_retry_after_is_time_to_refill_cost(client, key):
+    # 10 tokens per minute: one token every 6000ms
+    for _ in range(10):
+        allowed, _, _ = await run(client, TOKEN_BUCKET, key, 60000, 10, 1, 10)
+        assert allowed == 1
+
+    allowed, remaining, retry = await run(client, TOKEN_BUCKET, key, 60000, 10, 1, 10)
+    assert (allowed, remaining) == (0, 0)
+    assert 6000 - DRIFT_MS <= retry <= 6000
+
+    allowed, _, retry = await run(client, TOKEN_BUCKET, key, 60000, 10, 3, 10)
+    assert allowed == 0
+    assert 18000 - DRIFT_MS <= retry <= 18000
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_again_after_retry_after(client, key):
+    await run(client, TOKEN_BUCKET, key, 1000, 10, 1, 1)
+    allowed, _, retry = await run(client, TOKEN_BUCKET, key, 1000, 10, 1, 1)
+    assert allowed == 0
+
+    await asyncio.sleep(retry / 1000 + 0.01)
+    allowed, _, _ = await run(client, TOKEN_BUCKET, key, 1000, 10, 1, 1)
+    assert allowed == 1
+
+
+@pytest.mark.asyncio
+async def test_sliding_log_retry_after_waits_for_oldest_entries(client, key):
+    started = await redis_now_ms(client)
+    for i in range(3):
+        allowed, remaining, _ = await run(client, SLIDING_LOG, key, 60000, 3, 1, f"m{i}")
+        assert (allowed, remaining) == (1, 2 - i)
+
+    allowed, remaining, retry = await run(client, SLIDING_LOG, key, 60000, 3, 1, "m3")
+    assert (allowed, remaining) == (0, 0)
+    elapsed = await redis_now_ms(client) - started
+    assert 60000 - elapsed - DRIFT_MS <= retry <= 60000
+
+    # A cost of 2 needs the two oldest entries gone
+    allowed, _, retry_for_two = await run(client, SLIDING_LOG, key, 60000, 3, 2, "m4")
+    assert allowed == 0
+    assert retry_for_two >= retry
+
+
+@pytest.mark.asyncio
+async def test_sliding_log_allows_again_after_retry_after(client, key):
+    for i in range(2):
+        await run(client, SLIDING_LOG, key, 500, 2, 1, f"m{i}")
+    allowed, _, retry = await run(client, SLIDING_LOG, key, 500, 2, 1, "m2")
+    assert allowed == 0
+
+    await asyncio.sleep(retry / 1000 + 0.01)
+    allowed, _, _ = await run(client, SLIDING_LOG, key, 500, 2, 1, "m3")
+    assert allowed == 1
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_full_current_window(client, key):
+    window, limit = 10000, 5
+    into = await early_in_window(client, window)
+    current = (await redis_now_ms(client)) // window
+    await client.hset(key, mapping={"w": current, "c": limit, "p": 0})
+
+    allowed, remaining, retry = await run(client, SLIDING_WINDOW, key, window, limit, 1)
+
+    # Past this window, and until its count has decayed to limit - cost
+    expected = window - into + window * (1 - (limit - 1) / limit)
+    assert (allowed, remaining) == (0, 0)
+    assert expected - DRIFT_MS <= retry <= expected
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_previous_window_decay(client, key):
+    window, limit = 10000, 5
+    into = await early_in_window(client, window)
+    current = (await redis_now_ms(client)) // window
+    # Weighted estimate 8 * (1 - into / window) + 1 stays over the limit
+    # for the first half of the window
+    await client.hset(key, mapping={"w": current, "c": 1, "p": 8})
+
+    allowed, _, retry = await run(client, SLIDING_WINDOW, key, window, limit, 1)
+
+    # Until the previous window's weight has fallen to limit - c - cost
+    expected = window * (1 - (limit - 1 - 1) / 8) - into
+    assert allowed == 0
+    assert expected - DRIFT_MS <= retry <= expected + 1
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_rolls_current_count_into_previous(client, key):
+    window, limit = 10000, 5
+    await early_in_window(client, window)
+    current = (await redis_now_ms(client)) // window
+    await client.hset(key, mapping={"w": current - 1, "c": 3, "p": 9})
+
+    allowed, _, _ = await run(client, SLIDING_WINDOW, key, window, limit, 1)
+
+    state = await client.hgetall(key)
+    assert allowed == 1
+    # Last window's count becomes the previous one; the older count is dropped
+    assert (int(state["w"]), int(state["c"]), int(state["p"])) == (current, 1, 3)
@@ -0,0 +1,80 @@
+"""
+Tests for the in-memory cache backend
+"""
+
+import pytest
+
+from app.core.cache import MemoryBackend
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=3)
+    for key in ("a", "b", "c"):
+        await backend.set(key, key.upper())
+
+    assert await backend.get("a") == "A"  # "b" is now the oldest
+    await backend.set("d", "D")
+
+    assert await backend.get("b") is None
+    assert [await backend.get(key) for key in ("a", "c", "d")] == ["A", "C", "D"]
+
+
+@pytest.mark.asyncio
+async def test_overwrite_does_not_evict():
+    backend = MemoryBackend(max_entries=2)
+    await backend.set("a", 1)
+    await backend.set("b", 2)
+    await backend.set("a", 3)
+
+    assert await backend.get("a") == 3
+    assert await backend.get("b") == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire(clock):
+    backend = MemoryBackend(max_entries=10)
+    await backend.set("short", 1, expire=10)
+    await backend.set("forever", 2)
+
+    clock.now += 9
+    assert await backend.exists("short")
+
+    clock.now += 2
+    assert await backend.get("short") is None
+    assert not await backend.exists("short")
+    assert await backend.get("forever") == 2
+
+
+@pytest.mark.asyncio
+async def test_set_without_expiry_clears_previous_expiry(clock):
+    backend = MemoryBackend(max_entries=10)
+    await backend.set("key", 1, expire=10)
+    await backend.set("key", 2)
+
+    clock.now += 60
+    assert await backend.get("key") == 2
+
+
+@pytest.mark.asyncio
+async def test_expire_sets_ttl_on_existing_key(clock):
+    backend = MemoryBackend(max_entries=10)
+    await backend.set("key", 1)
+    await backend.expire("key", 5)
+    await backend.expire("missing", 5)
+
+    clock.now += 6
+    assert await backend.get("key") is None
+    assert not await backend.exists("missing")
+
+
+@pytest.mark.asyncio
+async def test_clear_pattern():
+    backend = MemoryBackend(max_entries=10)
+    await backend.set("tsc:users:1", 1)
+    await backend.set("tsc:users:2", 2)
+    await backend.set("tsc:badges:1", 3)
+
+    assert await backend.clear_pattern("tsc:users:*") == 2
+    assert await backend.get("tsc:users:1") is None
+    assert await backend.get("tsc:badges:1") == 3
@@ -0,0 +1,133 @@
+"""
+Tests for CacheManager.get_or_set: single flight, early refresh and
+stale-while-revalidate
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.cache import CacheManager, MemoryBackend
+
+
+class Loader:
+    """Counts calls and returns the call number"""
+
+    def __init__(self, delay: float = 0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(self.delay)
+        return {"call": call}
+
+
+@pytest.fixture
+def cache():
+    return CacheManager(MemoryBackend(max_entries=100))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_call(cache):
+    loader = Loader(delay=0.05)
+
+    results = await asyncio.gather(*(cache.get_or_set("hot", loader, expire=60) for _ in range(20)))
+
+    assert loader.calls == 1
+    assert all(result == {"call": 1} for result in results)
+    assert await cache.get("hot") == {"call": 1}
+
+
+@pytest.mark.asyncio
+async def test_failure_reaches_every_waiter_and_is_not_cached(cache):
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_set("key", fail, expire=60) for _ in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert await cache.get("key") is None
+    assert not cache._inflight
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_the_others(cache):
+    loader = Loader(delay=0.05)
+    first = asyncio.create_task(cache.get_or_set("key", loader, expire=60))
+    second = asyncio.create_task(cache.get_or_set("key", loader, expire=60))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+
+    assert await second == {"call": 1}
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_none_is_not_cached(cache):
+    calls = []
+
+    async def nothing():
+        calls.append(1)
+        return None
+
+    assert await cache.get_or_set("key", nothing, expire=60) is None
+    assert await cache.get_or_set("key", nothing, expire=60) is None
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_early_refresh_disabled_keeps_value_until_expiry(cache, clock):
+    loader = Loader()
+    await cache.get_or_set("key", loader, expire=60, early_refresh_beta=0)
+
+    clock.now += 59
+    assert await cache.get_or_set("key", loader, expire=60, early_refresh_beta=0) == {"call": 1}
+    assert loader.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_early_refresh_recomputes_before_expiry(cache, clock):
+    loader = Loader(delay=0.01)
+    await cache.get_or_set("key", loader, expire=60)
+
+    # A beta this large makes the XFetch test pass at any time before expiry
+    clock.now += 1
+    assert await cache.get_or_set("key", loader, expire=60, early_refresh_beta=1e9) == {"call": 2}
+
+
+@pytest.mark.asyncio
+async def test_expired_value_is_recomputed_without_stale_ttl(cache, clock):
+    loader = Loader()
+    await cache.get_or_set("key", loader, expire=10, early_refresh_beta=0)
+
+    clock.now += 11
+    assert await cache.get_or_set("key", loader, expire=10, early_refresh_beta=0) == {"call": 2}
+
+
+@pytest.mark.asyncio
+async def test_stale_value_is_served_while_refreshing(cache, clock):
+    loader = Loader(delay=0.05)
+    await cache.get_or_set("key", loader, expire=10, stale_ttl=60, early_refresh_beta=0)
+
+    clock.now += 15
+    stale = await cache.get_or_set("key", loader, expire=10, stale_ttl=60, early_refresh_beta=0)
+
+    assert stale == {"call": 1}
+    refresh = cache._inflight[cache._make_key("key")]
+    assert await refresh == {"call": 2}
+    assert await cache.get("key") == {"call": 2}
+
+
+@pytest.mark.asyncio
+async def test_value_past_stale_ttl_is_not_served(cache, clock):
+    loader = Loader()
+    await cache.get_or_set("key", loader, expire=10, stale_ttl=5, early_refresh_beta=0)
+
+    clock.now += 16
+    assert await cache.get_or_set("key", loader, expire=10, stale_ttl=5, early_refresh_beta=0) == {"call": 2}
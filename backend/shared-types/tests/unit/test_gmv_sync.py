@@ -0,0 +1,158 @@
+"""
+Tests for batched GMV sync and the TikTok Shop client's adaptive pacing
+"""
+
+import asyncio
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+import httpx
+import pytest
+from sqlalchemy.dialects import postgresql
+
+# app.main first: these modules are only importable once the app has wired
+# up its packages
+import app.main  # noqa: F401
+from app.background.tasks import badge_checker, gmv_sync
+from app.services.integrations.tiktok_shop_service import AdaptiveRateLimiter, TikTokShopService
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers the batch SELECT with `rows` and records the other statements"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return FakeResult(self.rows if len(self.statements) == 1 else [])
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def gmv(monkeypatch):
+    """GMV the TikTok API reports per TikTok user ID, and the IDs it was asked for"""
+    gmv = {"requested": []}
+
+    async def get_creators_gmv(self, tiktok_user_ids):
+        gmv["requested"].append(list(tiktok_user_ids))
+        return {user_id: {"total_gmv": gmv[user_id]} if user_id in gmv else None for user_id in tiktok_user_ids}
+
+    async def check_creator_badges(creator_id, current_gmv=None):
+        return [f"badge-{current_gmv}"]
+
+    monkeypatch.setattr(TikTokShopService, "get_creators_gmv", get_creators_gmv)
+    monkeypatch.setattr(badge_checker, "check_creator_badges", check_creator_badges)
+    return gmv
+
+
+@pytest.mark.asyncio
+async def test_batch_is_read_fetched_and_written_together(monkeypatch, gmv):
+    up, same, down, missing, failed = (uuid4() for _ in range(5))
+    session = FakeSession([
+        (up, "tt-up", Decimal("100.00")),
+        (same, "tt-same", Decimal("50.00")),
+        (down, "tt-down", Decimal("80.00")),
+        (failed, "tt-failed", Decimal("10.00")),
+    ])
+    monkeypatch.setattr(gmv_sync, "async_session_maker", lambda: session)
+    gmv.update({"tt-up": 150, "tt-same": 50, "tt-down": 60})
+
+    results = await gmv_sync.sync_creators_gmv([up, same, down, missing, failed])
+
+    # One SELECT, one API fan-out, one UPDATE for both changed creators
+    assert gmv["requested"] == [["tt-up", "tt-same", "tt-down", "tt-failed"]]
+    assert len(session.statements) == 2 and session.commits == 1
+    update = str(session.statements[1].compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+    assert f"('{up}', '150')" in update and f"('{down}', '60')" in update
+    assert str(same) not in update
+
+    assert results[0]["new_gmv"] == 150.0 and results[0]["new_badges"] == ["badge-150"]
+    assert results[1]["unchanged"] and results[1]["gmv"] == 50.0
+    assert results[2]["gmv"] == 60.0 and "new_badges" not in results[2]
+    assert results[3] is None and results[4] is None
+
+
+def test_bulk_update_sets_every_change_in_one_statement():
+    first, second = uuid4(), uuid4()
+
+    sql = str(gmv_sync._bulk_gmv_update([(first, Decimal("1.50")), (second, Decimal("2"))]).compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+    assert sql.count("UPDATE users.users") == 1
+    assert "FROM (VALUES" in sql
+    assert f"('{first}', '1.50')" in sql and f"('{second}', '2')" in sql
+
+
+def test_rate_limiter_backs_off_and_recovers():
+    limiter = AdaptiveRateLimiter(max_rate=8, min_rate=1)
+
+    for expected in (4, 2, 1, 1):
+        limiter.on_throttle()
+        assert limiter.rate == expected
+
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(1.8)
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.rate == 8
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_requests_and_honours_retry_after():
+    limiter = AdaptiveRateLimiter(max_rate=50, min_rate=1)
+
+    started = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    assert time.monotonic() - started >= 0.04
+
+    limiter.on_throttle(retry_after=0.1)
+    started = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - started >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_throttled_requests_are_retried_on_the_shared_client(monkeypatch):
+    statuses = [429, 503, 200]
+    sent = []
+
+    def handle(request):
+        sent.append(request.url.params["creator_id"])
+        return httpx.Response(statuses.pop(0), json={"total_gmv": 42})
+
+    monkeypatch.setenv("TIKTOK_SHOP_API_KEY", "key")
+    monkeypatch.setenv("TIKTOK_SHOP_API_SECRET", "secret")
+    monkeypatch.setenv("TIKTOK_SHOP_APP_ID", "app")
+    monkeypatch.setattr(TikTokShopService, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handle)))
+    monkeypatch.setattr(TikTokShopService, "_client_loop", asyncio.get_running_loop())
+    monkeypatch.setattr(TikTokShopService, "_rate_limiter", AdaptiveRateLimiter(max_rate=1000, min_rate=100))
+
+    result = await TikTokShopService().get_creator_gmv("tt-1")
+
+    assert result["total_gmv"] == 42
+    assert sent == ["tt-1"] * 3
+    assert TikTokShopService._rate_limiter.rate < 1000
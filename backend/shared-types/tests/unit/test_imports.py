@@ -0,0 +1,31 @@
+"""
+Import checks for the application and the modules that open their own
+database sessions
+"""
+
+import importlib
+
+import pytest
+
+
+def test_app_imports():
+    from app.main import app
+
+    assert app.routes
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "app.services.badge_service.badge_service",
+        "app.services.creator_service.analytics_service",
+        "app.background.tasks.badge_checker",
+        "app.background.tasks.gmv_sync",
+    ],
+)
+def test_session_users_import(module):
+    # app.main first: these modules are only importable once the app has
+    # wired up its packages
+    importlib.import_module("app.main")
+
+    assert importlib.import_module(module).async_session_maker is not None
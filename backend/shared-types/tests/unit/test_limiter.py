@@ -0,0 +1,194 @@
+"""
+Tests for the in-process rate limiter and RateLimiter's Redis handling
+"""
+
+import time
+
+import pytest
+
+from app.core.limiter import (
+    LocalRateLimiter,
+    RateLimiter,
+    SLIDING_LOG,
+    SLIDING_WINDOW,
+    TOKEN_BUCKET,
+)
+
+
+@pytest.fixture
+def monotonic(monkeypatch):
+    class Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(time, "monotonic", lambda: Clock.now)
+    return Clock
+
+
+class ScriptedRedis:
+    """Redis client whose scripts all return `result` (or raise `error`)"""
+
+    def __init__(self, result=(1, 4, 0), error=None):
+        self.result = list(result)
+        self.error = error
+        self.registered = []
+        self.calls = []
+
+    def register_script(self, source):
+        self.registered.append(source)
+
+        async def script(keys, args):
+            self.calls.append((keys, args))
+            if self.error:
+                raise self.error
+            return self.result
+
+        return script
+
+
+def test_local_bucket_allows_capacity_then_reports_retry_after(monotonic):
+    limiter = LocalRateLimiter(max_keys=10)
+
+    results = [limiter.acquire("k", capacity=3, rate=0.5) for _ in range(4)]
+
+    assert [allowed for allowed, _, _ in results] == [True, True, True, False]
+    assert [remaining for _, remaining, _ in results] == [2, 1, 0, 0]
+    # One token short at 0.5 tokens per second
+    assert results[-1][2] == pytest.approx(2.0)
+
+
+def test_local_bucket_refills_over_time(monotonic):
+    limiter = LocalRateLimiter(max_keys=10)
+    for _ in range(3):
+        limiter.acquire("k", capacity=3, rate=0.5)
+
+    monotonic.now += 1
+    allowed, _, retry_after = limiter.acquire("k", capacity=3, rate=0.5)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+    monotonic.now += 1
+    assert limiter.acquire("k", capacity=3, rate=0.5)[0]
+
+    monotonic.now += 100  # refill is capped at capacity
+    assert limiter.acquire("k", capacity=3, rate=0.5, cost=3) == (True, 0, 0.0)
+
+
+def test_cost_is_taken_in_one_step(monotonic):
+    limiter = LocalRateLimiter(max_keys=10)
+
+    assert limiter.acquire("k", capacity=5, rate=1, cost=4) == (True, 1, 0.0)
+    allowed, remaining, retry_after = limiter.acquire("k", capacity=5, rate=1, cost=2)
+    assert (allowed, remaining) == (False, 1)
+    assert retry_after == pytest.approx(1.0)
+
+
+def test_refund_returns_tokens_and_blocks_until_retry(monotonic):
+    limiter = LocalRateLimiter(max_keys=10)
+    limiter.acquire("k", capacity=3, rate=0.5)
+
+    limiter.refund("k", cost=1, block_seconds=30)
+
+    allowed, remaining, retry_after = limiter.acquire("k", capacity=3, rate=0.5)
+    assert (allowed, remaining) == (False, 0)
+    assert retry_after == pytest.approx(30)
+
+    monotonic.now += 30
+    assert limiter.acquire("k", capacity=3, rate=0.5) == (True, 2, 0.0)
+
+
+def test_least_recently_used_keys_are_dropped(monotonic):
+    limiter = LocalRateLimiter(max_keys=2)
+    limiter.acquire("a", capacity=1, rate=0.01)
+    limiter.acquire("b", capacity=1, rate=0.01)
+    limiter.acquire("a", capacity=1, rate=0.01)  # "b" is now the oldest
+    limiter.acquire("c", capacity=1, rate=0.01)
+
+    assert list(limiter._buckets) == ["a", "c"]
+    # "b" starts again from a full bucket
+    assert limiter.acquire("b", capacity=1, rate=0.01)[0]
+
+
+def test_unknown_algorithm_is_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(algorithm="fixed_window")
+
+
+@pytest.mark.asyncio
+async def test_without_redis_the_local_limiter_decides():
+    limiter = RateLimiter(algorithm=SLIDING_WINDOW, local_precheck=False)
+
+    results = [await limiter.check_rate_limit("k", limit=2, window=60) for _ in range(3)]
+
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert results[-1][1]["retry_after"] == 30
+
+
+@pytest.mark.asyncio
+async def test_cost_above_capacity_is_denied_without_redis_call():
+    client = ScriptedRedis()
+    limiter = RateLimiter(algorithm=TOKEN_BUCKET)
+
+    allowed, metadata = await limiter.check_rate_limit("k", limit=5, window=60, redis_client=client, cost=6)
+
+    assert not allowed
+    assert metadata["retry_after"] == 60
+    assert client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_scripts_are_registered_once_per_client():
+    client = ScriptedRedis()
+    limiter = RateLimiter(local_precheck=False)
+
+    for algorithm in (SLIDING_WINDOW, SLIDING_LOG, TOKEN_BUCKET):
+        for _ in range(5):
+            await limiter.check_rate_limit("k", limit=10, window=60, redis_client=client, algorithm=algorithm)
+
+    assert len(client.registered) == 3
+    assert len(client.calls) == 15
+
+    other = ScriptedRedis()
+    await limiter.check_rate_limit("k", limit=10, window=60, redis_client=other)
+    assert len(other.registered) == 3
+
+
+@pytest.mark.asyncio
+async def test_script_arguments_per_algorithm():
+    client = ScriptedRedis()
+    limiter = RateLimiter(local_precheck=False)
+
+    await limiter.check_rate_limit("k", 10, 60, client, cost=2, burst=20, algorithm=SLIDING_WINDOW)
+    await limiter.check_rate_limit("k", 10, 60, client, cost=2, burst=20, algorithm=SLIDING_LOG)
+    await limiter.check_rate_limit("k", 10, 60, client, cost=2, burst=20, algorithm=TOKEN_BUCKET)
+
+    (window_keys, window_args), (log_keys, log_args), (bucket_keys, bucket_args) = client.calls
+    assert window_keys == ["rl:sliding_window:k:60"]
+    assert window_args == [60000, 10, 2]
+    assert log_args[:3] == [60000, 10, 2] and len(log_args) == 4
+    assert bucket_args == [60000, 10, 2, 20]
+
+
+@pytest.mark.asyncio
+async def test_redis_denial_reports_retry_after_and_blocks_locally():
+    client = ScriptedRedis(result=(0, 0, 12500))
+    limiter = RateLimiter(algorithm=SLIDING_WINDOW, local_precheck=True)
+
+    allowed, metadata = await limiter.check_rate_limit("k", limit=100, window=60, redis_client=client)
+    assert not allowed
+    assert metadata["retry_after"] == 13
+
+    # Turned away by the pre-check without another round trip
+    allowed, _ = await limiter.check_rate_limit("k", limit=100, window=60, redis_client=client)
+    assert not allowed
+    assert len(client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_local_limiter():
+    client = ScriptedRedis(error=ConnectionError("down"))
+
+    precheck = RateLimiter(algorithm=SLIDING_WINDOW, local_precheck=True)
+    assert [(await precheck.check_rate_limit("k", 2, 60, client))[0] for _ in range(3)] == [True, True, False]
+
+    no_precheck = RateLimiter(algorithm=SLIDING_WINDOW, local_precheck=False)
+    assert [(await no_precheck.check_rate_limit("k", 2, 60, client))[0] for _ in range(3)] == [True, True, False]
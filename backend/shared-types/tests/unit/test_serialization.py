@@ -0,0 +1,146 @@
+"""
+Tests for cached value serialization
+"""
+
+import json
+import pickle
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from uuid import uuid4
+
+import pytest
+from pydantic import BaseModel
+
+from app.core import serialization
+from app.core.cache import CacheManager, RedisBackend
+from app.core.config import settings
+from app.schemas.badge import BadgeStatsResponse
+
+
+class Color(Enum):
+    RED = "red"
+
+
+class LocalModel(BaseModel):
+    name: str
+
+
+class DictRedis:
+    """Just enough of a Redis client for RedisBackend get/set"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value):
+        self.store[key] = value
+
+    async def setex(self, key, expire, value):
+        self.store[key] = value
+
+
+def test_msgpack_round_trips_extension_types():
+    value = {
+        "amount": Decimal("1234.5600"),
+        "id": uuid4(),
+        "at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        "on": date(2024, 5, 1),
+        "nested": [{"n": 1}, None, True, 1.5, b"raw"],
+        42: "int key",
+    }
+
+    data = serialization.dumps(value)
+
+    assert data[0] == serialization.FORMAT_MSGPACK
+    assert serialization.loads(data) == value
+
+
+def test_msgpack_round_trips_app_models():
+    stats = BadgeStatsResponse(
+        total_badges_earned=3,
+        creators_with_badges=2,
+        badge_distribution={"rising_star": {"count": 3, "percentage": 50.0}},
+    )
+
+    restored = serialization.loads(serialization.dumps({"stats": stats}))["stats"]
+
+    assert isinstance(restored, BadgeStatsResponse)
+    assert restored == stats
+
+
+def test_models_outside_app_are_not_rebuilt():
+    data = serialization.dumps(LocalModel(name="x"))
+
+    with pytest.raises(serialization.SerializationError):
+        serialization.loads(data)
+
+
+def test_enums_and_sets_are_reduced():
+    assert serialization.loads(serialization.dumps({"c": Color.RED, "s": {1}})) == {"c": "red", "s": [1]}
+
+
+def test_unserializable_value_raises():
+    with pytest.raises(serialization.SerializationError):
+        serialization.dumps(object())
+
+
+def test_large_payloads_are_compressed():
+    if not serialization.HAS_ZSTD:
+        pytest.skip("zstandard is not installed")
+    value = {"text": "x" * settings.CACHE_COMPRESSION_THRESHOLD_BYTES * 4}
+
+    data = serialization.dumps(value)
+
+    assert data[0] == serialization.FORMAT_MSGPACK | serialization.COMPRESSED
+    assert len(data) < settings.CACHE_COMPRESSION_THRESHOLD_BYTES
+    assert serialization.loads(data) == value
+
+
+def test_json_fallback_without_msgpack(monkeypatch):
+    monkeypatch.setattr(serialization, "HAS_MSGPACK", False)
+
+    data = serialization.dumps({"amount": Decimal("1.50"), "on": date(2024, 5, 1)})
+
+    assert data[0] == serialization.FORMAT_JSON
+    assert serialization.loads(data) == {"amount": "1.50", "on": "2024-05-01"}
+
+
+def test_str_payloads_are_accepted(monkeypatch):
+    # e.g. read through a client created with decode_responses=True
+    monkeypatch.setattr(serialization, "HAS_MSGPACK", False)
+    data = serialization.dumps({"a": 1}).decode()
+
+    assert serialization.loads(data) == {"a": 1}
+    assert serialization.loads(None) is None
+
+
+@pytest.mark.parametrize(
+    "legacy",
+    [
+        json.dumps({"a": 1}).encode(),  # untagged JSON
+        pickle.dumps({"a": 1}),  # pickled by an older release
+        b"",
+        bytes([serialization.FORMAT_MSGPACK]) + b"\xc1",  # tagged, but corrupt
+    ],
+)
+def test_legacy_or_corrupt_payloads_raise(legacy):
+    with pytest.raises(serialization.SerializationError):
+        serialization.loads(legacy)
+
+
+@pytest.mark.asyncio
+async def test_legacy_payload_is_a_cache_miss_and_gets_replaced():
+    client = DictRedis()
+    cache = CacheManager(RedisBackend(client))
+    client.store[cache._make_key("key")] = pickle.dumps({"old": True})
+
+    assert await cache.get("key") is None
+
+    async def load():
+        return {"new": True}
+
+    assert await cache.get_or_set("key", load, expire=60) == {"new": True}
+    assert await cache.get("key") == {"new": True}
@@ -0,0 +1,93 @@
+"""
+Tests for tag invalidation and generation counters
+"""
+
+import pytest
+
+from app.core.cache import CacheManager, MemoryBackend, TaggedCache
+
+
+@pytest.fixture
+def backend():
+    return MemoryBackend(max_entries=100)
+
+
+@pytest.fixture
+def tagged(backend):
+    return TaggedCache(CacheManager(backend))
+
+
+@pytest.mark.asyncio
+async def test_invalidate_tags_deletes_members(backend):
+    await backend.set_with_tags("a", 1, ["tag:x"])
+    await backend.set_with_tags("b", 2, ["tag:x", "tag:y"])
+    await backend.set_with_tags("c", 3, ["tag:y"])
+
+    assert sorted(await backend.invalidate_tags(["tag:x"])) == ["a", "b"]
+    assert await backend.get("a") is None
+    assert await backend.get("b") is None
+    assert await backend.get("c") == 3
+    # "b" left the index of its other tag too
+    assert await backend.invalidate_tags(["tag:y"]) == ["c"]
+
+
+@pytest.mark.asyncio
+async def test_deleted_and_evicted_keys_leave_the_index():
+    backend = MemoryBackend(max_entries=2)
+    await backend.set_with_tags("a", 1, ["tag"])
+    await backend.set_with_tags("b", 2, ["tag"])
+    await backend.delete("a")
+    await backend.set("c", 3)
+    await backend.set("d", 4)  # evicts "b"
+
+    assert await backend.invalidate_tags(["tag"]) == []
+    assert not backend._tags and not backend._key_tags
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_leave_the_index(backend, clock):
+    await backend.set_with_tags("a", 1, ["tag"], expire=10)
+
+    clock.now += 11
+    assert await backend.get("a") is None
+    assert await backend.invalidate_tags(["tag"]) == []
+
+
+@pytest.mark.asyncio
+async def test_counters(backend):
+    assert await backend.get_counters(["x", "y"]) == [0, 0]
+    assert await backend.incr("x") == 1
+    assert await backend.incr("x") == 2
+    assert await backend.get_counters(["x", "y"]) == [2, 0]
+
+
+@pytest.mark.asyncio
+async def test_tagged_cache_invalidate(tagged):
+    await tagged.set_with_tags("creator:1", {"gmv": 10}, ["creator:1", "leaderboard"], expire=60)
+    await tagged.set_with_tags("creator:2", {"gmv": 20}, ["creator:2", "leaderboard"], expire=60)
+
+    assert await tagged.invalidate_tag("creator:1") == 1
+    assert await tagged.cache.get("creator:1") is None
+    assert await tagged.cache.get("creator:2") == {"gmv": 20}
+
+    assert await tagged.invalidate_tags(["leaderboard", "missing"]) == 1
+    assert await tagged.cache.get("creator:2") is None
+
+
+@pytest.mark.asyncio
+async def test_bump_tag_hides_versioned_entries(tagged):
+    await tagged.set_versioned("profile:1", "v1", ["creator:1", "badges"], expire=60)
+    await tagged.set_versioned("profile:2", "v1", ["creator:2", "badges"], expire=60)
+
+    assert await tagged.get_versioned("profile:1", ["creator:1", "badges"]) == "v1"
+
+    assert await tagged.bump_tag("creator:1") == 1
+    assert await tagged.get_versioned("profile:1", ["creator:1", "badges"]) is None
+    assert await tagged.get_versioned("profile:2", ["creator:2", "badges"]) == "v1"
+
+    await tagged.set_versioned("profile:1", "v2", ["creator:1", "badges"], expire=60)
+    assert await tagged.get_versioned("profile:1", ["creator:1", "badges"]) == "v2"
+
+    await tagged.bump_tag("badges")
+    assert await tagged.get_versioned("profile:1", ["creator:1", "badges"], default="miss") == "miss"
+    assert await tagged.get_versioned("profile:2", ["creator:2", "badges"]) is None